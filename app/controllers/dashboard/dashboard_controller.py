@@ -7,8 +7,10 @@ from app.models.travel_statement import TravelStatement, StatementStatus
 from app.models.note import Note
 from sqlalchemy import desc, or_, and_
 from datetime import datetime
+from app.utils.db_routing import read_only
 
 
+@read_only
 def dashboard():
     """Controller do dashboard principal"""
     user_id = session.get('user_id')
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import logging
 from flask import render_template, request, redirect, url_for, flash, session, jsonify
-from app.models.database import SessionLocal
+from app.models.database import get_db
 from app.models.travel_payout import TravelPayout
 from app.models.travel_statement import TravelStatement, StatementStatus
 from app.models.travel import Travel, TravelStatus
@@ -10,6 +10,7 @@ from app.models.city import City
 from app.models.state import State
 from app.models.vehicle import Vehicle
 from app.utils.permissions_helper import permission_required
+from app.utils.db_routing import read_only
 from sqlalchemy.orm import joinedload
 from sqlalchemy import case, func
 import json
@@ -19,7 +20,7 @@ import json
 def financial_accountability(payout_id):
     """Exibe tela de prestação de contas (wizard)"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Obter ID do usuário logado
         user_id = session.get('user_id')
@@ -76,8 +77,6 @@ def financial_accountability(payout_id):
                 'vehicle': allocated_vehicle
             }
 
-        db.close()
-
         return render_template(
             'pages/financial/accountability.html',
             payout=payout_data
@@ -89,10 +88,11 @@ def financial_accountability(payout_id):
         return redirect(url_for('admin.financial_payouts_list'))
 
 
+@read_only
 def financial_payouts_list():
     """Lista todos os repasses financeiros do usuário logado ou todos se tiver permissão"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Obter ID do usuário logado
         user_id = session.get('user_id')
@@ -172,8 +172,6 @@ def financial_payouts_list():
         # Calcular totais
         total_all = sum(p['amount'] for p in payouts_data)
 
-        db.close()
-
         return render_template(
             'pages/financial/list.html',
             payouts=payouts_data,
@@ -190,7 +188,7 @@ def financial_payouts_list():
 @permission_required('financial_review_accountability')
 def financial_review_accountability(payout_id):
     """Exibe tela de análise/revisão da prestação de contas"""
-    db = SessionLocal()
+    db = get_db()
 
     # Obter ID do usuário logado
     user_id = session.get('user_id')
@@ -215,7 +213,6 @@ def financial_review_accountability(payout_id):
         .first()
 
     if not payout:
-        db.close()
         flash('Repasse não encontrado', 'error')
         return redirect(url_for('admin.financial_payouts_list'))
 
@@ -223,7 +220,6 @@ def financial_review_accountability(payout_id):
     statement = db.query(TravelStatement).filter_by(payout_id=payout_id).first()
 
     if not statement:
-        db.close()
         flash('Prestação de contas não encontrada', 'warning')
         return redirect(url_for('admin.financial_payouts_list'))
 
@@ -250,8 +246,6 @@ def financial_review_accountability(payout_id):
             'vehicle': allocated_vehicle
         }
 
-    db.close()
-
     return render_template(
         'pages/financial/review.html',
         payout=payout_data
@@ -261,7 +255,7 @@ def financial_review_accountability(payout_id):
 def save_accountability(payout_id):
     """Salva ou atualiza a prestação de contas"""
     try:
-        db = SessionLocal()
+        db = get_db()
         user_id = session.get('user_id')
 
         if not user_id:
@@ -281,7 +275,6 @@ def save_accountability(payout_id):
         }
 
         if status not in status_map:
-            db.close()
             return jsonify({'success': False, 'error': 'Status inválido'}), 400
 
         status_enum = status_map[status]
@@ -292,7 +285,6 @@ def save_accountability(payout_id):
         # Para aprovação ou devolução, apenas verificar permissão
         if status in ['approved', 'returned']:
             if not user_has_permission('financial_review_accountability'):
-                db.close()
                 return jsonify({'success': False, 'error': 'Você não tem permissão para esta ação'}), 403
             # Buscar payout sem filtro de member_id
             payout = db.query(TravelPayout).filter_by(id=payout_id).first()
@@ -301,7 +293,6 @@ def save_accountability(payout_id):
             payout = db.query(TravelPayout).filter_by(id=payout_id, member_id=user_id).first()
 
         if not payout:
-            db.close()
             return jsonify({'success': False, 'error': 'Repasse não encontrado'}), 404
 
         # Buscar ou criar prestação de contas
@@ -334,7 +325,6 @@ def save_accountability(payout_id):
         }
 
         statement_id = statement.id
-        db.close()
 
         return jsonify({
             'success': True,
@@ -345,7 +335,6 @@ def save_accountability(payout_id):
     except Exception as e:
         if db:
             db.rollback()
-            db.close()
         logging.error(f"Erro ao salvar prestação de contas: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -363,7 +352,7 @@ def financial_accountability_report_pdf(payout_id):
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 
-    db = SessionLocal()
+    db = get_db()
 
     try:
         # Buscar informações do repasse e prestação de contas
@@ -784,5 +773,3 @@ def financial_accountability_report_pdf(payout_id):
     except Exception as e:
         logging.error(f"Erro ao gerar relatório: {e}")
         return f"Erro ao gerar relatório: {str(e)}", 500
-    finally:
-        db.close()
@@ -5,10 +5,11 @@ Gerencia a criação, edição e exclusão de grupos
 """
 
 from flask import render_template, request, redirect, url_for, flash
-from app.models.database import SessionLocal
+from app.models.database import get_db
 from app.models.group import Group
 from app.models.permission import Permission
 from app.utils.permissions_helper import permission_required
+from app.services.permission_service import permission_service
 
 
 @permission_required('groups_view')
@@ -16,12 +17,9 @@ def groups_list():
     """
     Lista todos os grupos do sistema
     """
-    db = SessionLocal()
-    try:
-        groups = db.query(Group).order_by(Group.name).all()
-        return render_template('pages/groups/list.html', groups=groups)
-    finally:
-        db.close()
+    db = get_db()
+    groups = db.query(Group).order_by(Group.name).all()
+    return render_template('pages/groups/list.html', groups=groups)
 
 
 @permission_required('groups_create')
@@ -31,7 +29,7 @@ def groups_create():
     GET: Mostra o formulário
     POST: Cria o novo grupo
     """
-    db = SessionLocal()
+    db = get_db()
     try:
         if request.method == 'GET':
             # Buscar todas as permissões agrupadas por módulo
@@ -83,6 +81,7 @@ def groups_create():
             permissions = db.query(Permission).filter(Permission.id.in_(permission_ids)).all()
             new_group.permissions_rel = permissions
 
+        permission_service.bump_version(db)
         db.commit()
         flash(f'Grupo "{name}" criado com sucesso!', 'success')
         return redirect(url_for('admin.groups_permissions'))
@@ -91,8 +90,6 @@ def groups_create():
         db.rollback()
         flash(f'Erro ao criar grupo: {str(e)}', 'danger')
         return redirect(url_for('admin.groups_create'))
-    finally:
-        db.close()
 
 
 @permission_required('groups_edit')
@@ -102,7 +99,7 @@ def groups_edit(group_id):
     GET: Mostra o formulário
     POST: Atualiza o grupo
     """
-    db = SessionLocal()
+    db = get_db()
     try:
         group = db.query(Group).filter(Group.id == group_id).first()
         if not group:
@@ -128,8 +125,6 @@ def groups_edit(group_id):
         db.rollback()
         flash(f'Erro ao atualizar grupo: {str(e)}', 'danger')
         return redirect(url_for('admin.groups_edit', group_id=group_id))
-    finally:
-        db.close()
 
 
 @permission_required('groups_delete')
@@ -137,7 +132,7 @@ def groups_delete(group_id):
     """
     Deleta um grupo
     """
-    db = SessionLocal()
+    db = get_db()
     try:
         group = db.query(Group).filter(Group.id == group_id).first()
         if not group:
@@ -151,6 +146,7 @@ def groups_delete(group_id):
 
         group_name = group.name
         db.delete(group)
+        permission_service.bump_version(db)
         db.commit()
 
         flash(f'Grupo "{group_name}" excluído com sucesso!', 'success')
@@ -160,5 +156,3 @@ def groups_delete(group_id):
         db.rollback()
         flash(f'Erro ao excluir grupo: {str(e)}', 'danger')
         return redirect(url_for('admin.groups_permissions'))
-    finally:
-        db.close()
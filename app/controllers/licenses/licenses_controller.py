@@ -4,8 +4,10 @@ from flask import render_template, request, redirect, url_for, flash, jsonify, m
 from app.services.license_service import license_service
 from datetime import datetime
 import threading
+from app.utils.db_routing import read_only
 
 
+@read_only
 def licenses_list():
     """Lista de licenças e geração de TXT"""
     # Buscar clientes únicos
@@ -47,6 +49,13 @@ def license_upload_process():
 
         # Função que será executada em background
         def process_file_async(file_content, user_id):
+            from app.models.database import session_scope
+
+            # A thread não tem teardown de requisição: session_scope devolve a conexão ao pool
+            with session_scope():
+                _process_file(file_content, user_id)
+
+        def _process_file(file_content, user_id):
             try:
                 saved_count, dates_count = license_service.process_and_save_file(file_content)
 
@@ -92,6 +101,7 @@ def license_upload_process():
         return redirect(url_for('admin.licenses_list'))
 
 
+@read_only
 def license_generate():
     """Gera arquivo TXT para cliente e data selecionados"""
     try:
@@ -128,6 +138,7 @@ def license_generate():
         return redirect(url_for('admin.licenses_list'))
 
 
+@read_only
 def license_view():
     """Visualiza licenças de um cliente e data"""
     try:
@@ -155,6 +166,7 @@ def license_view():
         return redirect(url_for('admin.licenses_list'))
 
 
+@read_only
 def license_get_dates_api():
     """API para buscar datas disponíveis (opcionalmente filtrado por cliente)"""
     try:
@@ -170,6 +182,7 @@ def license_get_dates_api():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@read_only
 def license_generate_bulk():
     """Gera arquivo TXT único com múltiplos clientes"""
     try:
@@ -224,6 +237,7 @@ def license_generate_bulk():
         return redirect(url_for('admin.licenses_list'))
 
 
+@read_only
 def license_view_pdf():
     """Visualiza licenças em PDF (sem download)"""
     try:
@@ -394,23 +408,21 @@ def license_delete_date():
         return redirect(url_for('admin.licenses_list'))
 
 
+@read_only
 def license_modules_list():
     """Lista todos os módulos cadastrados"""
-    from app.models.database import SessionLocal
+    from app.models.database import get_db
     from app.models.license_application import LicenseApplication
 
-    db = SessionLocal()
-    try:
-        # Buscar todos os módulos ordenados por código
-        modules = db.query(LicenseApplication).order_by(LicenseApplication.code).all()
-        return render_template('pages/licenses/modules.html', modules=modules)
-    finally:
-        db.close()
+    db = get_db()
+    # Buscar todos os módulos ordenados por código
+    modules = db.query(LicenseApplication).order_by(LicenseApplication.code).all()
+    return render_template('pages/licenses/modules.html', modules=modules)
 
 
 def license_module_create():
     """Cria um novo módulo via AJAX"""
-    from app.models.database import SessionLocal
+    from app.models.database import get_db
     from app.models.license_application import LicenseApplication
 
     try:
@@ -420,7 +432,7 @@ def license_module_create():
         if not new_code or not new_name:
             return jsonify({'success': False, 'error': 'Dados incompletos'}), 400
 
-        db = SessionLocal()
+        db = get_db()
         try:
             # Verificar se já existe um módulo com esse código
             existing = db.query(LicenseApplication).filter(LicenseApplication.code == new_code.strip()).first()
@@ -443,8 +455,6 @@ def license_module_create():
         except Exception as e:
             db.rollback()
             return jsonify({'success': False, 'error': str(e)}), 500
-        finally:
-            db.close()
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -452,7 +462,7 @@ def license_module_create():
 
 def license_module_update():
     """Atualiza um módulo via AJAX"""
-    from app.models.database import SessionLocal
+    from app.models.database import get_db
     from app.models.license_application import LicenseApplication
 
     try:
@@ -463,7 +473,7 @@ def license_module_update():
         if not module_id or not new_code or not new_name:
             return jsonify({'success': False, 'error': 'Dados incompletos'}), 400
 
-        db = SessionLocal()
+        db = get_db()
         try:
             module = db.query(LicenseApplication).filter(LicenseApplication.id == module_id).first()
 
@@ -483,8 +493,6 @@ def license_module_update():
         except Exception as e:
             db.rollback()
             return jsonify({'success': False, 'error': str(e)}), 500
-        finally:
-            db.close()
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
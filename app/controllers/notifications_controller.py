@@ -2,38 +2,58 @@
 from flask import render_template, request, redirect, url_for, flash, jsonify, session
 from app.models.notification import Notification, NotificationType
 from app.models.database import get_db
+from app.services.notification_counter_service import notification_counter_service
 from datetime import datetime
-from sqlalchemy import desc
+from sqlalchemy import func
+from app.utils.notification_pagination import clamp_limit, fetch_page, fetch_since
 
 
 def notifications_list():
-    """Lista todas as notificações do usuário"""
+    """Lista as notificações do usuário, paginadas por cursor (?cursor=)"""
     db = get_db()
     user_id = session.get('user_id')
 
     if not user_id:
         return redirect(url_for('auth.login'))
 
-    # Buscar todas as notificações do usuário ordenadas por data
-    notifications = db.query(Notification).filter_by(
-        user_id=user_id
-    ).order_by(desc(Notification.created_at)).all()
+    cursor = request.args.get('cursor')
+    try:
+        notifications, next_cursor = fetch_page(db, user_id, cursor=cursor)
+    except ValueError:
+        return redirect(url_for('admin.notifications_list'))
+
+    # Totais por tipo de todas as notificações (não apenas da página)
+    type_counts = {
+        notification_type.value: count
+        for notification_type, count in db.query(Notification.type, func.count(Notification.id))
+        .filter(Notification.user_id == user_id)
+        .group_by(Notification.type)
+        .all()
+    }
 
     # Contar notificações não lidas
-    unread_count = db.query(Notification).filter_by(
-        user_id=user_id,
-        is_read=False
-    ).count()
+    unread_count = notification_counter_service.get(user_id)
 
     return render_template(
         'pages/notifications/list.html',
         notifications=notifications,
+        next_cursor=next_cursor,
+        is_first_page=not cursor,
+        total_count=sum(type_counts.values()),
+        type_counts=type_counts,
         unread_count=unread_count
     )
 
 
 def notifications_api_list():
-    """API para listar notificações (usado pelo AJAX)"""
+    """
+    API para listar notificações (usado pelo AJAX)
+
+    Parâmetros:
+        limit: Itens por página (padrão 10, máximo 50)
+        cursor: Cursor devolvido em next_cursor, para a próxima página
+        since_id: Modo delta, apenas as notificações com id maior (reconexão)
+    """
     db = get_db()
     user_id = session.get('user_id')
 
@@ -41,22 +61,30 @@ def notifications_api_list():
         return jsonify({'error': 'Não autenticado'}), 401
 
     try:
+        since_id = request.args.get('since_id', type=int)
+        if since_id is not None:
+            notifications, truncated = fetch_since(db, user_id, since_id)
+            return jsonify({
+                'notifications': [n.to_dict() for n in notifications],
+                'unread_count': notification_counter_service.get(user_id),
+                'truncated': truncated
+            })
+
         # Limite de notificações para o dropdown (últimas 10)
-        limit = request.args.get('limit', 10, type=int)
+        limit = clamp_limit(request.args.get('limit'), default=10)
 
-        notifications = db.query(Notification).filter_by(
-            user_id=user_id
-        ).order_by(desc(Notification.created_at)).limit(limit).all()
+        try:
+            notifications, next_cursor = fetch_page(db, user_id, limit, request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         # Contar não lidas
-        unread_count = db.query(Notification).filter_by(
-            user_id=user_id,
-            is_read=False
-        ).count()
+        unread_count = notification_counter_service.get(user_id)
 
         return jsonify({
             'notifications': [n.to_dict() for n in notifications],
-            'unread_count': unread_count
+            'unread_count': unread_count,
+            'next_cursor': next_cursor
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -71,23 +99,25 @@ def mark_as_read(notification_id):
         return jsonify({'error': 'Não autenticado'}), 401
 
     try:
-        notification = db.query(Notification).filter_by(
+        # Marcar apenas se ainda não lida, para o contador não ser decrementado duas vezes
+        updated = db.query(Notification).filter_by(
             id=notification_id,
-            user_id=user_id
-        ).first()
+            user_id=user_id,
+            is_read=False
+        ).update({
+            'is_read': True,
+            'read_at': datetime.now()
+        }, synchronize_session=False)
 
-        if not notification:
+        if updated:
+            notification_counter_service.decrement(db, user_id)
+        elif not db.query(Notification.id).filter_by(id=notification_id, user_id=user_id).first():
             return jsonify({'error': 'Notificação não encontrada'}), 404
 
-        notification.is_read = True
-        notification.read_at = datetime.now()
         db.commit()
 
         # Contar não lidas restantes
-        unread_count = db.query(Notification).filter_by(
-            user_id=user_id,
-            is_read=False
-        ).count()
+        unread_count = notification_counter_service.get(user_id)
 
         return jsonify({
             'success': True,
@@ -108,13 +138,14 @@ def mark_all_as_read():
 
     try:
         # Atualizar todas as notificações não lidas
-        db.query(Notification).filter_by(
+        updated = db.query(Notification).filter_by(
             user_id=user_id,
             is_read=False
         ).update({
             'is_read': True,
             'read_at': datetime.now()
-        })
+        }, synchronize_session=False)
+        notification_counter_service.decrement(db, user_id, updated)
         db.commit()
 
         return jsonify({
@@ -136,22 +167,22 @@ def delete_notification(notification_id):
         return jsonify({'error': 'Não autenticado'}), 401
 
     try:
-        notification = db.query(Notification).filter_by(
+        # Excluir primeiro se não lida, para saber se o contador deve ser decrementado
+        deleted_unread = db.query(Notification).filter_by(
             id=notification_id,
-            user_id=user_id
-        ).first()
+            user_id=user_id,
+            is_read=False
+        ).delete(synchronize_session=False)
 
-        if not notification:
+        if deleted_unread:
+            notification_counter_service.decrement(db, user_id)
+        elif not db.query(Notification).filter_by(id=notification_id, user_id=user_id).delete(synchronize_session=False):
             return jsonify({'error': 'Notificação não encontrada'}), 404
 
-        db.delete(notification)
         db.commit()
 
         # Contar não lidas restantes
-        unread_count = db.query(Notification).filter_by(
-            user_id=user_id,
-            is_read=False
-        ).count()
+        unread_count = notification_counter_service.get(user_id)
 
         return jsonify({
             'success': True,
@@ -172,10 +203,7 @@ def get_unread_count():
         return jsonify({'error': 'Não autenticado'}), 401
 
     try:
-        unread_count = db.query(Notification).filter_by(
-            user_id=user_id,
-            is_read=False
-        ).count()
+        unread_count = notification_counter_service.get(user_id)
 
         return jsonify({'unread_count': unread_count})
     except Exception as e:
@@ -201,6 +229,7 @@ def create_notification(user_id, title, message, notification_type=NotificationT
         )
 
         db.add(notification)
+        notification_counter_service.increment(db, [user_id])
         db.commit()
         db.refresh(notification)
 
@@ -5,11 +5,12 @@ Gerencia permissões e associação de permissões a grupos
 """
 
 from flask import render_template, request, redirect, url_for, flash, jsonify
-from app.models.database import SessionLocal
+from app.models.database import get_db
 from app.models.permission import Permission
 from app.models.group import Group
 from app.models.group_permission import group_permissions
 from app.utils.permissions_helper import permission_required
+from app.services.permission_service import permission_service
 from sqlalchemy import select, delete
 
 
@@ -18,24 +19,21 @@ def permissions_list():
     """
     Lista todas as permissões do sistema agrupadas por módulo
     """
-    db = SessionLocal()
-    try:
-        # Buscar todas as permissões ordenadas por módulo e nome
-        permissions = db.query(Permission).order_by(Permission.module, Permission.name).all()
+    db = get_db()
+    # Buscar todas as permissões ordenadas por módulo e nome
+    permissions = db.query(Permission).order_by(Permission.module, Permission.name).all()
 
-        # Agrupar por módulo
-        permissions_by_module = {}
-        for permission in permissions:
-            module = permission.module or 'outros'
-            if module not in permissions_by_module:
-                permissions_by_module[module] = []
-            permissions_by_module[module].append(permission)
+    # Agrupar por módulo
+    permissions_by_module = {}
+    for permission in permissions:
+        module = permission.module or 'outros'
+        if module not in permissions_by_module:
+            permissions_by_module[module] = []
+        permissions_by_module[module].append(permission)
 
-        return render_template('admin/permissions/list.html',
-                             permissions_by_module=permissions_by_module,
-                             total_permissions=len(permissions))
-    finally:
-        db.close()
+    return render_template('admin/permissions/list.html',
+                         permissions_by_module=permissions_by_module,
+                         total_permissions=len(permissions))
 
 
 @permission_required('permissions_manage')
@@ -43,31 +41,28 @@ def groups_permissions():
     """
     Página de gerenciamento de permissões por grupo
     """
-    db = SessionLocal()
-    try:
-        # Buscar todos os grupos
-        groups = db.query(Group).order_by(Group.name).all()
+    db = get_db()
+    # Buscar todos os grupos
+    groups = db.query(Group).order_by(Group.name).all()
 
-        # Buscar todas as permissões agrupadas por módulo
-        permissions = db.query(Permission).order_by(Permission.module, Permission.name).all()
+    # Buscar todas as permissões agrupadas por módulo
+    permissions = db.query(Permission).order_by(Permission.module, Permission.name).all()
 
-        # Agrupar permissões por módulo
-        permissions_by_module = {}
-        for permission in permissions:
-            module = permission.module or 'outros'
-            if module not in permissions_by_module:
-                permissions_by_module[module] = []
-            permissions_by_module[module].append(permission)
+    # Agrupar permissões por módulo
+    permissions_by_module = {}
+    for permission in permissions:
+        module = permission.module or 'outros'
+        if module not in permissions_by_module:
+            permissions_by_module[module] = []
+        permissions_by_module[module].append(permission)
 
-        # Para cada grupo, carregar suas permissões
-        for group in groups:
-            _ = group.permissions_rel  # Força o carregamento
+    # Para cada grupo, carregar suas permissões
+    for group in groups:
+        _ = group.permissions_rel  # Força o carregamento
 
-        return render_template('pages/permissions/groups.html',
-                             groups=groups,
-                             permissions_by_module=permissions_by_module)
-    finally:
-        db.close()
+    return render_template('pages/permissions/groups.html',
+                         groups=groups,
+                         permissions_by_module=permissions_by_module)
 
 
 @permission_required('permissions_manage')
@@ -78,7 +73,7 @@ def group_permissions_update(group_id):
     Args:
         group_id: ID do grupo
     """
-    db = SessionLocal()
+    db = get_db()
     try:
         # Buscar o grupo
         group = db.query(Group).filter(Group.id == group_id).first()
@@ -104,6 +99,7 @@ def group_permissions_update(group_id):
                 )
             )
 
+        permission_service.bump_version(db)
         db.commit()
         flash(f'Permissões do grupo "{group.name}" atualizadas com sucesso!', 'success')
         return redirect(url_for('admin.groups_permissions'))
@@ -112,8 +108,6 @@ def group_permissions_update(group_id):
         db.rollback()
         flash(f'Erro ao atualizar permissões: {str(e)}', 'danger')
         return redirect(url_for('admin.groups_permissions'))
-    finally:
-        db.close()
 
 
 @permission_required('permissions_manage')
@@ -127,22 +121,19 @@ def api_group_permissions(group_id):
     Returns:
         JSON com lista de IDs das permissões do grupo
     """
-    db = SessionLocal()
-    try:
-        group = db.query(Group).filter(Group.id == group_id).first()
-        if not group:
-            return jsonify({'error': 'Grupo não encontrado'}), 404
+    db = get_db()
+    group = db.query(Group).filter(Group.id == group_id).first()
+    if not group:
+        return jsonify({'error': 'Grupo não encontrado'}), 404
 
-        # Retornar IDs das permissões
-        permission_ids = [perm.id for perm in group.permissions_rel]
+    # Retornar IDs das permissões
+    permission_ids = [perm.id for perm in group.permissions_rel]
 
-        return jsonify({
-            'group_id': group.id,
-            'group_name': group.name,
-            'permission_ids': permission_ids
-        })
-    finally:
-        db.close()
+    return jsonify({
+        'group_id': group.id,
+        'group_name': group.name,
+        'permission_ids': permission_ids
+    })
 
 
 @permission_required('permissions_view')
@@ -153,23 +144,20 @@ def api_permissions_by_module():
     Returns:
         JSON com permissões agrupadas por módulo
     """
-    db = SessionLocal()
-    try:
-        permissions = db.query(Permission).order_by(Permission.module, Permission.name).all()
-
-        # Agrupar por módulo
-        result = {}
-        for permission in permissions:
-            module = permission.module or 'outros'
-            if module not in result:
-                result[module] = []
-            result[module].append({
-                'id': permission.id,
-                'name': permission.name,
-                'slug': permission.slug,
-                'description': permission.description
-            })
-
-        return jsonify(result)
-    finally:
-        db.close()
+    db = get_db()
+    permissions = db.query(Permission).order_by(Permission.module, Permission.name).all()
+
+    # Agrupar por módulo
+    result = {}
+    for permission in permissions:
+        module = permission.module or 'outros'
+        if module not in result:
+            result[module] = []
+        result[module].append({
+            'id': permission.id,
+            'name': permission.name,
+            'slug': permission.slug,
+            'description': permission.description
+        })
+
+    return jsonify(result)
@@ -4,7 +4,7 @@ Controller para gerenciar o perfil do usuário
 """
 import logging
 from flask import render_template, session, redirect, url_for, flash, request, jsonify
-from app.models.database import SessionLocal
+from app.models.database import get_db
 from app.models.user import User
 
 
@@ -15,7 +15,7 @@ def profile_view():
         flash('Você precisa estar logado para acessar esta página', 'warning')
         return redirect(url_for('auth.login'))
 
-    db = SessionLocal()
+    db = get_db()
 
     try:
         # Buscar usuário no banco
@@ -45,8 +45,6 @@ def profile_view():
         logging.error(f"Erro ao carregar perfil: {str(e)}")
         flash('Erro ao carregar perfil do usuário', 'error')
         return redirect(url_for('admin.dashboard'))
-    finally:
-        db.close()
 
 
 def profile_update():
@@ -56,7 +54,7 @@ def profile_update():
         flash('Você precisa estar logado para acessar esta página', 'warning')
         return redirect(url_for('auth.login'))
 
-    db = SessionLocal()
+    db = get_db()
 
     try:
         # Buscar usuário no banco
@@ -85,8 +83,6 @@ def profile_update():
         logging.error(f"Erro ao atualizar perfil: {str(e)}")
         flash('Erro ao atualizar perfil', 'error')
         return redirect(url_for('admin.profile_view'))
-    finally:
-        db.close()
 
 
 def profile_change_password():
@@ -19,6 +19,7 @@ from app.models.application_ticket_module import ApplicationTicketModule
 from app.models.ticket_module import TicketModule
 from app.models.client_application import ClientApplication
 from app.models.database import db_session
+from app.utils.db_routing import read_only
 
 
 def add_page_number(canvas, doc):
@@ -47,6 +48,7 @@ def add_page_number(canvas, doc):
     canvas.drawRightString(A4[0] - 2.5*cm, 1*cm, text)
 
 
+@read_only
 def tickets_report_pdf(client_id):
     """Gera relatório de serviço em PDF no formato de ofício"""
     # Parâmetros da requisição
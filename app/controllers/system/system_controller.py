@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Controller de Diagnóstico do Sistema
+Expõe métricas internas da aplicação para administradores
+"""
+
+from flask import jsonify, render_template, request
+from app.models.database import engine, replica_engine, get_db
+from app.utils.database_monitor import get_pool_status, session_stats
+from app.utils.query_profiler import endpoint_query_stats
+from app.utils.slow_query_log import slow_query_log
+from app.utils.green_psycopg import is_green_psycopg_enabled
+from app.utils.permissions_helper import permission_required
+from app.services.whatsapp_outbox_service import whatsapp_outbox_service
+from app.services import notification_queue_service
+from app.services.notification_coalescer import notification_coalescer
+from app.services.presence_service import presence_registry
+
+
+@permission_required('settings_view')
+def database_pool_api():
+    """
+    API: Retorna o estado do pool de conexões do banco de dados
+
+    Returns:
+        JSON com ocupação atual, overflow, timeouts, histograma de espera (do
+        primário e da réplica, se configurada) e, com DB_SESSION_DEBUG ativo,
+        sessões deixadas abertas e conexões retidas
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'pool': get_pool_status(engine),
+            'replica_pool': get_pool_status(replica_engine) if replica_engine is not None else None,
+            'green_driver': is_green_psycopg_enabled(),
+            'sessions': session_stats.snapshot()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@permission_required('settings_view')
+def database_queries():
+    """Página com os endpoints que mais consultam o banco de dados"""
+    sort_by = request.args.get('sort', 'queries')
+
+    return render_template(
+        'pages/system/queries.html',
+        endpoints=endpoint_query_stats.top(sort_by=sort_by),
+        sort_by=sort_by,
+        enabled=endpoint_query_stats.enabled,
+        threshold=endpoint_query_stats.threshold,
+        slow_queries=slow_query_log.snapshot(limit=20)
+    )
+
+
+@permission_required('settings_view')
+def database_queries_api():
+    """
+    API: Retorna os endpoints ordenados por consultas ou tempo de banco
+
+    Query params:
+        sort: 'queries' (padrão) ou 'db_time'
+        limit: Quantidade máxima de endpoints (padrão 50)
+
+    Returns:
+        JSON com média/máximo de consultas, tempo de banco e ocorrências de N+1 por endpoint
+    """
+    try:
+        sort_by = request.args.get('sort', 'queries')
+        limit = request.args.get('limit', 50, type=int)
+
+        return jsonify({
+            'success': True,
+            'enabled': endpoint_query_stats.enabled,
+            'n_plus_one_threshold': endpoint_query_stats.threshold,
+            'endpoints': endpoint_query_stats.top(sort_by=sort_by, limit=limit)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@permission_required('settings_view')
+def database_queries_reset_api():
+    """API: Zera as estatísticas de consultas por endpoint e as consultas lentas"""
+    endpoint_query_stats.reset()
+    slow_query_log.reset()
+    return jsonify({'success': True})
+
+
+@permission_required('settings_view')
+def database_slow_queries_api():
+    """
+    API: Retorna as consultas lentas mais recentes
+
+    Query params:
+        limit: Quantidade máxima de consultas (padrão 50)
+
+    Returns:
+        JSON com SQL, parâmetros ocultados, endpoint, duração e plano de execução
+    """
+    try:
+        limit = request.args.get('limit', 50, type=int)
+        return jsonify({'success': True, 'slow_queries': slow_query_log.snapshot(limit=limit)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@permission_required('settings_view')
+def whatsapp_outbox_api():
+    """
+    API: Retorna o estado da fila persistente do WhatsApp
+
+    Returns:
+        JSON com a quantidade de mensagens por status, a pendente mais antiga
+        e os contadores de envio deste processo
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'outbox': whatsapp_outbox_service.get_stats(get_db())
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@permission_required('settings_view')
+def notification_queue_api():
+    """
+    API: Retorna as métricas do worker de notificações em tempo real
+
+    Returns:
+        JSON com a profundidade da fila, entregas, erros, tamanho médio dos
+        lotes, latência entre o enfileiramento e a emissão e o agrupamento
+        de rajadas (janelas abertas, retidas e resumos enviados)
+    """
+    return jsonify({
+        'success': True,
+        'queue': notification_queue_service.get_stats(),
+        'coalescer': notification_coalescer.snapshot()
+    })
+
+
+@permission_required('settings_view')
+def socketio_presence_api():
+    """
+    API: Retorna os usuários e sockets conectados via Socket.IO
+
+    Returns:
+        JSON com os usuários e sockets deste processo (máximo de sockets por
+        usuário, conexões, desconexões e pico) e, com PRESENCE_BACKEND=postgres,
+        o total de todos os processos
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'process': presence_registry.snapshot(),
+            'cluster': presence_registry.count_online()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -2,6 +2,7 @@
 from flask import render_template, request
 from app.services.client_service import client_service
 from app.services.ticket_service import ticket_service
+from app.utils.db_routing import read_only
 
 
 def tickets_list():
@@ -12,6 +13,7 @@ def tickets_list():
     return render_template('pages/tickets/list.html', clients=clients)
 
 
+@read_only
 def tickets_view(client_id):
     """Visualiza tickets de um cliente/organização"""
     from app.models.client_organization import ClientOrganization
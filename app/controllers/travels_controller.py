@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import logging
 from flask import render_template, request, redirect, url_for, flash, session, jsonify
-from app.models.database import SessionLocal
+from app.models.database import get_db
 from app.models.travel import Travel, TravelStatus
 from app.models.travel_passenger import TravelPassenger
 from app.models.travel_payout import TravelPayout
@@ -11,6 +11,7 @@ from app.models.state import State
 from app.models.vehicle import Vehicle
 from app.models.vehicle_travel_history import VehicleTravelHistory
 from app.utils.permissions_helper import permission_required
+from app.services.permission_service import permission_service
 from datetime import datetime
 from decimal import Decimal
 from sqlalchemy import case, or_, and_
@@ -124,7 +125,7 @@ def _process_payout_data(db, travel, payout_data_str, current_user_id):
 def travels_list():
     """Lista viagens do usuário ou todas se tiver permissão"""
     try:
-        db = SessionLocal()
+        db = get_db()
         user_id = session.get('user_id')
 
         if not user_id:
@@ -187,8 +188,6 @@ def travels_list():
 
             travels_data.append(travel_dict)
 
-        db.close()
-
         return render_template(
             'pages/travels/list.html',
             travels=travels_data,
@@ -205,7 +204,7 @@ def travels_list():
 def travels_create():
     """Exibe formulário de criação de viagem"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Buscar cidades
         cities = db.query(City).join(State).order_by(State.name, City.name).all()
@@ -229,8 +228,6 @@ def travels_create():
 
         users_data = [user.to_dict() for user in users]
 
-        db.close()
-
         return render_template(
             'pages/travels/form.html',
             travel=None,
@@ -251,7 +248,7 @@ def travels_create():
 def travels_store():
     """Salva uma nova viagem"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Obter dados do formulário
         user_id = request.form.get('user_id')
@@ -314,7 +311,7 @@ def travels_store():
 
         # Enviar notificações sobre nova viagem
         try:
-            from app.utils.notification_helper import send_notification
+            from app.utils.notification_helper import send_notifications_bulk
             from app.models.notification import NotificationType
             from app.models.user import User
 
@@ -335,10 +332,7 @@ def travels_store():
                             passengers_list.append(passenger.name)
 
             # 3. Adicionar usuários com permissão de aprovar viagens
-            users_with_approve_permission = db.query(User).filter_by(active=True).all()
-            for user in users_with_approve_permission:
-                if user.has_permission('travels_approve'):
-                    notify_user_ids.add(user.id)
+            notify_user_ids.update(permission_service.get_user_ids_with_permission('travels_approve'))
 
             # Formatar mensagem com detalhes
             departure_str = new_travel.departure_date.strftime('%d/%m/%Y às %H:%M')
@@ -355,28 +349,24 @@ def travels_store():
 🚘 Motorista: {driver_name}
 👥 Passageiros: {passengers_str}"""
 
-            # Enviar notificação para cada usuário
-            for user_id in notify_user_ids:
-                send_notification(
-                    user_id=user_id,
-                    title='Nova Solicitação de Viagem',
-                    message=message,
-                    notification_type=NotificationType.TRAVEL,
-                    action_url=f'/admin/travels/{new_travel.id}/view',
-                    action_text='Ver Viagem'
-                )
+            # Enviar notificação para todos os usuários de uma só vez
+            send_notifications_bulk(
+                user_ids=notify_user_ids,
+                title='Nova Solicitação de Viagem',
+                message=message,
+                notification_type=NotificationType.TRAVEL,
+                action_url=f'/admin/travels/{new_travel.id}/view',
+                action_text='Ver Viagem'
+            )
         except Exception as e:
             # Falha silenciosa - viagem já foi criada
             logging.error(f"Erro ao enviar notificações: {e}")
 
-        db.close()
-
         flash('Viagem cadastrada com sucesso!', 'success')
         return redirect(url_for('admin.travels_list'))
 
     except Exception as e:
         db.rollback()
-        db.close()
         logging.error(f"Erro ao criar viagem: {e}")
         flash('Erro ao cadastrar viagem', 'error')
         return redirect(url_for('admin.travels_create'))
@@ -385,7 +375,7 @@ def travels_store():
 def travels_edit(travel_id):
     """Exibe formulário de edição de viagem"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Buscar viagem
         travel = db.query(Travel).filter_by(id=travel_id).first()
@@ -442,8 +432,6 @@ def travels_edit(travel_id):
 
         users_data = [user.to_dict() for user in users]
 
-        db.close()
-
         return render_template(
             'pages/travels/form.html',
             travel=travel_data,
@@ -464,7 +452,7 @@ def travels_edit(travel_id):
 def travels_update(travel_id):
     """Atualiza uma viagem existente"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Buscar viagem
         travel = db.query(Travel).filter_by(id=travel_id).first()
@@ -567,7 +555,7 @@ def travels_update(travel_id):
 
         # Enviar notificações sobre viagem editada
         try:
-            from app.utils.notification_helper import send_notification
+            from app.utils.notification_helper import send_notifications_bulk
             from app.models.notification import NotificationType
             from app.models.user import User
 
@@ -588,10 +576,7 @@ def travels_update(travel_id):
                             passengers_list.append(passenger.name)
 
             # 3. Adicionar usuários com permissão de aprovar viagens
-            users_with_approve_permission = db.query(User).filter_by(active=True).all()
-            for user in users_with_approve_permission:
-                if user.has_permission('travels_approve'):
-                    notify_user_ids.add(user.id)
+            notify_user_ids.update(permission_service.get_user_ids_with_permission('travels_approve'))
 
             # Formatar mensagem com detalhes
             departure_str = travel.departure_date.strftime('%d/%m/%Y às %H:%M')
@@ -608,28 +593,24 @@ def travels_update(travel_id):
 🚘 Motorista: {driver_name}
 👥 Passageiros: {passengers_str}"""
 
-            # Enviar notificação para cada usuário
-            for user_id in notify_user_ids:
-                send_notification(
-                    user_id=user_id,
-                    title='Atualização de Viagem',
-                    message=message,
-                    notification_type=NotificationType.TRAVEL,
-                    action_url=f'/admin/travels/{travel_id}/view',
-                    action_text='Ver Viagem'
-                )
+            # Enviar notificação para todos os usuários de uma só vez
+            send_notifications_bulk(
+                user_ids=notify_user_ids,
+                title='Atualização de Viagem',
+                message=message,
+                notification_type=NotificationType.TRAVEL,
+                action_url=f'/admin/travels/{travel_id}/view',
+                action_text='Ver Viagem'
+            )
         except Exception as e:
             # Falha silenciosa - viagem já foi atualizada
             logging.error(f"Erro ao enviar notificações: {e}")
 
-        db.close()
-
         flash('Viagem atualizada com sucesso!', 'success')
         return redirect(url_for('admin.travels_edit', travel_id=travel_id))
 
     except Exception as e:
         db.rollback()
-        db.close()
         logging.error(f"Erro ao atualizar viagem: {e}")
         flash('Erro ao atualizar viagem', 'error')
         return redirect(url_for('admin.travels_edit', travel_id=travel_id))
@@ -638,7 +619,7 @@ def travels_update(travel_id):
 def travels_delete(travel_id):
     """Remove uma viagem"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Buscar viagem
         travel = db.query(Travel).filter_by(id=travel_id).first()
@@ -649,14 +630,12 @@ def travels_delete(travel_id):
 
         db.delete(travel)
         db.commit()
-        db.close()
 
         flash('Viagem removida com sucesso!', 'success')
         return redirect(url_for('admin.travels_list'))
 
     except Exception as e:
         db.rollback()
-        db.close()
         logging.error(f"Erro ao remover viagem: {e}")
         flash('Erro ao remover viagem', 'error')
         return redirect(url_for('admin.travels_list'))
@@ -665,7 +644,7 @@ def travels_delete(travel_id):
 def travels_cancel(travel_id):
     """Cancela uma viagem"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Buscar viagem
         travel = db.query(Travel).filter_by(id=travel_id).first()
@@ -692,14 +671,12 @@ def travels_cancel(travel_id):
         travel.status = TravelStatus.CANCELLED
 
         db.commit()
-        db.close()
 
         flash('Viagem cancelada com sucesso!', 'success')
         return redirect(url_for('admin.travels_list'))
 
     except Exception as e:
         db.rollback()
-        db.close()
         logging.error(f"Erro ao cancelar viagem: {e}")
         flash('Erro ao cancelar viagem', 'error')
         return redirect(url_for('admin.travels_list'))
@@ -708,7 +685,7 @@ def travels_cancel(travel_id):
 @permission_required('travels_approve')
 def travels_analyze(travel_id):
     """Exibe tela de análise de viagem (wizard)"""
-    db = SessionLocal()
+    db = get_db()
 
     # Buscar viagem
     travel = db.query(Travel).filter_by(id=travel_id).first()
@@ -795,8 +772,6 @@ def travels_analyze(travel_id):
         for user in creators:
             users_map[user.id] = user.name
 
-    db.close()
-
     return render_template(
         'pages/travels/analyze.html',
         travel=travel_data,
@@ -810,7 +785,7 @@ def travels_analyze(travel_id):
 def travels_analyze_process(travel_id):
     """Processa a análise da viagem"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Buscar viagem
         travel = db.query(Travel).filter_by(id=travel_id).first()
@@ -872,7 +847,7 @@ def travels_analyze_process(travel_id):
 
             # Enviar notificações sobre aprovação da viagem
             try:
-                from app.utils.notification_helper import send_notification
+                from app.utils.notification_helper import send_notifications_bulk
                 from app.models.notification import NotificationType
                 from app.models.user import User
 
@@ -887,10 +862,7 @@ def travels_analyze_process(travel_id):
                     notify_user_ids.add(passenger.user_id)
 
                 # Adicionar usuários com permissão de aprovar viagens
-                users_with_approve_permission = db.query(User).filter_by(active=True).all()
-                for user in users_with_approve_permission:
-                    if user.has_permission('travels_approve'):
-                        notify_user_ids.add(user.id)
+                notify_user_ids.update(permission_service.get_user_ids_with_permission('travels_approve'))
 
                 # Formatar mensagem com detalhes
                 departure_str = travel.departure_date.strftime('%d/%m/%Y às %H:%M')
@@ -913,16 +885,15 @@ def travels_analyze_process(travel_id):
 🚘 Motorista: {driver_name}
 👥 Passageiros: {passengers_str}"""
 
-                # Enviar notificação para cada usuário
-                for user_id in notify_user_ids:
-                    send_notification(
-                        user_id=user_id,
-                        title='Viagem Aprovada',
-                        message=message,
-                        notification_type=NotificationType.TRAVEL,
-                        action_url=f'/admin/travels/{travel.id}/view',
-                        action_text='Ver Viagem'
-                    )
+                # Enviar notificação para todos os usuários de uma só vez
+                send_notifications_bulk(
+                    user_ids=notify_user_ids,
+                    title='Viagem Aprovada',
+                    message=message,
+                    notification_type=NotificationType.TRAVEL,
+                    action_url=f'/admin/travels/{travel.id}/view',
+                    action_text='Ver Viagem'
+                )
             except Exception as e:
                 logging.error(f"Erro ao enviar notificações: {e}")
 
@@ -940,7 +911,7 @@ def travels_analyze_process(travel_id):
 
             # Enviar notificações sobre rejeição da viagem
             try:
-                from app.utils.notification_helper import send_notification
+                from app.utils.notification_helper import send_notifications_bulk
                 from app.models.notification import NotificationType
 
                 notify_user_ids = set()
@@ -953,16 +924,15 @@ def travels_analyze_process(travel_id):
                 for passenger in passengers:
                     notify_user_ids.add(passenger.user_id)
 
-                # Enviar notificação para cada usuário
-                for user_id in notify_user_ids:
-                    send_notification(
-                        user_id=user_id,
-                        title='Viagem Rejeitada',
-                        message=f'Sua viagem para {travel.city.name} foi rejeitada.',
-                        notification_type=NotificationType.TRAVEL,
-                        action_url=f'/admin/travels/{travel.id}/view',
-                        action_text='Ver Viagem'
-                    )
+                # Enviar notificação para todos os usuários de uma só vez
+                send_notifications_bulk(
+                    user_ids=notify_user_ids,
+                    title='Viagem Rejeitada',
+                    message=f'Sua viagem para {travel.city.name} foi rejeitada.',
+                    notification_type=NotificationType.TRAVEL,
+                    action_url=f'/admin/travels/{travel.id}/view',
+                    action_text='Ver Viagem'
+                )
             except Exception as e:
                 logging.error(f"Erro ao enviar notificações: {e}")
 
@@ -977,19 +947,16 @@ def travels_analyze_process(travel_id):
 
             db.commit()
             flash('Alterações salvas com sucesso!', 'success')
-            db.close()
             # Redirecionar para a mesma página de análise
             return redirect(url_for('admin.travels_analyze', travel_id=travel_id))
 
         else:
             flash('Ação inválida', 'error')
 
-        db.close()
         return redirect(url_for('admin.travels_list'))
 
     except Exception as e:
         db.rollback()
-        db.close()
         logging.error(f"Erro ao processar análise: {e}")
         flash('Erro ao processar análise da viagem', 'error')
         return redirect(url_for('admin.travels_list'))
@@ -1008,7 +975,7 @@ def travels_check_conflicts():
         if not all([driver_user_id, departure_date, return_date]):
             return jsonify({'success': False, 'error': 'Dados incompletos'}), 400
 
-        db = SessionLocal()
+        db = get_db()
         departure_dt = datetime.fromisoformat(departure_date)
         return_dt = datetime.fromisoformat(return_date)
         all_participant_ids = [int(driver_user_id)] + [int(pid) for pid in passenger_ids if pid]
@@ -1057,8 +1024,6 @@ def travels_check_conflicts():
                         'return_date': travel.return_date.strftime('%d/%m/%Y %H:%M')
                     })
 
-        db.close()
-
         if conflicts:
             return jsonify({'success': True, 'has_conflicts': True, 'conflicts': conflicts}), 200
         else:
@@ -1072,7 +1037,7 @@ def travels_check_conflicts():
 def travels_view(travel_id):
     """Exibe resumo completo da viagem"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Buscar viagem
         travel = db.query(Travel).filter_by(id=travel_id).first()
@@ -1090,8 +1055,6 @@ def travels_view(travel_id):
         else:
             travel_data['days'] = 0
 
-        db.close()
-
         return render_template(
             'pages/travels/view.html',
             travel=travel_data
@@ -1106,7 +1069,7 @@ def travels_view(travel_id):
 def get_available_vehicles_api():
     """API para buscar veículos disponíveis e verificar conflitos de reserva"""
     try:
-        db = SessionLocal()
+        db = get_db()
         departure_date_str = request.args.get('departure_date')
         return_date_str = request.args.get('return_date')
         current_travel_id = request.args.get('travel_id')
@@ -1161,7 +1124,6 @@ def get_available_vehicles_api():
 
             vehicles_data.append(vehicle_dict)
 
-        db.close()
         return jsonify({'success': True, 'vehicles': vehicles_data})
 
     except Exception as e:
@@ -5,7 +5,7 @@ Gerencia veículos da frota
 """
 
 from flask import render_template, request, redirect, url_for, flash, session, jsonify
-from app.models.database import SessionLocal
+from app.models.database import get_db
 from app.models.vehicle import Vehicle
 from app.models.maintenance_type import MaintenanceType
 from app.models.vehicle_maintenance_config import VehicleMaintenanceConfig
@@ -17,50 +17,47 @@ from datetime import datetime
 @permission_required('vehicles_view')
 def vehicles_list():
     """Lista todos os veículos cadastrados"""
-    db = SessionLocal()
-    try:
-        # Filtros
-        search = request.args.get('search', '')
-        status = request.args.get('status', 'all')  # Alterado de 'active' para 'all'
-
-        # Query base
-        query = db.query(Vehicle)
-
-        # Aplicar filtro de status
-        if status == 'active':
-            query = query.filter(Vehicle.is_active == True)
-        elif status == 'inactive':
-            query = query.filter(Vehicle.is_active == False)
-        # Se status == 'all', não aplica filtro e mostra todos
-
-        # Aplicar busca
-        if search:
-            query = query.filter(
-                or_(
-                    Vehicle.plate.ilike(f'%{search}%'),
-                    Vehicle.model.ilike(f'%{search}%'),
-                    Vehicle.brand.ilike(f'%{search}%')
-                )
+    db = get_db()
+    # Filtros
+    search = request.args.get('search', '')
+    status = request.args.get('status', 'all')  # Alterado de 'active' para 'all'
+
+    # Query base
+    query = db.query(Vehicle)
+
+    # Aplicar filtro de status
+    if status == 'active':
+        query = query.filter(Vehicle.is_active == True)
+    elif status == 'inactive':
+        query = query.filter(Vehicle.is_active == False)
+    # Se status == 'all', não aplica filtro e mostra todos
+
+    # Aplicar busca
+    if search:
+        query = query.filter(
+            or_(
+                Vehicle.plate.ilike(f'%{search}%'),
+                Vehicle.model.ilike(f'%{search}%'),
+                Vehicle.brand.ilike(f'%{search}%')
             )
+        )
 
-        # Ordenar
-        vehicles = query.order_by(desc(Vehicle.created_at)).all()
+    # Ordenar
+    vehicles = query.order_by(desc(Vehicle.created_at)).all()
 
-        return render_template(
-            'pages/vehicles/list.html',
-            vehicles=vehicles,
-            search=search,
-            status=status
-        )
+    return render_template(
+        'pages/vehicles/list.html',
+        vehicles=vehicles,
+        search=search,
+        status=status
+    )
 
-    finally:
-        db.close()
 
 
 @permission_required('vehicles_create')
 def vehicles_create():
     """Cria um novo veículo"""
-    db = SessionLocal()
+    db = get_db()
     try:
         if request.method == 'GET':
             return render_template('pages/vehicles/form.html')
@@ -101,14 +98,12 @@ def vehicles_create():
         db.rollback()
         flash(f'Erro ao cadastrar veículo: {str(e)}', 'error')
         return redirect(url_for('admin.vehicles_create'))
-    finally:
-        db.close()
 
 
 @permission_required('vehicles_edit')
 def vehicles_edit(vehicle_id):
     """Edita um veículo existente"""
-    db = SessionLocal()
+    db = get_db()
     try:
         vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
         if not vehicle:
@@ -135,14 +130,12 @@ def vehicles_edit(vehicle_id):
         db.rollback()
         flash(f'Erro ao atualizar veículo: {str(e)}', 'error')
         return redirect(url_for('admin.vehicles_list'))
-    finally:
-        db.close()
 
 
 @permission_required('vehicles_view')
 def vehicles_details(vehicle_id):
     """Exibe detalhes de um veículo"""
-    db = SessionLocal()
+    db = get_db()
     try:
         vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
         if not vehicle:
@@ -165,14 +158,12 @@ def vehicles_details(vehicle_id):
     except Exception as e:
         flash(f'Erro ao carregar detalhes: {str(e)}', 'error')
         return redirect(url_for('admin.vehicles_list'))
-    finally:
-        db.close()
 
 
 @permission_required('vehicles_delete')
 def vehicles_toggle_status(vehicle_id):
     """Alterna o status ativo/inativo de um veículo"""
-    db = SessionLocal()
+    db = get_db()
     try:
         vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
         if not vehicle:
@@ -191,8 +182,6 @@ def vehicles_toggle_status(vehicle_id):
         db.rollback()
         flash(f'Erro ao alterar status do veículo: {str(e)}', 'error')
         return redirect(url_for('admin.vehicles_list'))
-    finally:
-        db.close()
 
 
 # ========== API: Configurações de Manutenção ==========
@@ -200,7 +189,7 @@ def vehicles_toggle_status(vehicle_id):
 @permission_required('vehicles_edit')
 def vehicles_add_maintenance_config(vehicle_id):
     """API: Adiciona uma configuração de manutenção ao veículo"""
-    db = SessionLocal()
+    db = get_db()
     try:
         vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
         if not vehicle:
@@ -243,14 +232,12 @@ def vehicles_add_maintenance_config(vehicle_id):
     except Exception as e:
         db.rollback()
         return jsonify({'success': False, 'message': f'Erro ao adicionar configuração: {str(e)}'}), 500
-    finally:
-        db.close()
 
 
 @permission_required('vehicles_edit')
 def vehicles_remove_maintenance_config(vehicle_id, config_id):
     """API: Remove uma configuração de manutenção"""
-    db = SessionLocal()
+    db = get_db()
     try:
         config = db.query(VehicleMaintenanceConfig).filter(
             VehicleMaintenanceConfig.id == config_id,
@@ -268,5 +255,3 @@ def vehicles_remove_maintenance_config(vehicle_id, config_id):
     except Exception as e:
         db.rollback()
         return jsonify({'success': False, 'message': f'Erro ao remover configuração: {str(e)}'}), 500
-    finally:
-        db.close()
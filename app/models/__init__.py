@@ -29,6 +29,11 @@ from app.models.vehicle_issue import VehicleIssue
 from app.models.vehicle_maintenance_history import VehicleMaintenanceHistory
 from app.models.vehicle_maintenance_config import VehicleMaintenanceConfig
 from app.models.travel_statement import TravelStatement
+from app.models.cache_version import CacheVersion
+from app.models.whatsapp_outbox import WhatsappOutbox
+from app.models.socket_presence import SocketPresence
+from app.models.sync_state import SyncState
+from app.models.sync_backfill_window import SyncBackfillWindow
 
 __all__ = [
     'Base',
@@ -58,5 +63,10 @@ __all__ = [
     'VehicleKmLog',
     'VehicleIssue',
     'VehicleMaintenanceHistory',
-    'VehicleMaintenanceConfig'
+    'VehicleMaintenanceConfig',
+    'CacheVersion',
+    'WhatsappOutbox',
+    'SocketPresence',
+    'SyncState',
+    'SyncBackfillWindow'
 ]
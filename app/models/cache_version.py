@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.models.database import Base
+
+
+class CacheVersion(Base):
+    """
+    Versão de um cache em memória
+
+    Cada processo compara a versão gravada aqui com a que carregou; quando ela
+    muda (ex.: alteração de grupos ou permissões), o cache local é descartado.
+    """
+    __tablename__ = 'cache_versions'
+
+    name = Column(String(50), primary_key=True)  # Nome do cache (ex: permissions)
+    version = Column(BigInteger, nullable=False, default=1, server_default='1')
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.orm import Session, sessionmaker, scoped_session
+from contextlib import contextmanager
 import os
 from urllib.parse import quote_plus
 from dotenv import load_dotenv
@@ -9,6 +10,12 @@ from dotenv import load_dotenv
 # Carregar variáveis de ambiente do arquivo .env
 load_dotenv()
 
+from config import database as db_config
+from app.utils.database_monitor import InstrumentedQueuePool, register_session_monitor, report_leaked_sessions
+from app.utils.query_profiler import register_query_profiler, start_request_profile, finish_request_profile
+from app.utils.slow_query_log import register_slow_query_log
+from app.utils.db_routing import pin_after_write
+
 # Base para os modelos
 Base = declarative_base()
 
@@ -22,13 +29,55 @@ DB_NAME = os.getenv('DB_NAME', 'app_financeiro')
 # String de conexão (usando psycopg2)
 DATABASE_URL = f"postgresql+psycopg2://{quote_plus(DB_USER)}:{quote_plus(DB_PASSWORD)}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-# Engine do SQLAlchemy
-engine = create_engine(DATABASE_URL, echo=False)
+
+def _create_engine(url):
+    """Cria uma engine com o pool configurável via variáveis DB_POOL_*"""
+    return create_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedQueuePool,
+        pool_size=db_config.DB_POOL_SIZE,
+        max_overflow=db_config.DB_MAX_OVERFLOW,
+        pool_timeout=db_config.DB_POOL_TIMEOUT,
+        pool_recycle=db_config.DB_POOL_RECYCLE,
+        pool_pre_ping=db_config.DB_POOL_PRE_PING
+    )
+
+
+# Engine do SQLAlchemy (primário)
+engine = _create_engine(DATABASE_URL)
+
+# Engine da réplica de leitura (None quando DB_REPLICA_HOST não está configurado)
+replica_engine = None
+if db_config.DB_REPLICA_HOST:
+    REPLICA_DATABASE_URL = (
+        f"postgresql+psycopg2://{quote_plus(db_config.DB_REPLICA_USER)}:{quote_plus(db_config.DB_REPLICA_PASSWORD)}"
+        f"@{db_config.DB_REPLICA_HOST}:{db_config.DB_REPLICA_PORT}/{db_config.DB_REPLICA_NAME}"
+    )
+    replica_engine = _create_engine(REPLICA_DATABASE_URL)
+
+
+class RoutingSession(Session):
+    """
+    Sessão que envia as leituras de requisições somente leitura para a réplica
+
+    A requisição é marcada com o decorator @read_only (app.utils.db_routing),
+    que define session.info['read_only']. Flushes e qualquer outra requisição
+    continuam no primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if replica_engine is not None and self.info.get('read_only') and not self._flushing:
+            return replica_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
 
 # Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 # Scoped session para thread-safety
+# É a única unidade de trabalho da requisição: controllers, services e helpers
+# devem obtê-la via get_db() em vez de abrir sessões próprias com SessionLocal()
 db_session = scoped_session(SessionLocal)
 
 
@@ -40,3 +89,69 @@ def init_db():
 def get_db():
     """Retorna a sessão scoped do banco de dados (gerenciada pelo teardown_appcontext)"""
     return db_session
+
+
+@contextmanager
+def session_scope():
+    """
+    Unidade de trabalho para código executado fora de requisições
+    (threads em background, jobs do scheduler)
+
+    Faz commit ao final, rollback em caso de erro e sempre devolve a conexão
+    ao pool. Não deve ser usado dentro de uma requisição, pois removeria a
+    sessão da própria requisição.
+
+    Usage:
+        with session_scope():
+            license_service.process_and_save_file(content)
+    """
+    session = db_session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        db_session.remove()
+
+
+def init_app(app):
+    """Registra o ciclo de vida da sessão do banco na aplicação Flask"""
+    engines = [engine] if replica_engine is None else [engine, replica_engine]
+
+    if db_config.DB_SESSION_DEBUG:
+        register_session_monitor(engines, SessionLocal, db_config.DB_CONNECTION_HOLD_WARN_MS)
+
+    if db_config.DB_QUERY_PROFILER:
+        for bind in engines:
+            register_query_profiler(bind, db_config.DB_N_PLUS_ONE_THRESHOLD)
+        app.before_request(start_request_profile)
+
+    if db_config.DB_SLOW_QUERY_MS > 0:
+        for bind in engines:
+            register_slow_query_log(
+                bind,
+                db_config.DB_SLOW_QUERY_MS,
+                explain_mode=db_config.DB_SLOW_QUERY_EXPLAIN,
+                size=db_config.DB_SLOW_QUERY_BUFFER
+            )
+
+    if replica_engine is not None:
+        # Read-your-writes: após uma escrita, o usuário volta a ler do primário
+        app.after_request(pin_after_write)
+
+    @app.teardown_appcontext
+    def shutdown_session(exception=None):
+        """Remove a sessão do banco de dados ao final de cada requisição"""
+        try:
+            if exception:
+                db_session.rollback()
+            else:
+                db_session.commit()
+        except Exception:
+            db_session.rollback()
+        finally:
+            db_session.remove()
+            report_leaked_sessions()
+            finish_request_profile()
@@ -38,7 +38,8 @@ class Group(Base):
 
     def has_permission(self, permission_slug):
         """Verifica se o grupo possui uma permissão específica"""
-        return any(perm.slug == permission_slug for perm in self.permissions_rel)
+        from app.services.permission_service import permission_service
+        return permission_slug in permission_service.get_group_permissions(self.id)
 
     def get_permissions_slugs(self):
         """Retorna lista de slugs das permissões do grupo"""
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.models.database import Base
 import enum
 
@@ -18,8 +18,19 @@ class NotificationType(enum.Enum):
 
 
 class Notification(Base):
-    """Modelo de Notificação"""
+    """
+    Modelo de Notificação
+
+    A tabela é particionada por mês em created_at (migration 040), com chave
+    primária (id, created_at) no banco; o id continua único (sequence) e é a
+    identidade usada pelo ORM. As partições são criadas e removidas pelo
+    notification_partition_service.
+    """
     __tablename__ = 'notifications'
+    __table_args__ = (
+        Index('idx_notifications_user_read_created', 'user_id', 'is_read', text('created_at DESC')),
+        Index('idx_notifications_user_created_id', 'user_id', text('created_at DESC'), text('id DESC')),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
 
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.models.database import Base
+
+
+class SocketPresence(Base):
+    """Conexão Socket.IO aberta (registro de presença compartilhado entre processos)"""
+    __tablename__ = 'socket_presence'
+
+    sid = Column(String(64), primary_key=True)  # ID da conexão Socket.IO
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    process_id = Column(String(100), nullable=False, index=True)  # host:pid do processo que atende a conexão
+
+    connected_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.models.database import Base
+
+
+class BackfillWindowStatus:
+    """Status de uma janela de backfill"""
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+
+
+class SyncBackfillWindow(Base):
+    """
+    Janela de um backfill de sincronização
+
+    Cada backfill (ex.: tickets de um ano) é dividido em janelas de poucos
+    dias; as concluídas ficam marcadas como done e são puladas quando o mesmo
+    backfill é executado novamente.
+    """
+    __tablename__ = 'sync_backfill_windows'
+    __table_args__ = (
+        UniqueConstraint('backfill', 'window_start', name='uq_sync_backfill_windows_backfill_start'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    backfill = Column(String(100), nullable=False)  # Identificador do backfill (recurso, período e tamanho da janela)
+    window_start = Column(Date, nullable=False)
+    window_end = Column(Date, nullable=False)
+    status = Column(String(20), nullable=False, default=BackfillWindowStatus.PENDING, server_default='pending')
+    total = Column(Integer, nullable=False, default=0, server_default='0')
+    synced = Column(Integer, nullable=False, default=0, server_default='0')
+    updated = Column(Integer, nullable=False, default=0, server_default='0')
+    errors = Column(Integer, nullable=False, default=0, server_default='0')
+    last_error = Column(Text)
+    completed_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
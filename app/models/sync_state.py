@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.models.database import Base
+
+
+class SyncState(Base):
+    """
+    Estado de uma sincronização incremental
+
+    A marca d'água (watermark) é o maior instante de alteração já importado;
+    a próxima execução busca apenas o que mudou depois dele.
+    """
+    __tablename__ = 'sync_states'
+
+    name = Column(String(50), primary_key=True)  # Nome da sincronização (ex: movidesk_tickets)
+    watermark = Column(DateTime(timezone=True))
+    last_run_at = Column(DateTime(timezone=True))
+    last_success_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def to_dict(self):
+        """Converte o modelo para dicionário"""
+        return {
+            'name': self.name,
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_success_at': self.last_success_at.isoformat() if self.last_success_at else None,
+            'last_error': self.last_error
+        }
@@ -22,6 +22,7 @@ class Ticket(Base):
     resolved_in = Column(DateTime)  # Data e hora de resolução do chat (encerramento pelo agente)
     closed_in = Column(DateTime)  # Data e hora de fechamento oficial
     custom_field_module = Column(String(255))
+    last_update = Column(DateTime)  # Data e hora da última alteração no Movidesk
     synced_at = Column(DateTime, server_default=func.now())
 
     def to_dict(self):
@@ -40,5 +41,6 @@ class Ticket(Base):
             'resolvedIn': self.resolved_in.isoformat() if self.resolved_in else None,
             'closedIn': self.closed_in.isoformat() if self.closed_in else None,
             'customFieldModule': self.custom_field_module,
+            'lastUpdate': self.last_update.isoformat() if self.last_update else None,
             'syncedAt': self.synced_at.isoformat() if self.synced_at else None
         }
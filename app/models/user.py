@@ -20,6 +20,8 @@ class User(Base):
     sid_uuid = Column(String(36), unique=True, nullable=True, index=True)
     email_verified_at = Column(DateTime(timezone=True))
     last_login_at = Column(DateTime(timezone=True))
+    # Contador desnormalizado mantido pelo notification_counter_service
+    unread_notifications_count = Column(Integer, default=0, server_default='0', nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -45,27 +47,26 @@ class User(Base):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+    def get_permission_mask(self):
+        """Retorna a máscara de bits das permissões do usuário (de todos os grupos)"""
+        from app.services.permission_service import permission_service
+        return permission_service.get_user_permissions(self.id)
+
     def has_permission(self, permission_slug):
         """Verifica se o usuário possui uma permissão específica através de seus grupos"""
-        for group in self.groups:
-            if group.has_permission(permission_slug):
-                return True
-        return False
+        return permission_slug in self.get_permission_mask()
 
     def has_any_permission(self, permission_slugs):
         """Verifica se o usuário possui pelo menos uma das permissões especificadas"""
-        return any(self.has_permission(slug) for slug in permission_slugs)
+        return self.get_permission_mask().has_any(permission_slugs)
 
     def has_all_permissions(self, permission_slugs):
         """Verifica se o usuário possui todas as permissões especificadas"""
-        return all(self.has_permission(slug) for slug in permission_slugs)
+        return self.get_permission_mask().has_all(permission_slugs)
 
     def get_all_permissions(self):
         """Retorna todas as permissões do usuário (de todos os grupos)"""
-        permissions = set()
-        for group in self.groups:
-            permissions.update(group.get_permissions_slugs())
-        return list(permissions)
+        return list(self.get_permission_mask())
 
     def is_in_group(self, group_slug):
         """Verifica se o usuário pertence a um grupo específico"""
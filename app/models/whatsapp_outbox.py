@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.models.database import Base
+
+
+class OutboxStatus:
+    """Status de uma mensagem da fila do WhatsApp"""
+    PENDING = 'pending'  # Aguardando envio (ou nova tentativa)
+    SENDING = 'sending'  # Reservada por um worker
+    SENT = 'sent'  # Enviada
+    DEAD = 'dead'  # Descartada após esgotar as tentativas
+
+    ALL = (PENDING, SENDING, SENT, DEAD)
+
+
+class WhatsappOutbox(Base):
+    """Modelo da fila persistente de mensagens do WhatsApp"""
+    __tablename__ = 'whatsapp_outbox'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    phone = Column(String(20), nullable=False)  # Número no formato internacional (ex: 5569999999999)
+    message = Column(Text, nullable=False)
+    status = Column(String(20), default=OutboxStatus.PENDING, server_default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, server_default='0', nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def to_dict(self):
+        """Converte o modelo para dicionário"""
+        return {
+            'id': self.id,
+            'phone': self.phone,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
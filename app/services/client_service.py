@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from app.models.database import SessionLocal
+from app.models.database import get_db
 from app.models.client import Client
 from app.models.client_meta import ClientMeta
 from app.models.organization import Organization
@@ -12,34 +12,28 @@ class ClientService:
 
     def get_all_clients(self):
         """Retorna todos os clientes com suas organizações vinculadas"""
-        db = SessionLocal()
-        try:
-            clients = db.query(Client).order_by(Client.name).all()
-            return [client.to_dict(include_organizations=True) for client in clients]
-        finally:
-            db.close()
+        db = get_db()
+        clients = db.query(Client).order_by(Client.name).all()
+        return [client.to_dict(include_organizations=True) for client in clients]
 
     def get_client_by_id(self, client_id):
         """Busca um cliente pelo ID com suas organizações vinculadas e meta dados"""
-        db = SessionLocal()
-        try:
-            client = db.query(Client).filter_by(id=client_id).first()
-            if not client:
-                return None
+        db = get_db()
+        client = db.query(Client).filter_by(id=client_id).first()
+        if not client:
+            return None
 
-            client_dict = client.to_dict(include_organizations=True)
+        client_dict = client.to_dict(include_organizations=True)
 
-            # Adicionar meta dados
-            metas = db.query(ClientMeta).filter_by(client_id=client_id).all()
-            client_dict['meta'] = {meta.meta_key: meta.meta_value for meta in metas}
+        # Adicionar meta dados
+        metas = db.query(ClientMeta).filter_by(client_id=client_id).all()
+        client_dict['meta'] = {meta.meta_key: meta.meta_value for meta in metas}
 
-            return client_dict
-        finally:
-            db.close()
+        return client_dict
 
     def create_client(self, client_data):
         """Cria um novo cliente"""
-        db = SessionLocal()
+        db = get_db()
         try:
             from app.models.city import City
 
@@ -72,12 +66,10 @@ class ClientService:
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     def update_client(self, client_id, client_data):
         """Atualiza um cliente"""
-        db = SessionLocal()
+        db = get_db()
         try:
             from app.models.city import City
 
@@ -111,12 +103,10 @@ class ClientService:
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     def delete_client(self, client_id):
         """Remove um cliente"""
-        db = SessionLocal()
+        db = get_db()
         try:
             client = db.query(Client).filter_by(id=client_id).first()
             if not client:
@@ -128,17 +118,12 @@ class ClientService:
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     def get_organizations(self):
         """Retorna todas as organizações do banco local"""
-        db = SessionLocal()
-        try:
-            organizations = db.query(Organization).filter_by(is_active=True).order_by(Organization.business_name).all()
-            return [org.to_dict() for org in organizations]
-        finally:
-            db.close()
+        db = get_db()
+        organizations = db.query(Organization).filter_by(is_active=True).order_by(Organization.business_name).all()
+        return [org.to_dict() for org in organizations]
 
     def get_client_meta(self, client_id, meta_key=None):
         """Retorna meta dados de um cliente
@@ -151,19 +136,16 @@ class ClientService:
             dict: Dicionário com meta_key como chave e meta_value como valor
                   ou None se meta_key for especificada e não existir
         """
-        db = SessionLocal()
-        try:
-            if meta_key:
-                meta = db.query(ClientMeta).filter_by(
-                    client_id=client_id,
-                    meta_key=meta_key
-                ).first()
-                return meta.meta_value if meta else None
-            else:
-                metas = db.query(ClientMeta).filter_by(client_id=client_id).all()
-                return {meta.meta_key: meta.meta_value for meta in metas}
-        finally:
-            db.close()
+        db = get_db()
+        if meta_key:
+            meta = db.query(ClientMeta).filter_by(
+                client_id=client_id,
+                meta_key=meta_key
+            ).first()
+            return meta.meta_value if meta else None
+        else:
+            metas = db.query(ClientMeta).filter_by(client_id=client_id).all()
+            return {meta.meta_key: meta.meta_value for meta in metas}
 
     def update_client_meta(self, client_id, meta_key, meta_value):
         """Atualiza ou cria um meta dado do cliente
@@ -176,7 +158,7 @@ class ClientService:
         Returns:
             bool: True se sucesso
         """
-        db = SessionLocal()
+        db = get_db()
         try:
             # Buscar meta existente
             meta = db.query(ClientMeta).filter_by(
@@ -201,8 +183,6 @@ class ClientService:
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     def delete_client_meta(self, client_id, meta_key):
         """Remove um meta dado do cliente
@@ -214,7 +194,7 @@ class ClientService:
         Returns:
             bool: True se removido com sucesso
         """
-        db = SessionLocal()
+        db = get_db()
         try:
             meta = db.query(ClientMeta).filter_by(
                 client_id=client_id,
@@ -229,8 +209,6 @@ class ClientService:
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     def update_client_metas(self, client_id, metas_dict):
         """Atualiza múltiplos meta dados de uma vez
@@ -242,7 +220,7 @@ class ClientService:
         Returns:
             bool: True se sucesso
         """
-        db = SessionLocal()
+        db = get_db()
         try:
             for meta_key, meta_value in metas_dict.items():
                 # Buscar meta existente
@@ -268,8 +246,6 @@ class ClientService:
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     def get_client_applications(self, client_id):
         """Retorna todas as aplicações associadas ao cliente
@@ -280,24 +256,21 @@ class ClientService:
         Returns:
             list: Lista de dicionários com dados das aplicações
         """
-        db = SessionLocal()
-        try:
-            client_apps = db.query(ClientApplication).filter_by(
-                client_id=client_id
-            ).join(Application).order_by(Application.category, Application.name).all()
-
-            result = []
-            for client_app in client_apps:
-                app_dict = client_app.application.to_dict()
-                app_dict['client_app_id'] = client_app.id
-                app_dict['cod_elotech'] = client_app.cod_elotech
-                app_dict['is_active'] = client_app.is_active
-                app_dict['associated_at'] = client_app.created_at.isoformat() if client_app.created_at else None
-                result.append(app_dict)
-
-            return result
-        finally:
-            db.close()
+        db = get_db()
+        client_apps = db.query(ClientApplication).filter_by(
+            client_id=client_id
+        ).join(Application).order_by(Application.category, Application.name).all()
+
+        result = []
+        for client_app in client_apps:
+            app_dict = client_app.application.to_dict()
+            app_dict['client_app_id'] = client_app.id
+            app_dict['cod_elotech'] = client_app.cod_elotech
+            app_dict['is_active'] = client_app.is_active
+            app_dict['associated_at'] = client_app.created_at.isoformat() if client_app.created_at else None
+            result.append(app_dict)
+
+        return result
 
     def get_all_applications(self):
         """Retorna todas as aplicações disponíveis
@@ -305,15 +278,12 @@ class ClientService:
         Returns:
             list: Lista de dicionários com dados das aplicações
         """
-        db = SessionLocal()
-        try:
-            applications = db.query(Application).filter_by(
-                is_active=True
-            ).order_by(Application.category, Application.name).all()
+        db = get_db()
+        applications = db.query(Application).filter_by(
+            is_active=True
+        ).order_by(Application.category, Application.name).all()
 
-            return [app.to_dict() for app in applications]
-        finally:
-            db.close()
+        return [app.to_dict() for app in applications]
 
     def get_applications_for_client(self, client_id):
         """Retorna todas as aplicações com flag indicando se já estão vinculadas ao cliente
@@ -324,29 +294,26 @@ class ClientService:
         Returns:
             list: Lista de dicionários com dados das aplicações e flag 'is_added'
         """
-        db = SessionLocal()
-        try:
-            # Buscar todas as aplicações ativas
-            all_applications = db.query(Application).filter_by(
-                is_active=True
-            ).order_by(Application.category, Application.name).all()
-
-            # Buscar IDs das aplicações já vinculadas ao cliente
-            client_app_ids = db.query(ClientApplication.application_id).filter_by(
-                client_id=client_id
-            ).all()
-            client_app_ids_set = {app_id[0] for app_id in client_app_ids}
-
-            # Montar resultado com flag is_added
-            result = []
-            for app in all_applications:
-                app_dict = app.to_dict()
-                app_dict['is_added'] = app.id in client_app_ids_set
-                result.append(app_dict)
-
-            return result
-        finally:
-            db.close()
+        db = get_db()
+        # Buscar todas as aplicações ativas
+        all_applications = db.query(Application).filter_by(
+            is_active=True
+        ).order_by(Application.category, Application.name).all()
+
+        # Buscar IDs das aplicações já vinculadas ao cliente
+        client_app_ids = db.query(ClientApplication.application_id).filter_by(
+            client_id=client_id
+        ).all()
+        client_app_ids_set = {app_id[0] for app_id in client_app_ids}
+
+        # Montar resultado com flag is_added
+        result = []
+        for app in all_applications:
+            app_dict = app.to_dict()
+            app_dict['is_added'] = app.id in client_app_ids_set
+            result.append(app_dict)
+
+        return result
 
     def add_application_to_client(self, client_id, application_id, cod_elotech=None):
         """Adiciona uma aplicação ao cliente
@@ -359,7 +326,7 @@ class ClientService:
         Returns:
             dict: Dicionário com dados da associação criada
         """
-        db = SessionLocal()
+        db = get_db()
         try:
             # Verificar se a associação já existe
             existing = db.query(ClientApplication).filter_by(
@@ -385,8 +352,6 @@ class ClientService:
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     def remove_application_from_client(self, client_id, application_id):
         """Remove uma aplicação do cliente
@@ -398,7 +363,7 @@ class ClientService:
         Returns:
             bool: True se removido com sucesso
         """
-        db = SessionLocal()
+        db = get_db()
         try:
             # Buscar associação
             client_app = db.query(ClientApplication).filter_by(
@@ -415,8 +380,6 @@ class ClientService:
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
 
 # Instância singleton do serviço
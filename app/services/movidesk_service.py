@@ -1,13 +1,158 @@
 # -*- coding: utf-8 -*-
 import logging
+import queue
 import requests
 import os
-from datetime import datetime, timedelta
-from app.models.database import SessionLocal
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from sqlalchemy import Boolean, Column, MetaData, String, Table, text
+from config import app as app_config
+from app.models.database import get_db
 from app.models.organization import Organization
+from app.models.sync_backfill_window import BackfillWindowStatus, SyncBackfillWindow
+from app.models.sync_state import SyncState
 from app.models.ticket import Ticket
 from app.models.ticket_sync_log import TicketSyncLog
 
+# Campos e expansões dos tickets buscados na API
+TICKET_SELECT = "id,subject,status,category,createdDate,lastUpdate,owner,resolvedIn,closedIn,serviceFull"
+TICKET_EXPAND = "owner,createdBy,clients($select=businessName),clients($expand=organization),customFieldValues($expand=items)"
+
+# Nome do estado (sync_states) da sincronização incremental de tickets
+TICKETS_SYNC_STATE = 'movidesk_tickets'
+
+# Tabela temporária com as organizações recebidas da API (sincronização em lote)
+ORGANIZATIONS_STAGING = Table(
+    'organizations_staging', MetaData(),
+    Column('id', String(50), primary_key=True),
+    Column('business_name', String(255)),
+    Column('person_type', String(20)),
+    Column('valid', Boolean, nullable=False)  # False: dados inválidos, não gravada (mas não desativada)
+)
+
+# Respostas da API que valem nova tentativa (limite de requisições e falhas temporárias)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Marcador de fim da fila de páginas
+_END = object()
+
+
+def _to_utc(value):
+    """Datas da API sem fuso são UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _parse_api_datetime(value):
+    """Converte uma data da API (ISO 8601) em datetime"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _format_filter_datetime(value):
+    """Formata uma data para o $filter da API (UTC)"""
+    return _to_utc(value).strftime('%Y-%m-%dT%H:%M:%S.00z')
+
+
+def _retry_delay(response, attempt):
+    """
+    Espera (s) antes de nova tentativa: cabeçalho Retry-After (segundos ou
+    data HTTP) ou, sem ele, 2 ** tentativa
+    """
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(int(retry_after), 0)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(int((_to_utc(retry_at) - datetime.now(timezone.utc)).total_seconds()), 0)
+        except (TypeError, ValueError):
+            pass
+    return 2 ** attempt
+
+
+def _prefetch(pages, size):
+    """
+    Consome um iterador de páginas em uma thread, até `size` páginas à frente
+
+    Enquanto as páginas já recebidas são gravadas, as seguintes são baixadas;
+    a fila limitada mantém no máximo `size` páginas em memória além da atual.
+    Erros do iterador são repassados para quem consome.
+
+    Args:
+        pages: Iterador de páginas (listas de tickets)
+        size: Páginas buscadas à frente
+
+    Yields:
+        list: Páginas na ordem do iterador
+    """
+    buffer = queue.Queue(maxsize=max(size, 1))
+    stopped = threading.Event()
+
+    def put(item):
+        # Desiste se quem consome parou (erro ao gravar)
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+            put(_END)
+        except Exception as e:
+            put(e)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+
+
+class RateLimiter:
+    """
+    Espaça as chamadas para no máximo `per_minute` por minuto
+
+    Cada chamada reserva o próximo horário livre sob o lock e espera fora
+    dele, então várias threads/greenlets compartilham o mesmo limite sem
+    rajadas.
+    """
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Limitador compartilhado por todas as instâncias do serviço no processo
+rate_limiter = RateLimiter(app_config.MOVIDESK_RATE_LIMIT_PER_MINUTE)
+
 
 class MovideskService:
     """Serviço para integração com a API do Movidesk"""
@@ -15,68 +160,157 @@ class MovideskService:
     def __init__(self):
         self.token = os.getenv('MOVIDESK_TOKEN')
         self.base_url = "https://api.movidesk.com/public/v1"
+        self.http = requests.Session()
+        self.rate_limiter = rate_limiter
 
     def get_organizations_from_api(self):
-        """Busca organizações diretamente da API do Movidesk"""
-        try:
-            url = f"{self.base_url}/persons"
-            params = {
-                'token': self.token,
-                '$select': 'id,businessName,personType',
-                '$filter': 'personType eq 2 and isActive eq true',
-                '$orderby': 'businessName'
-            }
-
-            response = requests.get(url, params=params, timeout=60)
-            response.raise_for_status()
+        """
+        Busca organizações ativas diretamente da API do Movidesk (todas as páginas)
 
-            return response.json()
+        A paginação só termina com uma página vazia: a API pode devolver menos
+        que $top por página, e parar antes faria a sincronização desativar as
+        organizações das páginas seguintes.
+        """
+        try:
+            organizations = []
+            seen_ids = set()
+            while True:
+                page = self._api_get('persons', {
+                    '$select': 'id,businessName,personType',
+                    '$filter': 'personType eq 2 and isActive eq true',
+                    '$orderby': 'id',
+                    '$top': app_config.MOVIDESK_PAGE_SIZE,
+                    '$skip': len(organizations)
+                })
+                if not page:
+                    return organizations
+
+                page_ids = {org.get('id') for org in page}
+                if page_ids <= seen_ids:
+                    # A API ignorou o $skip e repetiu a página: parar para não entrar em loop
+                    logging.warning(f"Movidesk: página de organizações repetida em $skip={len(organizations)}")
+                    return organizations
+                seen_ids |= page_ids
+                organizations.extend(page)
         except Exception as e:
             logging.error(f"Erro ao buscar organizações do Movidesk: {e}")
             raise Exception(f"Erro ao buscar organizações: {str(e)}")
 
+    def _organization_row(self, org_data):
+        """
+        Converte a organização da API em linha da tabela temporária
+
+        Returns:
+            tuple: (linha, erro); organizações com nome vazio ou campos maiores
+                   que as colunas vêm com valid=False e o motivo em erro
+        """
+        org_id = str(org_data['id'])
+        business_name = (org_data.get('businessName') or '').strip()
+        person_type = str(org_data.get('personType'))
+
+        error = None
+        if not business_name:
+            error = 'nome vazio'
+        elif len(business_name) > ORGANIZATIONS_STAGING.c.business_name.type.length:
+            error = f'nome com mais de {ORGANIZATIONS_STAGING.c.business_name.type.length} caracteres'
+        elif len(person_type) > ORGANIZATIONS_STAGING.c.person_type.type.length:
+            error = f'tipo com mais de {ORGANIZATIONS_STAGING.c.person_type.type.length} caracteres'
+
+        return {
+            'id': org_id,
+            'business_name': business_name[:ORGANIZATIONS_STAGING.c.business_name.type.length] or None,
+            'person_type': person_type[:ORGANIZATIONS_STAGING.c.person_type.type.length],
+            'valid': error is None
+        }, error
+
     def sync_organizations(self):
-        """Sincroniza organizações do Movidesk com o banco de dados local"""
+        """
+        Sincroniza organizações do Movidesk com o banco de dados local
+
+        Em uma única transação: carrega as organizações da API em uma tabela
+        temporária, insere/atualiza a tabela organizations a partir dela e
+        desativa as organizações ativas que não vieram da API.
+
+        Proteções:
+        - Organizações com dados inválidos (nome vazio, campos maiores que as
+          colunas) não são gravadas e aparecem em errors, mas continuam
+          contando como existentes no Movidesk (não são desativadas)
+        - Se a API não retornar nenhuma organização, nada é alterado
+        - Se a API retornar menos que MOVIDESK_DEACTIVATION_MIN_RATIO das
+          organizações ativas hoje, nenhuma é desativada (resposta incompleta)
+        """
+        db = get_db()
         try:
             # Busca organizações da API
             organizations_data = self.get_organizations_from_api()
 
-            db = SessionLocal()
-            synced_count = 0
-            updated_count = 0
+            rows = {}
             errors = []
-
+            id_length = ORGANIZATIONS_STAGING.c.id.type.length
             for org_data in organizations_data:
-                try:
-                    org_id = org_data.get('id')
-
-                    # Verifica se a organização já existe
-                    existing_org = db.query(Organization).filter_by(id=org_id).first()
-
-                    if existing_org:
-                        # Atualiza organização existente
-                        existing_org.business_name = org_data.get('businessName')
-                        existing_org.person_type = str(org_data.get('personType'))
-                        existing_org.is_active = True
-                        updated_count += 1
-                    else:
-                        # Cria nova organização
-                        new_org = Organization(
-                            id=org_id,
-                            business_name=org_data.get('businessName'),
-                            person_type=str(org_data.get('personType')),
-                            is_active=True
-                        )
-                        db.add(new_org)
-                        synced_count += 1
-
-                    db.commit()
-
-                except Exception as e:
-                    db.rollback()
-                    errors.append(f"Organização {org_data.get('id')}: {str(e)}")
+                if not org_data.get('id'):
+                    errors.append(f"Organização sem id: {org_data.get('businessName')}")
+                    continue
+                if len(str(org_data['id'])) > id_length:
+                    errors.append(f"Organização {org_data['id']}: id com mais de {id_length} caracteres")
+                    continue
+
+                row, error = self._organization_row(org_data)
+                if error:
+                    errors.append(f"Organização {row['id']}: {error}")
+                rows[row['id']] = row
+
+            if not rows:
+                return {
+                    'success': False,
+                    'error': 'A API do Movidesk não retornou organizações; nenhuma organização foi alterada'
+                }
 
-            # Salvar log de sincronização
+            # Ativas antes desta sincronização, para a proteção contra respostas incompletas
+            active_count = db.query(Organization).filter_by(is_active=True).count()
+
+            db.execute(text(
+                f"CREATE TEMP TABLE {ORGANIZATIONS_STAGING.name} "
+                f"(id varchar(50) PRIMARY KEY, business_name varchar(255), person_type varchar(20), "
+                f"valid boolean NOT NULL) ON COMMIT DROP"
+            ))
+            db.execute(ORGANIZATIONS_STAGING.insert(), list(rows.values()))
+
+            inserted = db.execute(text(f"""
+                INSERT INTO organizations (id, business_name, person_type, is_active, created_at, updated_at)
+                SELECT id, business_name, person_type, true, now(), now()
+                FROM {ORGANIZATIONS_STAGING.name}
+                WHERE valid
+                ON CONFLICT (id) DO UPDATE SET
+                    business_name = excluded.business_name,
+                    person_type = excluded.person_type,
+                    is_active = true,
+                    updated_at = now()
+                RETURNING (xmax = 0)
+            """)).scalars().all()
+            synced_count = sum(1 for is_new in inserted if is_new)
+            updated_count = len(inserted) - synced_count
+
+            # Organizações que deixaram de existir (ou de estar ativas) no Movidesk
+            warning = None
+            deactivated_count = 0
+            if len(rows) < active_count * app_config.MOVIDESK_DEACTIVATION_MIN_RATIO:
+                warning = (
+                    f"A API retornou {len(rows)} organização(ões) para {active_count} ativa(s); "
+                    f"nenhuma foi desativada"
+                )
+                logging.warning(f"Movidesk: {warning}")
+            else:
+                deactivated_count = db.execute(text(f"""
+                    UPDATE organizations
+                    SET is_active = false, updated_at = now()
+                    WHERE is_active = true
+                      AND NOT EXISTS (
+                          SELECT 1 FROM {ORGANIZATIONS_STAGING.name} staging WHERE staging.id = organizations.id
+                      )
+                """)).rowcount
+
+            # Salvar log de sincronização (mesma transação)
             sync_log = TicketSyncLog(
                 sync_type='organizations',
                 total=len(organizations_data),
@@ -87,18 +321,22 @@ class MovideskService:
             db.add(sync_log)
             db.commit()
 
-            db.close()
+            if deactivated_count:
+                logging.info(f"Movidesk: {deactivated_count} organização(ões) desativada(s)")
 
             return {
                 'success': True,
                 'total': len(organizations_data),
                 'synced': synced_count,
                 'updated': updated_count,
+                'deactivated': deactivated_count,
+                'warning': warning,
                 'errors': len(errors),
                 'error_details': errors[:10]
             }
 
         except Exception as e:
+            db.rollback()
             return {
                 'success': False,
                 'error': str(e)
@@ -106,62 +344,133 @@ class MovideskService:
 
     def get_local_organizations(self):
         """Retorna organizações do banco de dados local"""
-        db = SessionLocal()
-        try:
-            organizations = db.query(Organization).filter_by(is_active=True).order_by(Organization.business_name).all()
-            return [org.to_dict() for org in organizations]
-        finally:
-            db.close()
+        db = get_db()
+        organizations = db.query(Organization).filter_by(is_active=True).order_by(Organization.business_name).all()
+        return [org.to_dict() for org in organizations]
 
     def get_organization_by_id(self, org_id):
         """Busca uma organização pelo ID"""
-        db = SessionLocal()
-        try:
-            org = db.query(Organization).filter_by(id=org_id).first()
-            return org.to_dict() if org else None
-        finally:
-            db.close()
+        db = get_db()
+        org = db.query(Organization).filter_by(id=org_id).first()
+        return org.to_dict() if org else None
 
     def get_organizations_stats(self):
         """Retorna estatísticas sobre as organizações"""
-        db = SessionLocal()
-        try:
-            total = db.query(Organization).filter_by(is_active=True).count()
+        db = get_db()
+        total = db.query(Organization).filter_by(is_active=True).count()
 
-            # Buscar última sincronização
-            last_sync = db.query(TicketSyncLog).filter_by(sync_type='organizations').order_by(TicketSyncLog.synced_at.desc()).first()
+        # Buscar última sincronização
+        last_sync = db.query(TicketSyncLog).filter_by(sync_type='organizations').order_by(TicketSyncLog.synced_at.desc()).first()
 
-            return {
-                'total': total,
-                'active': total,  # Todas as organizações são ativas
-                'last_sync': last_sync.to_dict() if last_sync else None
-            }
-        finally:
-            db.close()
+        return {
+            'total': total,
+            'active': total,  # Todas as organizações são ativas
+            'last_sync': last_sync.to_dict() if last_sync else None
+        }
 
     def get_tickets_from_api(self, start_date, end_date):
-        """Busca tickets diretamente da API do Movidesk"""
+        """Busca na API do Movidesk os tickets criados no período (gerador de páginas)"""
+        return self.iter_ticket_pages(
+            f"createdDate gt {start_date}T00:00:00.00z and createdDate le {end_date}T23:59:59.99z"
+        )
+
+    def get_updated_tickets_from_api(self, since):
+        """
+        Busca na API do Movidesk os tickets alterados depois de `since`
+
+        Args:
+            since: datetime (sem fuso é considerado UTC)
+
+        Returns:
+            generator: Páginas (listas) de tickets da API
+        """
+        return self.iter_ticket_pages(f"lastUpdate gt {_format_filter_datetime(since)}")
+
+    def iter_ticket_pages(self, filter_query, page_size=None):
+        """
+        Busca tickets na API do Movidesk página a página ($top/$skip)
+
+        Cada página é pedida apenas quando a anterior foi consumida, então a
+        memória usada não depende do tamanho do período. A ordenação por id
+        mantém as páginas estáveis enquanto a busca avança.
+
+        Args:
+            filter_query: $filter da API
+            page_size: Tickets por página (padrão MOVIDESK_PAGE_SIZE)
+
+        Yields:
+            list: Tickets da página
+        """
+        page_size = page_size or app_config.MOVIDESK_PAGE_SIZE
+        skip = 0
+        while True:
+            page = self._get_tickets_page(filter_query, page_size, skip)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            skip += page_size
+
+    def iter_tickets(self, filter_query, page_size=None):
+        """Busca tickets na API do Movidesk, um a um, conforme as páginas chegam"""
+        for page in self.iter_ticket_pages(filter_query, page_size):
+            yield from page
+
+    def _get_tickets_page(self, filter_query, top, skip):
+        """Busca uma página de tickets"""
         try:
-            select_fields = "id,subject,status,category,createdDate,owner,resolvedIn,closedIn,serviceFull"
-            filter_query = f"createdDate gt {start_date}T00:00:00.00z and createdDate le {end_date}T23:59:59.99z"
-            expand = "owner,createdBy,clients($select=businessName),clients($expand=organization),customFieldValues($expand=items)"
-
-            url = f"{self.base_url}/tickets"
-            params = {
-                'token': self.token,
-                '$select': select_fields,
+            return self._api_get('tickets', {
+                '$select': TICKET_SELECT,
                 '$filter': filter_query,
-                '$expand': expand
-            }
-
-            response = requests.get(url, params=params, timeout=120)
-            response.raise_for_status()
-
-            return response.json()
+                '$expand': TICKET_EXPAND,
+                '$orderby': 'id',
+                '$top': top,
+                '$skip': skip
+            })
         except Exception as e:
             logging.error(f"Erro ao buscar tickets do Movidesk: {e}")
             raise Exception(f"Erro ao buscar tickets: {str(e)}")
 
+    def _api_get(self, resource, params):
+        """
+        GET na API do Movidesk, com novas tentativas em falhas temporárias
+
+        Args:
+            resource: Recurso da API (ex: tickets, persons)
+            params: Parâmetros OData (o token é incluído aqui)
+
+        Returns:
+            JSON da resposta
+        """
+        params = {'token': self.token, **params}
+        where = f"{resource} $skip={params.get('$skip', 0)}"
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.rate_limiter.acquire()
+            try:
+                response = self.http.get(
+                    f"{self.base_url}/{resource}",
+                    params=params,
+                    timeout=app_config.MOVIDESK_REQUEST_TIMEOUT
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt > app_config.MOVIDESK_MAX_RETRIES:
+                    raise
+                logging.warning(f"Movidesk: {e} em {where}, nova tentativa em {2 ** attempt}s")
+                time.sleep(2 ** attempt)
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt <= app_config.MOVIDESK_MAX_RETRIES:
+                delay = _retry_delay(response, attempt)
+                logging.warning(f"Movidesk: resposta {response.status_code} em {where}, nova tentativa em {delay}s")
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            return response.json()
+
     def sync_tickets(self, start_date, end_date):
         """Sincroniza tickets do Movidesk com o banco de dados local"""
         try:
@@ -175,95 +484,352 @@ class MovideskService:
                     'error': 'O período não pode ser maior que 5 dias'
                 }
 
-            # Busca tickets da API
-            tickets_data = self.get_tickets_from_api(start_date, end_date)
+            # Busca tickets da API e grava cada página assim que chega
+            db = get_db()
+            result = self._sync_ticket_pages(db, self.get_tickets_from_api(start_date, end_date))
+            self._log_tickets_sync(db, result['total'], result['synced'], result['updated'], result['errors'])
 
-            db = SessionLocal()
-            synced_count = 0
-            updated_count = 0
-            errors = []
+            return {
+                'success': True,
+                'total': result['total'],
+                'synced': result['synced'],
+                'updated': result['updated'],
+                'errors': len(result['errors']),
+                'error_details': result['errors'][:10]
+            }
 
-            for ticket_data in tickets_data:
-                try:
-                    ticket_id = ticket_data.get('id')
-
-                    # Processa os dados do ticket
-                    ticket_info = self._parse_ticket(ticket_data)
-
-                    # Verifica se o ticket já existe
-                    existing_ticket = db.query(Ticket).filter_by(id=ticket_id).first()
-
-                    if existing_ticket:
-                        # Atualiza ticket existente
-                        existing_ticket.subject = ticket_info['subject']
-                        existing_ticket.status = ticket_info['status']
-                        existing_ticket.category = ticket_info['category']
-                        existing_ticket.service_full = ticket_info['service_full']
-                        existing_ticket.organization_name = ticket_info['organization_name']
-                        existing_ticket.client_name = ticket_info['client_name']
-                        existing_ticket.owner_name = ticket_info['owner_name']
-                        existing_ticket.created_by_name = ticket_info['created_by_name']
-                        existing_ticket.created_by_email = ticket_info['created_by_email']
-                        existing_ticket.created_date = ticket_info['created_date']
-                        existing_ticket.resolved_in = ticket_info['resolved_in']
-                        existing_ticket.closed_in = ticket_info['closed_in']
-                        existing_ticket.custom_field_module = ticket_info['custom_field_module']
-                        updated_count += 1
-                    else:
-                        # Cria novo ticket
-                        new_ticket = Ticket(
-                            id=ticket_id,
-                            subject=ticket_info['subject'],
-                            status=ticket_info['status'],
-                            category=ticket_info['category'],
-                            service_full=ticket_info['service_full'],
-                            organization_name=ticket_info['organization_name'],
-                            client_name=ticket_info['client_name'],
-                            owner_name=ticket_info['owner_name'],
-                            created_by_name=ticket_info['created_by_name'],
-                            created_by_email=ticket_info['created_by_email'],
-                            created_date=ticket_info['created_date'],
-                            resolved_in=ticket_info['resolved_in'],
-                            closed_in=ticket_info['closed_in'],
-                            custom_field_module=ticket_info['custom_field_module']
-                        )
-                        db.add(new_ticket)
-                        synced_count += 1
-
-                    db.commit()
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
 
-                except Exception as e:
-                    db.rollback()
-                    errors.append(f"Ticket {ticket_data.get('id')}: {str(e)}")
+    def sync_tickets_incremental(self):
+        """
+        Sincroniza apenas os tickets alterados desde a última execução bem-sucedida
 
-            # Salvar log de sincronização
-            sync_log = TicketSyncLog(
-                sync_type='tickets',
-                total=len(tickets_data),
-                synced=synced_count,
-                updated=updated_count,
-                errors=len(errors)
-            )
-            db.add(sync_log)
-            db.commit()
+        A busca filtra por lastUpdate a partir da marca d'água gravada em
+        sync_states (menos MOVIDESK_SYNC_OVERLAP_SECONDS, para não perder
+        alterações gravadas com atraso no Movidesk). Sem marca d'água, busca os
+        últimos MOVIDESK_INCREMENTAL_BOOTSTRAP_DAYS dias. A marca d'água só
+        avança quando todos os tickets foram gravados; se algum falhar, a
+        próxima execução busca o mesmo intervalo novamente.
 
-            db.close()
+        Returns:
+            dict: success, total, synced, updated, errors, error_details e watermark
+        """
+        db = get_db()
+        started_at = datetime.now(timezone.utc)
 
-            return {
-                'success': True,
-                'total': len(tickets_data),
-                'synced': synced_count,
-                'updated': updated_count,
-                'errors': len(errors),
-                'error_details': errors[:10]
-            }
+        state = db.get(SyncState, TICKETS_SYNC_STATE)
+        watermark = state.watermark if state and state.watermark else \
+            started_at - timedelta(days=app_config.MOVIDESK_INCREMENTAL_BOOTSTRAP_DAYS)
+        watermark = _to_utc(watermark)
 
+        try:
+            result = self._sync_ticket_pages(db, self.get_updated_tickets_from_api(
+                watermark - timedelta(seconds=app_config.MOVIDESK_SYNC_OVERLAP_SECONDS)
+            ))
         except Exception as e:
+            # Páginas já gravadas ficam; a próxima execução repete o intervalo
+            db.rollback()
+            self._save_sync_state(db, started_at, error=str(e))
             return {
                 'success': False,
                 'error': str(e)
             }
 
+        errors = result['errors']
+        if errors:
+            new_watermark = watermark
+            error = f"{len(errors)} ticket(s) com erro; marca d'água mantida"
+        else:
+            new_watermark = max(watermark, result['last_update'] or watermark)
+            error = None
+
+        self._save_sync_state(db, started_at, watermark=new_watermark, error=error)
+        self._log_tickets_sync(db, result['total'], result['synced'], result['updated'], errors)
+
+        return {
+            'success': True,
+            'total': result['total'],
+            'synced': result['synced'],
+            'updated': result['updated'],
+            'errors': len(errors),
+            'error_details': errors[:10],
+            'watermark': new_watermark.isoformat()
+        }
+
+    def full_resync_tickets(self, since=None):
+        """
+        Recupera a sincronização incremental a partir de uma data
+
+        Substitui a marca d'água e executa a sincronização incremental, que
+        busca todos os tickets alterados desde `since`.
+
+        Args:
+            since: datetime inicial (None: últimos MOVIDESK_INCREMENTAL_BOOTSTRAP_DAYS dias)
+
+        Returns:
+            dict: Resultado de sync_tickets_incremental
+        """
+        db = get_db()
+        state = db.get(SyncState, TICKETS_SYNC_STATE)
+        if state is None:
+            state = SyncState(name=TICKETS_SYNC_STATE)
+            db.add(state)
+        state.watermark = _to_utc(since) if since else None
+        db.commit()
+
+        return self.sync_tickets_incremental()
+
+    def backfill_tickets(self, start_date, end_date, window_days=None, concurrency=None):
+        """
+        Sincroniza um período longo de tickets (por data de criação), em janelas
+
+        O período é dividido em janelas de `window_days` dias, buscadas em
+        paralelo por até `concurrency` greenlets. Todas as requisições passam
+        pelo limitador compartilhado (MOVIDESK_RATE_LIMIT_PER_MINUTE) e cada
+        janela é gravada pelo upsert em lote em sua própria sessão. As janelas
+        concluídas ficam registradas em sync_backfill_windows: executar o mesmo
+        backfill novamente retoma apenas as pendentes ou com falha.
+
+        Args:
+            start_date: Data inicial (AAAA-MM-DD)
+            end_date: Data final (AAAA-MM-DD)
+            window_days: Dias por janela (padrão MOVIDESK_BACKFILL_WINDOW_DAYS, máximo 5)
+            concurrency: Janelas em paralelo (padrão MOVIDESK_BACKFILL_CONCURRENCY)
+
+        Returns:
+            dict: success, windows, completed, skipped, failed, total, synced, updated e errors
+        """
+        from eventlet.greenpool import GreenPool
+        from app.models.database import session_scope
+
+        window_days = min(max(window_days or app_config.MOVIDESK_BACKFILL_WINDOW_DAYS, 1), 5)
+        concurrency = max(concurrency or app_config.MOVIDESK_BACKFILL_CONCURRENCY, 1)
+
+        try:
+            date_start = datetime.strptime(start_date, '%Y-%m-%d').date()
+            date_end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        except ValueError:
+            return {'success': False, 'error': 'Datas inválidas (use AAAA-MM-DD)'}
+        if date_end < date_start:
+            return {'success': False, 'error': 'A data final é anterior à data inicial'}
+
+        backfill = f"tickets:{date_start.isoformat()}:{date_end.isoformat()}:{window_days}d"
+
+        windows = []
+        window_start = date_start
+        while window_start <= date_end:
+            window_end = min(window_start + timedelta(days=window_days - 1), date_end)
+            windows.append((window_start, window_end))
+            window_start = window_end + timedelta(days=1)
+
+        # Checkpoint: registrar as janelas novas e separar as já concluídas
+        with session_scope() as db:
+            existing = {
+                window.window_start: window.status
+                for window in db.query(SyncBackfillWindow).filter_by(backfill=backfill)
+            }
+            for window_start, window_end in windows:
+                if window_start not in existing:
+                    db.add(SyncBackfillWindow(backfill=backfill, window_start=window_start, window_end=window_end))
+        pending = [window for window in windows if existing.get(window[0]) != BackfillWindowStatus.DONE]
+
+        logging.info(
+            f"Movidesk: backfill {backfill}: {len(windows)} janela(s), "
+            f"{len(windows) - len(pending)} já concluída(s)"
+        )
+
+        def _run_window(window):
+            window_start, window_end = window
+            try:
+                with session_scope() as db:
+                    result = self._sync_ticket_pages(
+                        db, self.get_tickets_from_api(window_start.isoformat(), window_end.isoformat())
+                    )
+                status, error = BackfillWindowStatus.DONE, None
+                if result['errors']:
+                    status, error = BackfillWindowStatus.FAILED, '; '.join(result['errors'][:10])
+            except Exception as e:
+                result = {'total': 0, 'synced': 0, 'updated': 0, 'errors': [str(e)]}
+                status, error = BackfillWindowStatus.FAILED, str(e)
+
+            with session_scope() as db:
+                db.query(SyncBackfillWindow).filter_by(backfill=backfill, window_start=window_start).update({
+                    'status': status,
+                    'total': result['total'],
+                    'synced': result['synced'],
+                    'updated': result['updated'],
+                    'errors': len(result['errors']),
+                    'last_error': error,
+                    'completed_at': datetime.now(timezone.utc) if status == BackfillWindowStatus.DONE else None
+                }, synchronize_session=False)
+
+            logging.info(
+                f"Movidesk: backfill {window_start} a {window_end}: {status} "
+                f"(tickets: {result['total']}, erros: {len(result['errors'])})"
+            )
+            return status, result
+
+        totals = {'total': 0, 'synced': 0, 'updated': 0, 'errors': 0}
+        failed = 0
+        pool = GreenPool(concurrency)
+        for status, result in pool.imap(_run_window, pending):
+            if status != BackfillWindowStatus.DONE:
+                failed += 1
+            totals['total'] += result['total']
+            totals['synced'] += result['synced']
+            totals['updated'] += result['updated']
+            totals['errors'] += len(result['errors'])
+
+        if pending:
+            with session_scope() as db:
+                db.add(TicketSyncLog(sync_type='tickets', **totals))
+
+        return {
+            'success': failed == 0,
+            'backfill': backfill,
+            'windows': len(windows),
+            'completed': len(pending) - failed,
+            'skipped': len(windows) - len(pending),
+            'failed': failed,
+            **totals
+        }
+
+    def get_sync_state(self):
+        """Retorna o estado da sincronização incremental de tickets (ou None)"""
+        state = get_db().get(SyncState, TICKETS_SYNC_STATE)
+        return state.to_dict() if state else None
+
+    def _save_sync_state(self, db, started_at, watermark=None, error=None):
+        """Grava a execução no estado da sincronização incremental (mantém a marca d'água se None)"""
+        state = db.get(SyncState, TICKETS_SYNC_STATE)
+        if state is None:
+            state = SyncState(name=TICKETS_SYNC_STATE)
+            db.add(state)
+
+        state.last_run_at = started_at
+        state.last_error = error
+        if watermark is not None:
+            state.watermark = watermark
+            if error is None:
+                state.last_success_at = started_at
+        db.commit()
+
+    def _sync_ticket_pages(self, db, pages):
+        """
+        Grava as páginas de tickets conforme são baixadas
+
+        As páginas seguintes são buscadas em paralelo à gravação, até
+        MOVIDESK_PREFETCH_PAGES à frente.
+
+        Args:
+            db: Sessão do banco
+            pages: Iterador de páginas da API
+
+        Returns:
+            dict: total, synced, updated, errors (lista) e last_update (maior lastUpdate, UTC)
+        """
+        result = {'total': 0, 'synced': 0, 'updated': 0, 'errors': [], 'last_update': None}
+
+        for page in _prefetch(pages, app_config.MOVIDESK_PREFETCH_PAGES):
+            synced_count, updated_count, errors = self._save_tickets(db, page)
+            result['total'] += len(page)
+            result['synced'] += synced_count
+            result['updated'] += updated_count
+            result['errors'].extend(errors)
+
+            for ticket_data in page:
+                if ticket_data.get('lastUpdate'):
+                    last_update = _to_utc(_parse_api_datetime(ticket_data['lastUpdate']))
+                    if result['last_update'] is None or last_update > result['last_update']:
+                        result['last_update'] = last_update
+
+        return result
+
+    def _save_tickets(self, db, tickets_data):
+        """
+        Grava os tickets da API (inclui os novos e atualiza os existentes)
+
+        Os tickets são gravados com INSERT ... ON CONFLICT (id) DO UPDATE em
+        lotes de MOVIDESK_SYNC_BATCH_SIZE, um commit por lote. Se um lote
+        falhar, ele é repetido ticket a ticket (com savepoint) para gravar os
+        válidos e registrar apenas os que falharam.
+
+        Returns:
+            tuple: (novos, atualizados, lista de erros)
+        """
+        synced_count = 0
+        updated_count = 0
+        errors = []
+
+        # Um mesmo ticket não pode aparecer duas vezes no mesmo INSERT ... ON CONFLICT
+        rows = {}
+        for ticket_data in tickets_data:
+            try:
+                rows[ticket_data.get('id')] = {'id': ticket_data.get('id'), **self._parse_ticket(ticket_data)}
+            except Exception as e:
+                errors.append(f"Ticket {ticket_data.get('id')}: {str(e)}")
+        rows = list(rows.values())
+
+        batch_size = max(app_config.MOVIDESK_SYNC_BATCH_SIZE, 1)
+        for index in range(0, len(rows), batch_size):
+            batch = rows[index:index + batch_size]
+            try:
+                inserted = self._upsert_tickets(db, batch)
+                db.commit()
+                synced_count += inserted
+                updated_count += len(batch) - inserted
+                continue
+            except Exception as e:
+                db.rollback()
+                logging.warning(f"Movidesk: lote de {len(batch)} ticket(s) falhou, gravando um a um: {e}")
+
+            for row in batch:
+                try:
+                    with db.begin_nested():
+                        inserted = self._upsert_tickets(db, [row])
+                    synced_count += inserted
+                    updated_count += 1 - inserted
+                except Exception as e:
+                    errors.append(f"Ticket {row['id']}: {str(e)}")
+            db.commit()
+
+        return synced_count, updated_count, errors
+
+    def _upsert_tickets(self, db, rows):
+        """
+        Insere ou atualiza os tickets em um único comando
+
+        Returns:
+            int: Quantidade de tickets novos (xmax = 0 no RETURNING: a linha
+                 foi inserida, não atualizada)
+        """
+        from sqlalchemy import literal_column
+        from sqlalchemy.dialects.postgresql import insert
+
+        statement = insert(Ticket.__table__).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Ticket.__table__.c.id],
+            set_={name: statement.excluded[name] for name in rows[0] if name != 'id'}
+        ).returning(literal_column('(xmax = 0)').label('inserted'))
+
+        return sum(1 for inserted, in db.execute(statement) if inserted)
+
+    def _log_tickets_sync(self, db, total, synced_count, updated_count, errors):
+        """Salva o log de sincronização de tickets"""
+        sync_log = TicketSyncLog(
+            sync_type='tickets',
+            total=total,
+            synced=synced_count,
+            updated=updated_count,
+            errors=len(errors)
+        )
+        db.add(sync_log)
+        db.commit()
+
     def _parse_ticket(self, ticket):
         """Converte ticket da API para formato do banco"""
         ticket_info = {
@@ -279,7 +845,8 @@ class MovideskService:
             'created_date': None,
             'resolved_in': None,
             'closed_in': None,
-            'custom_field_module': None
+            'custom_field_module': None,
+            'last_update': None
         }
 
         # Cliente e organização
@@ -324,6 +891,10 @@ class MovideskService:
                 closed_in.replace('Z', '+00:00')
             )
 
+        last_update = ticket.get('lastUpdate')
+        if last_update:
+            ticket_info['last_update'] = _parse_api_datetime(last_update)
+
         # Módulo
         custom_fields = ticket.get('customFieldValues', [])
         if custom_fields:
@@ -335,19 +906,17 @@ class MovideskService:
 
     def get_tickets_stats(self):
         """Retorna estatísticas sobre os tickets"""
-        db = SessionLocal()
-        try:
-            total = db.query(Ticket).count()
+        db = get_db()
+        total = db.query(Ticket).count()
 
-            # Buscar última sincronização
-            last_sync = db.query(TicketSyncLog).filter_by(sync_type='tickets').order_by(TicketSyncLog.synced_at.desc()).first()
+        # Buscar última sincronização
+        last_sync = db.query(TicketSyncLog).filter_by(sync_type='tickets').order_by(TicketSyncLog.synced_at.desc()).first()
 
-            return {
-                'total': total,
-                'last_sync': last_sync.to_dict() if last_sync else None
-            }
-        finally:
-            db.close()
+        return {
+            'total': total,
+            'last_sync': last_sync.to_dict() if last_sync else None,
+            'incremental': self.get_sync_state()
+        }
 
 
 # Instância singleton
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Agrupamento de Notificações em Rajadas
+
+Quando vários eventos geram notificações do mesmo tipo para o mesmo usuário
+em sequência (aprovação de várias viagens, importação de licenças), cada um
+custaria uma linha no banco, um emit e uma mensagem de WhatsApp.
+
+Funcionamento, por (usuário, tipo):
+- A primeira notificação é enviada na hora e abre uma janela de
+  NOTIFICATION_COALESCE_SECONDS
+- As seguintes dentro da janela ficam retidas em memória
+- Ao fim da janela, as retidas viram uma única notificação resumo (uma linha,
+  um emit e uma mensagem de WhatsApp) e uma nova janela é aberta; sem
+  retidas, a janela é encerrada
+
+Com NOTIFICATION_COALESCE_SECONDS=0, ou em processos sem o worker (scripts de
+linha de comando), as notificações são sempre enviadas na hora. As retidas
+vivem apenas na memória do processo: se ele terminar durante a janela, o
+resumo pendente se perde (as notificações anteriores já foram entregues).
+
+Exemplo de uso:
+    from app.services.notification_coalescer import notification_coalescer
+
+    user_ids = notification_coalescer.admit(user_ids, NotificationType.TRAVEL, title, message)
+"""
+import logging
+import threading
+import time
+
+from config import app as app_config
+
+# Quantidade de mensagens listadas no texto do resumo
+DIGEST_MAX_ITEMS = 5
+
+# URL do resumo quando as notificações agrupadas apontam para lugares diferentes
+DIGEST_ACTION_URL = '/admin/notifications'
+
+
+def build_digest(items):
+    """
+    Monta o título, a mensagem e a ação da notificação resumo
+
+    Args:
+        items: Lista de dicts com title, message, action_url e action_text
+
+    Returns:
+        dict: title, message, action_url e action_text do resumo
+    """
+    if len(items) == 1:
+        # Apenas uma retida: enviar a própria notificação
+        return dict(items[0])
+
+    titles = list(dict.fromkeys(item['title'] for item in items))
+    title = f"{titles[0]} ({len(items)})" if len(titles) == 1 else f"{len(items)} novas notificações"
+
+    lines = [
+        f"- {item['message']}" if len(titles) == 1 else f"- {item['title']}: {item['message']}"
+        for item in items[:DIGEST_MAX_ITEMS]
+    ]
+    if len(items) > DIGEST_MAX_ITEMS:
+        lines.append(f"... e mais {len(items) - DIGEST_MAX_ITEMS}")
+
+    action_urls = {item['action_url'] for item in items}
+    if len(action_urls) == 1:
+        action_url = action_urls.pop()
+        action_text = items[0]['action_text']
+    else:
+        action_url = DIGEST_ACTION_URL
+        action_text = 'Ver notificações'
+
+    return {
+        'title': title,
+        'message': '\n'.join(lines),
+        'action_url': action_url,
+        'action_text': action_text
+    }
+
+
+class NotificationCoalescer:
+    """Janelas de agrupamento por (usuário, tipo) e envio dos resumos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows = {}
+        self.running = False
+        self.counters = {
+            'sent_immediately': 0,
+            'held': 0,
+            'digests': 0
+        }
+
+    @property
+    def window_seconds(self):
+        return app_config.NOTIFICATION_COALESCE_SECONDS
+
+    def admit(self, user_ids, notification_type, title, message, action_url=None, action_text=None):
+        """
+        Decide quais usuários recebem a notificação agora
+
+        Os demais têm a notificação retida para o resumo da janela em aberto.
+
+        Args:
+            user_ids: IDs dos destinatários
+            notification_type: Tipo da notificação (NotificationType)
+            title, message, action_url, action_text: Conteúdo da notificação
+
+        Returns:
+            list: IDs dos usuários que devem receber a notificação imediatamente
+        """
+        if not self.running or self.window_seconds <= 0:
+            return list(user_ids)
+
+        now = time.monotonic()
+        item = {'title': title, 'message': message, 'action_url': action_url, 'action_text': action_text}
+
+        immediate = []
+        with self._lock:
+            for user_id in user_ids:
+                key = (user_id, notification_type)
+                window = self._windows.get(key)
+                if window is None:
+                    self._windows[key] = {'ends_at': now + self.window_seconds, 'items': []}
+                    immediate.append(user_id)
+                else:
+                    window['items'].append(item)
+
+            self.counters['sent_immediately'] += len(immediate)
+            self.counters['held'] += len(user_ids) - len(immediate)
+
+        return immediate
+
+    def _take_expired(self):
+        """Retira as janelas vencidas e devolve os resumos a enviar"""
+        now = time.monotonic()
+        digests = []
+        with self._lock:
+            for key, window in list(self._windows.items()):
+                if window['ends_at'] > now:
+                    continue
+                if window['items']:
+                    digests.append((key, window['items']))
+                    # A rajada continua: nova janela a partir do resumo
+                    self._windows[key] = {'ends_at': now + self.window_seconds, 'items': []}
+                else:
+                    del self._windows[key]
+        return digests
+
+    def flush(self):
+        """
+        Envia os resumos das janelas vencidas
+
+        Usuários com o mesmo resumo (ex.: aprovadores de uma mesma rajada)
+        são gravados com um único INSERT.
+
+        Returns:
+            int: Quantidade de resumos enviados
+        """
+        from app.models.database import session_scope
+        from app.utils.notification_helper import send_notifications_bulk
+
+        groups = {}
+        for (user_id, notification_type), items in self._take_expired():
+            digest = build_digest(items)
+            key = (notification_type, digest['title'], digest['message'], digest['action_url'], digest['action_text'])
+            groups.setdefault(key, []).append(user_id)
+
+        sent = 0
+        for (notification_type, title, message, action_url, action_text), user_ids in groups.items():
+            try:
+                with session_scope():
+                    send_notifications_bulk(
+                        user_ids, title, message,
+                        notification_type=notification_type,
+                        action_url=action_url,
+                        action_text=action_text,
+                        coalesce=False
+                    )
+                sent += len(user_ids)
+            except Exception as e:
+                logging.error(f"Notificações: erro ao enviar resumo para {len(user_ids)} usuário(s): {e}")
+
+        if sent:
+            with self._lock:
+                self.counters['digests'] += sent
+        return sent
+
+    def run_worker(self):
+        """
+        Loop do worker em background (iniciado com socketio.start_background_task)
+
+        Verifica as janelas vencidas a cada segundo.
+        """
+        import eventlet
+
+        self.running = True
+        while True:
+            eventlet.sleep(1)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Notificações: erro no agrupamento: {e}")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'running': self.running,
+                'window_seconds': self.window_seconds,
+                'open_windows': len(self._windows),
+                'held_now': sum(len(window['items']) for window in self._windows.values()),
+                **self.counters
+            }
+
+
+# Instância singleton do agrupador
+notification_coalescer = NotificationCoalescer()
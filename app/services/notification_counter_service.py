@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço do Contador de Notificações Não Lidas
+
+A quantidade de notificações não lidas de cada usuário fica na coluna
+users.unread_notifications_count, mantida na mesma transação que cria, lê ou
+exclui as notificações. A leitura é servida de um cache em memória, então a
+renderização das páginas e os eventos Socket.IO não fazem COUNT(*) na tabela
+notifications.
+
+Consistência:
+- increment/decrement/reset atualizam a coluna com UPDATE atômico
+  (contador = contador + n), seguro com requisições concorrentes
+- Quem chama deve alterar o contador apenas quando a notificação realmente
+  mudou de estado (ex.: UPDATE ... WHERE is_read = false com rowcount 1)
+- O cache do processo é descartado para os usuários afetados logo após o
+  commit; os demais processos veem o novo valor em até
+  NOTIFICATION_UNREAD_CACHE_TTL segundos
+
+Exemplo de uso:
+    from app.services.notification_counter_service import notification_counter_service
+
+    unread_count = notification_counter_service.get(user_id)
+"""
+import threading
+import time
+
+from sqlalchemy import case, event, select, update
+
+from config.app import NOTIFICATION_UNREAD_CACHE_TTL
+from app.models.database import get_db
+from app.models.user import User
+
+users = User.__table__
+counter = users.c.unread_notifications_count
+
+
+class NotificationCounterService:
+    """Manutenção e cache do contador de notificações não lidas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def get(self, user_id):
+        """
+        Retorna a quantidade de notificações não lidas do usuário
+
+        Args:
+            user_id: ID do usuário
+
+        Returns:
+            int: Notificações não lidas
+        """
+        now = time.monotonic()
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        count = get_db().execute(select(counter).where(users.c.id == user_id)).scalar() or 0
+        with self._lock:
+            self._cache[user_id] = (count, now + NOTIFICATION_UNREAD_CACHE_TTL)
+        return count
+
+    def increment(self, db, user_ids, amount=1):
+        """
+        Soma `amount` ao contador dos usuários, na transação da sessão informada
+
+        Args:
+            db: Sessão do banco (quem chama faz o commit)
+            user_ids: IDs dos usuários
+            amount: Quantidade de notificações criadas para cada usuário
+        """
+        user_ids = list(user_ids)
+        if not user_ids or amount <= 0:
+            return
+        self._update(db, user_ids, counter + amount)
+
+    def decrement(self, db, user_id, amount=1):
+        """
+        Subtrai `amount` do contador do usuário (nunca abaixo de zero)
+
+        Args:
+            db: Sessão do banco (quem chama faz o commit)
+            user_id: ID do usuário
+            amount: Quantidade de notificações não lidas que foram lidas ou excluídas
+        """
+        if amount <= 0:
+            return
+        self._update(db, [user_id], case((counter > amount, counter - amount), else_=0))
+
+    def reset(self, db, user_id):
+        """
+        Zera o contador do usuário (todas as notificações foram lidas)
+
+        Args:
+            db: Sessão do banco (quem chama faz o commit)
+            user_id: ID do usuário
+        """
+        self._update(db, [user_id], 0)
+
+    def invalidate(self, user_ids=None):
+        """Descarta o cache dos usuários informados (ou de todos)"""
+        with self._lock:
+            if user_ids is None:
+                self._cache.clear()
+            else:
+                for user_id in user_ids:
+                    self._cache.pop(user_id, None)
+
+    def _update(self, db, user_ids, value):
+        # Mantém updated_at: o contador não é uma alteração do cadastro do usuário
+        db.execute(
+            update(users)
+            .where(users.c.id.in_(user_ids))
+            .values({counter: value, users.c.updated_at: users.c.updated_at})
+        )
+
+        # Descarta o cache deste processo assim que a alteração for confirmada
+        session = db() if callable(db) else db
+        event.listen(session, 'after_commit', lambda s: self.invalidate(user_ids), once=True)
+
+
+# Instância singleton do serviço
+notification_counter_service = NotificationCounterService()
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Partições da Tabela de Notificações
+
+A tabela notifications é particionada por mês em created_at (migration 040),
+com partições nomeadas notifications_yAAAAmMM e uma partição default. Este
+serviço, executado diariamente pelo scheduler:
+
+- Cria as partições dos próximos NOTIFICATION_PARTITIONS_AHEAD meses, para
+  que as notificações novas nunca caiam na partição default
+- Remove (drop) ou desanexa e renomeia (archive) as partições com mais de
+  NOTIFICATION_RETENTION_MONTHS meses. Remover uma partição é instantâneo,
+  ao contrário de um DELETE com milhões de linhas
+
+Os contadores de não lidas (users.unread_notifications_count) são ajustados na
+mesma transação em que a partição sai da tabela.
+
+Exemplo de uso:
+    from app.services.notification_partition_service import notification_partition_service
+
+    with session_scope() as db:
+        notification_partition_service.maintain(db)
+"""
+import logging
+import re
+from datetime import date
+
+from sqlalchemy import event, text
+
+from config import app as app_config
+from app.services.notification_counter_service import notification_counter_service
+
+PARENT_TABLE = 'notifications'
+DEFAULT_PARTITION = 'notifications_default'
+
+_PARTITION_RE = re.compile(r'^notifications_y(\d{4})m(\d{2})$')
+
+# Evita que o DROP/DETACH fique esperando (e bloqueando) as requisições em andamento
+LOCK_TIMEOUT = '5s'
+
+RETENTION_MODES = ('drop', 'archive')
+
+
+def add_months(month, months):
+    """Primeiro dia do mês `months` meses depois (ou antes, se negativo) de `month`"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    """Nome da partição de um mês (ex.: notifications_y2025m01)"""
+    return f'notifications_y{month.year:04d}m{month.month:02d}'
+
+
+def _bound(month):
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+class NotificationPartitionService:
+    """Criação e retenção das partições mensais de notificações"""
+
+    def list_partitions(self, db):
+        """
+        Lista as partições mensais existentes
+
+        Args:
+            db: Sessão do banco
+
+        Returns:
+            dict: {primeiro dia do mês: nome da partição}
+        """
+        rows = db.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+        """), {'parent': PARENT_TABLE}).all()
+
+        partitions = {}
+        for (name,) in rows:
+            match = _PARTITION_RE.match(name)
+            if match:
+                partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+        return partitions
+
+    def ensure_partitions(self, db, months_ahead):
+        """
+        Cria as partições do mês atual até `months_ahead` meses à frente
+
+        Se a partição default já tiver linhas do mês (ex.: scheduler parado),
+        elas são movidas para a partição nova antes de anexá-la.
+
+        Args:
+            db: Sessão do banco
+            months_ahead: Quantidade de meses à frente
+
+        Returns:
+            list: Nomes das partições criadas
+        """
+        existing = self.list_partitions(db)
+        today = date.today()
+        current = date(today.year, today.month, 1)
+
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            self._create_partition(db, month)
+            created.append(partition_name(month))
+
+        if created:
+            logging.info(f"Notificações: partições criadas: {', '.join(created)}")
+        return created
+
+    def _create_partition(self, db, month):
+        name = partition_name(month)
+        start, end = _bound(month), _bound(add_months(month, 1))
+
+        in_default = db.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= {start} AND created_at < {end})"
+        )).scalar()
+
+        db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        if not in_default:
+            db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES FROM ({start}) TO ({end})"
+            ))
+            return
+
+        # Mover as linhas do mês da default para a nova partição e anexá-la
+        db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+        db.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE created_at >= {start} AND created_at < {end} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ))
+        db.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})"))
+        logging.warning(f"Notificações: linhas da partição default movidas para {name}")
+
+    def apply_retention(self, db, months, mode='drop'):
+        """
+        Remove ou arquiva as partições anteriores aos últimos `months` meses
+
+        Args:
+            db: Sessão do banco
+            months: Meses mantidos, contando o atual (0 desativa)
+            mode: 'drop' (exclui) ou 'archive' (desanexa e renomeia para notifications_archive_*)
+
+        Returns:
+            list: Nomes das partições removidas ou arquivadas
+        """
+        if months <= 0:
+            return []
+        if mode not in RETENTION_MODES:
+            raise ValueError(f"Modo de retenção inválido: {mode}")
+
+        today = date.today()
+        cutoff = add_months(date(today.year, today.month, 1), -(months - 1))
+
+        removed = []
+        for month, name in sorted(self.list_partitions(db).items()):
+            if month >= cutoff:
+                break
+
+            # As não lidas da partição deixam de existir para o usuário
+            db.execute(text(f"""
+                UPDATE users
+                SET unread_notifications_count = GREATEST(users.unread_notifications_count - expired.total, 0)
+                FROM (
+                    SELECT user_id, COUNT(*) AS total
+                    FROM {name}
+                    WHERE is_read = false
+                    GROUP BY user_id
+                ) AS expired
+                WHERE users.id = expired.user_id
+            """))
+
+            db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+            if mode == 'drop':
+                db.execute(text(f"DROP TABLE {name}"))
+            else:
+                db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+                db.execute(text(f"ALTER TABLE {name} RENAME TO {name.replace('notifications_', 'notifications_archive_', 1)}"))
+            removed.append(name)
+
+        if removed:
+            # Contadores em cache ficam desatualizados após o commit
+            session = db() if callable(db) else db
+            event.listen(session, 'after_commit', lambda s: notification_counter_service.invalidate(), once=True)
+            logging.info(f"Notificações: partições ({mode}): {', '.join(removed)}")
+        return removed
+
+    def maintain(self, db):
+        """
+        Cria as partições futuras e aplica a retenção configurada
+
+        Args:
+            db: Sessão do banco (quem chama faz o commit)
+
+        Returns:
+            dict: Partições criadas e removidas/arquivadas
+        """
+        if db.get_bind().dialect.name != 'postgresql':
+            return {'created': [], 'removed': []}
+
+        return {
+            'created': self.ensure_partitions(db, app_config.NOTIFICATION_PARTITIONS_AHEAD),
+            'removed': self.apply_retention(
+                db,
+                app_config.NOTIFICATION_RETENTION_MONTHS,
+                app_config.NOTIFICATION_RETENTION_MODE
+            )
+        }
+
+
+# Instância singleton do serviço
+notification_partition_service = NotificationPartitionService()
@@ -6,8 +6,20 @@ Este módulo fornece uma fila thread-safe para gerenciar notificações Socket.I
 
 Arquitetura:
 - Threads de processamento pesado (ex: upload de arquivos) adicionam notificações à fila
-- Worker eventlet em background processa a fila e emite via Socket.IO
-- Garante que notificações sejam entregues em tempo real sem bloquear a aplicação
+- Worker eventlet em background fica bloqueado na fila (sem polling) e acorda
+  assim que uma notificação é adicionada
+- A cada despertar o worker emite todas as notificações pendentes (até
+  MAX_BATCH_SIZE) antes de voltar a esperar
+- Profundidade da fila, latência de entrega e erros ficam disponíveis em
+  get_stats() para a API de diagnóstico
+
+Transporte (NOTIFICATION_TRANSPORT):
+- memory (padrão): a fila é local ao processo
+- postgres: add_notification publica com pg_notify no canal
+  NOTIFICATION_CHANNEL e cada processo que roda o worker mantém uma conexão
+  em LISTEN que repassa as mensagens para a sua fila local. Assim uma
+  notificação criada em qualquer processo chega aos clientes Socket.IO
+  conectados em todos os processos atrás do balanceador
 
 Exemplo de uso:
     from app.services.notification_queue_service import add_notification
@@ -19,11 +31,267 @@ Exemplo de uso:
     }
     add_notification(notification_data)
 """
+import json
+import logging
 import queue
+import threading
+import time
+from collections import deque
+
+from config import app as app_config
+from app.services.presence_service import presence_registry
+
+# Quantidade máxima de notificações emitidas por despertar do worker
+MAX_BATCH_SIZE = 100
 
-# Fila global thread-safe para notificações pendentes
+# Quantidade de latências recentes usadas para os percentis
+LATENCY_SAMPLES = 1000
+
+# Fila global thread-safe para notificações pendentes: itens (enfileirada_em, dados)
 notification_queue = queue.Queue()
 
+# Limite do payload do NOTIFY no PostgreSQL (8000 bytes), com folga
+MAX_NOTIFY_PAYLOAD = 7500
+
+# Espera máxima entre tentativas de reconexão do LISTEN
+MAX_RECONNECT_SECONDS = 30
+
+
+class NotificationWorkerStats:
+    """Métricas do worker de notificações"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = False
+        self.delivered = 0
+        self.skipped_offline = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched = 0
+        self.last_error = None
+        self.max_latency_ms = 0.0
+        self.total_latency_ms = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def record_delivery(self, latency_ms):
+        with self._lock:
+            self.delivered += 1
+            self.total_latency_ms += latency_ms
+            self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+            self.latencies.append(latency_ms)
+
+    def record_skip(self):
+        with self._lock:
+            self.skipped_offline += 1
+
+    def record_error(self, error):
+        with self._lock:
+            self.errors += 1
+            self.last_error = {'at': time.strftime('%Y-%m-%d %H:%M:%S'), 'error': str(error)}
+
+    def record_batch(self, size):
+        with self._lock:
+            self.batches += 1
+            self.batched += size
+
+    def snapshot(self):
+        with self._lock:
+            ordered = sorted(self.latencies)
+
+            def percentile(pct):
+                if not ordered:
+                    return 0.0
+                index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+                return round(ordered[index], 3)
+
+            return {
+                'running': self.running,
+                'queue_depth': notification_queue.qsize(),
+                'delivered': self.delivered,
+                'skipped_offline': self.skipped_offline,
+                'errors': self.errors,
+                'batches': self.batches,
+                'avg_batch_size': round(self.batched / self.batches, 2) if self.batches else 0.0,
+                'latency_ms': {
+                    'avg': round(self.total_latency_ms / self.delivered, 3) if self.delivered else 0.0,
+                    'p50': percentile(50),
+                    'p95': percentile(95),
+                    'max': round(self.max_latency_ms, 3)
+                },
+                'last_error': self.last_error
+            }
+
+
+# Métricas globais do worker
+worker_stats = NotificationWorkerStats()
+
+
+class MemoryTransport:
+    """Transporte local: as notificações vão direto para a fila do processo"""
+
+    name = 'memory'
+
+    def publish(self, notifications_data):
+        enqueued_at = time.monotonic()
+        for notification_data in notifications_data:
+            notification_queue.put((enqueued_at, notification_data))
+
+    def start(self, socketio):
+        pass
+
+    def snapshot(self):
+        return {'name': self.name}
+
+
+class PostgresTransport:
+    """
+    Transporte via LISTEN/NOTIFY do PostgreSQL, para várias instâncias da aplicação
+
+    A publicação usa uma conexão do pool em autocommit. O listener usa uma
+    conexão dedicada (fora do pool) e espera por dados no socket com o hub do
+    eventlet, então não ocupa o servidor enquanto não há notificações.
+    """
+
+    name = 'postgres'
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._lock = threading.Lock()
+        self.listening = False
+        self.published = 0
+        self.received = 0
+        self.reconnects = 0
+        self.fallbacks = 0
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _payload(self, notification_data):
+        """Serializa a notificação; as grandes demais seguem apenas como referência ao id"""
+        payload = json.dumps({'t': time.time(), 'n': notification_data}, ensure_ascii=False, default=str)
+        if len(payload.encode('utf-8')) <= MAX_NOTIFY_PAYLOAD:
+            return payload
+        return json.dumps({'t': time.time(), 'ref': notification_data.get('id')})
+
+    def publish(self, notifications_data):
+        from sqlalchemy import text
+        from app.models.database import engine
+
+        payloads = [{'channel': self.channel, 'payload': self._payload(data)} for data in notifications_data]
+        if not payloads:
+            return
+
+        try:
+            with engine.connect() as conn:
+                conn.execution_options(isolation_level='AUTOCOMMIT')\
+                    .execute(text('SELECT pg_notify(:channel, :payload)'), payloads)
+            self._count('published', len(payloads))
+        except Exception as e:
+            # Sem o banco, entregar ao menos aos clientes deste processo
+            self._count('fallbacks', len(payloads))
+            logging.error(f"Notificações: erro ao publicar via NOTIFY, entregando localmente: {e}")
+            MemoryTransport().publish(notifications_data)
+
+    def _decode(self, payload):
+        """Converte o payload recebido em (enfileirada_em, dados)"""
+        message = json.loads(payload)
+        # Latência medida desde a publicação (relógio de parede, comum aos processos)
+        enqueued_at = time.monotonic() - max(time.time() - message.get('t', time.time()), 0)
+
+        notification_data = message.get('n')
+        if notification_data is None and message.get('ref'):
+            from app.models.database import session_scope
+            from app.models.notification import Notification
+
+            with session_scope() as db:
+                notification = db.get(Notification, message['ref'])
+                notification_data = notification.to_dict() if notification else None
+
+        return enqueued_at, notification_data
+
+    def _connect(self):
+        """Abre a conexão dedicada do LISTEN, com os mesmos parâmetros da engine"""
+        from app.models.database import engine
+
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        connection = engine.dialect.dbapi.connect(*cargs, **cparams)
+        connection.autocommit = True
+        cursor = connection.cursor()
+        cursor.execute(f'LISTEN "{self.channel}"')
+        cursor.close()
+        return connection
+
+    def _listen(self):
+        """Loop do listener: repassa as notificações recebidas para a fila local"""
+        from eventlet.hubs import trampoline
+
+        delay = 1
+        while True:
+            connection = None
+            try:
+                connection = self._connect()
+                self.listening = True
+                delay = 1
+                logging.info(f"Notificações: escutando o canal '{self.channel}'")
+
+                while True:
+                    trampoline(connection.fileno(), read=True)
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        try:
+                            enqueued_at, notification_data = self._decode(notify.payload)
+                        except Exception as e:
+                            worker_stats.record_error(e)
+                            logging.error(f"Notificações: payload inválido no canal '{self.channel}': {e}")
+                            continue
+                        if notification_data:
+                            notification_queue.put((enqueued_at, notification_data))
+                            self._count('received')
+            except Exception as e:
+                self.listening = False
+                self._count('reconnects')
+                logging.error(f"Notificações: conexão do LISTEN perdida, reconectando em {delay}s: {e}")
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+            time.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_SECONDS)
+
+    def start(self, socketio):
+        socketio.start_background_task(self._listen)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'channel': self.channel,
+                'listening': self.listening,
+                'published': self.published,
+                'received': self.received,
+                'reconnects': self.reconnects,
+                'fallbacks': self.fallbacks
+            }
+
+
+def _create_transport():
+    if app_config.NOTIFICATION_TRANSPORT == 'postgres':
+        return PostgresTransport(app_config.NOTIFICATION_CHANNEL)
+    if app_config.NOTIFICATION_TRANSPORT != 'memory':
+        logging.warning(
+            f"Notificações: NOTIFICATION_TRANSPORT '{app_config.NOTIFICATION_TRANSPORT}' desconhecido, usando 'memory'"
+        )
+    return MemoryTransport()
+
+
+# Transporte configurado em NOTIFICATION_TRANSPORT
+transport = _create_transport()
+
 
 def add_notification(notification_data):
     """
@@ -32,14 +300,97 @@ def add_notification(notification_data):
     Args:
         notification_data (dict): Dados da notificação incluindo user_id
     """
-    notification_queue.put(notification_data)
+    transport.publish([notification_data])
+
+
+def add_notifications(notifications_data):
+    """
+    Adiciona várias notificações à fila de uma só vez
+
+    Args:
+        notifications_data (list): Lista de dicts de notificação, cada um com user_id
+    """
+    transport.publish(list(notifications_data))
 
 
 def get_queue():
     """
-    Retorna a instância da fila de notificações
+    Retorna a fila local de notificações (alimentada pelo transporte configurado)
 
     Returns:
         queue.Queue: Fila thread-safe de notificações
     """
     return notification_queue
+
+
+def get_stats():
+    """
+    Retorna as métricas do worker de notificações
+
+    Returns:
+        dict: Profundidade da fila, entregas, ignoradas (usuário offline), erros, lotes, latência (ms) e transporte
+    """
+    stats = worker_stats.snapshot()
+    stats['transport'] = transport.snapshot()
+    return stats
+
+
+def _next_batch():
+    """Bloqueia até haver notificações e retorna todas as pendentes (até MAX_BATCH_SIZE)"""
+    batch = [notification_queue.get()]
+    while len(batch) < MAX_BATCH_SIZE:
+        try:
+            batch.append(notification_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _emit(socketio, notification_data):
+    """Emite para a room do usuário; retorna False se ele não tem socket neste processo"""
+    user_id = notification_data.get('user_id')
+    if not user_id or not presence_registry.is_online(user_id):
+        return False
+
+    # Emitir notificação para a room específica do usuário
+    # Rooms são gerenciadas automaticamente pelo Flask-SocketIO
+    socketio.emit(
+        'new_notification',
+        notification_data,
+        room=f'user_{user_id}',
+        namespace='/'
+    )
+    return True
+
+
+def run_worker(socketio):
+    """
+    Loop do worker em background (iniciado com socketio.start_background_task)
+
+    Com o eventlet.monkey_patch() a fila é cooperativa: o get() bloqueia
+    apenas esta greenlet, sem acordar enquanto a fila está vazia. Com o
+    transporte postgres também inicia o listener do canal.
+
+    Args:
+        socketio: Instância do Flask-SocketIO usada para emitir
+    """
+    transport.start(socketio)
+    worker_stats.running = True
+
+    while True:
+        batch = _next_batch()
+        worker_stats.record_batch(len(batch))
+
+        for enqueued_at, notification_data in batch:
+            try:
+                if _emit(socketio, notification_data):
+                    worker_stats.record_delivery((time.monotonic() - enqueued_at) * 1000)
+                else:
+                    # Offline: a notificação já está no banco e será lida ao abrir a página
+                    worker_stats.record_skip()
+            except Exception as e:
+                worker_stats.record_error(e)
+                logging.error(
+                    f"Notificações: erro ao emitir para o usuário "
+                    f"{notification_data.get('user_id')}: {e}", exc_info=True
+                )
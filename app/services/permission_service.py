@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço de Permissões
+
+Mantém em memória as permissões efetivas de cada usuário, evitando consultas
+ao banco a cada verificação de acesso.
+
+O catálogo da tabela permissions é compilado em posições de bits: cada grupo
+tem uma máscara pré-calculada e a máscara do usuário é o OR das máscaras dos
+seus grupos. Verificar uma ou várias permissões é uma única operação bit a bit.
+
+Invalidação entre processos:
+- A tabela cache_versions guarda a versão global das permissões
+- Toda alteração de grupos, membros ou permissões chama bump_version() na
+  mesma transação da alteração
+- Cada processo consulta a versão no máximo a cada PERMISSION_CACHE_TTL
+  segundos e descarta o cache local quando ela muda; o processo que fez a
+  alteração descarta o próprio cache logo após o commit
+
+Exemplo de uso:
+    from app.services.permission_service import permission_service
+
+    permissions = permission_service.get_user_permissions(user_id)
+    if 'travels_approve' in permissions:
+        ...
+"""
+import threading
+import time
+
+from sqlalchemy import event
+
+from config.app import PERMISSION_CACHE_TTL
+from app.models.database import get_db
+from app.models.cache_version import CacheVersion
+from app.models.permission import Permission
+from app.models.user import User
+from app.models.user_group import user_groups
+from app.models.group_permission import group_permissions
+
+# Nome da versão das permissões na tabela cache_versions
+PERMISSIONS_CACHE = 'permissions'
+
+
+class PermissionCatalog:
+    """
+    Catálogo de permissões compilado em máscaras de bits
+
+    Cada slug da tabela permissions recebe uma posição de bit (na ordem do id)
+    e cada grupo recebe a máscara com os bits das suas permissões.
+    """
+
+    def __init__(self, slugs, group_permission_ids, permission_bits_by_id):
+        self.bits = {slug: 1 << index for index, slug in enumerate(slugs)}
+        self.slugs = list(slugs)
+        self.group_masks = {}
+        for group_id, permission_id in group_permission_ids:
+            bit = permission_bits_by_id.get(permission_id)
+            if bit is not None:
+                self.group_masks[group_id] = self.group_masks.get(group_id, 0) | bit
+        self._masks = {}
+
+    @classmethod
+    def load(cls, db):
+        """Compila o catálogo a partir das tabelas permissions e group_permissions"""
+        permissions = db.query(Permission.id, Permission.slug).order_by(Permission.id).all()
+        bits_by_id = {permission_id: 1 << index for index, (permission_id, _) in enumerate(permissions)}
+        pairs = db.query(group_permissions.c.group_id, group_permissions.c.permission_id).all()
+        return cls([slug for _, slug in permissions], pairs, bits_by_id)
+
+    def mask_for(self, permission_slugs):
+        """Máscara com os bits dos slugs informados (slugs desconhecidos são ignorados)"""
+        if isinstance(permission_slugs, str):
+            return self.bits.get(permission_slugs, 0)
+
+        key = tuple(permission_slugs)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = 0
+            for slug in key:
+                mask |= self.bits.get(slug, 0)
+            self._masks[key] = mask
+        return mask
+
+    def mask_for_groups(self, group_ids):
+        mask = 0
+        for group_id in group_ids:
+            mask |= self.group_masks.get(group_id, 0)
+        return mask
+
+
+class PermissionMask:
+    """
+    Permissões efetivas de um usuário ou grupo representadas como máscara de bits
+
+    Suporta o operador `in` com slugs, então pode ser usada diretamente nos
+    templates: {% if 'travels_create' in user_permissions %}
+    """
+
+    __slots__ = ('mask', 'catalog')
+
+    def __init__(self, mask, catalog):
+        self.mask = mask
+        self.catalog = catalog
+
+    def __contains__(self, permission_slug):
+        bit = self.catalog.bits.get(permission_slug)
+        return bit is not None and self.mask & bit != 0
+
+    def has_any(self, permission_slugs):
+        """True se possui pelo menos uma das permissões"""
+        return self.mask & self.catalog.mask_for(permission_slugs) != 0
+
+    def has_all(self, permission_slugs):
+        """True se possui todas as permissões (slugs desconhecidos nunca são satisfeitos)"""
+        permission_slugs = list(permission_slugs)
+        if any(slug not in self.catalog.bits for slug in permission_slugs):
+            return False
+        required = self.catalog.mask_for(permission_slugs)
+        return self.mask & required == required
+
+    def __iter__(self):
+        return (slug for slug in self.catalog.slugs if self.mask & self.catalog.bits[slug])
+
+    def __len__(self):
+        return bin(self.mask).count('1')
+
+    def __bool__(self):
+        return self.mask != 0
+
+
+# Permissões de quem não está logado
+NO_PERMISSIONS = PermissionMask(0, PermissionCatalog([], [], {}))
+
+
+class PermissionService:
+    """Serviço de consulta e cache das permissões efetivas dos usuários"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._holders = {}
+        self._catalog = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get_catalog(self):
+        """Retorna o catálogo compilado da versão atual das permissões"""
+        self._check_version()
+
+        catalog = self._catalog
+        if catalog is None:
+            version = self._version
+            catalog = PermissionCatalog.load(get_db())
+            with self._lock:
+                # Não guardar o resultado se o cache foi invalidado durante a consulta
+                if version is not None and version == self._version:
+                    self._catalog = catalog
+        return catalog
+
+    def get_user_permissions(self, user_id):
+        """
+        Retorna as permissões efetivas de um usuário
+
+        Args:
+            user_id: ID do usuário
+
+        Returns:
+            PermissionMask: Permissões de todos os grupos do usuário (suporta `in`)
+        """
+        catalog = self.get_catalog()
+
+        permissions = self._cache.get(user_id)
+        if permissions is None or permissions.catalog is not catalog:
+            version = self._version
+            permissions = PermissionMask(catalog.mask_for_groups(self._load_user_group_ids(user_id)), catalog)
+            with self._lock:
+                if version is not None and version == self._version:
+                    self._cache[user_id] = permissions
+        return permissions
+
+    def get_group_permissions(self, group_id):
+        """
+        Retorna as permissões de um grupo
+
+        Args:
+            group_id: ID do grupo
+
+        Returns:
+            PermissionMask: Permissões do grupo (suporta `in`)
+        """
+        catalog = self.get_catalog()
+        return PermissionMask(catalog.group_masks.get(group_id, 0), catalog)
+
+    def get_user_ids_with_permission(self, permission_slug, active_only=True):
+        """
+        Retorna os IDs dos usuários que possuem uma permissão
+
+        Resolvido com uma única consulta (user_groups -> group_permissions ->
+        permissions) e mantido em cache até a próxima mudança de versão.
+
+        Args:
+            permission_slug: Slug da permissão (ex: 'travels_approve')
+            active_only: Considerar apenas usuários ativos
+
+        Returns:
+            frozenset: IDs dos usuários
+        """
+        self._check_version()
+
+        key = (permission_slug, active_only)
+        user_ids = self._holders.get(key)
+        if user_ids is None:
+            version = self._version
+            user_ids = self._load_user_ids_with_permission(permission_slug, active_only)
+            with self._lock:
+                if version is not None and version == self._version:
+                    self._holders[key] = user_ids
+        return user_ids
+
+    def bump_version(self, db=None):
+        """
+        Incrementa a versão global das permissões na transação atual
+
+        Deve ser chamado antes do commit de qualquer alteração em grupos,
+        membros de grupos ou permissões de grupos.
+
+        Args:
+            db: Sessão usada na alteração (padrão: sessão da requisição)
+        """
+        db = db or get_db()
+        updated = db.query(CacheVersion)\
+            .filter(CacheVersion.name == PERMISSIONS_CACHE)\
+            .update({CacheVersion.version: CacheVersion.version + 1}, synchronize_session=False)
+        if not updated:
+            db.add(CacheVersion(name=PERMISSIONS_CACHE, version=1))
+
+        # Descarta o cache deste processo assim que a alteração for confirmada
+        session = db() if callable(db) else db
+        event.listen(session, 'after_commit', self._on_commit, once=True)
+
+    def invalidate(self):
+        """Descarta o cache local e força a releitura da versão"""
+        with self._lock:
+            self._cache.clear()
+            self._holders.clear()
+            self._catalog = None
+            self._version = None
+            self._checked_at = 0.0
+
+    def _on_commit(self, session):
+        self.invalidate()
+
+    def _check_version(self):
+        """Descarta o cache quando a versão global mudou (no máximo a cada PERMISSION_CACHE_TTL)"""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < PERMISSION_CACHE_TTL:
+            return
+
+        db = get_db()
+        version = db.query(CacheVersion.version)\
+            .filter(CacheVersion.name == PERMISSIONS_CACHE)\
+            .scalar() or 0
+
+        with self._lock:
+            if version != self._version:
+                self._cache.clear()
+                self._holders.clear()
+                self._catalog = None
+                self._version = version
+            self._checked_at = now
+
+    def _load_user_group_ids(self, user_id):
+        """IDs dos grupos do usuário"""
+        db = get_db()
+        rows = db.query(user_groups.c.group_id).filter(user_groups.c.user_id == user_id).all()
+        return [group_id for (group_id,) in rows]
+
+    def _load_user_ids_with_permission(self, permission_slug, active_only):
+        """IDs dos usuários com a permissão, em uma única consulta"""
+        db = get_db()
+        query = db.query(user_groups.c.user_id)\
+            .join(group_permissions, group_permissions.c.group_id == user_groups.c.group_id)\
+            .join(Permission, Permission.id == group_permissions.c.permission_id)\
+            .filter(Permission.slug == permission_slug)
+
+        if active_only:
+            query = query.join(User, User.id == user_groups.c.user_id).filter(User.active.is_(True))
+
+        return frozenset(user_id for (user_id,) in query.distinct().all())
+
+
+# Instância singleton do serviço
+permission_service = PermissionService()
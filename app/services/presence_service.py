@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Registro de Presença Socket.IO
+
+Guarda todas as conexões Socket.IO abertas de cada usuário. Um usuário com
+várias abas (ou navegador e celular) tem um socket por conexão, e fechar uma
+delas não o deixa offline enquanto houver outra aberta.
+
+Uso:
+- handle_connect/handle_disconnect registram e removem o socket
+- Antes de emitir, is_online(user_id) evita o emit para quem não tem nenhum
+  socket neste processo (os emits do Flask-SocketIO são locais ao processo)
+- snapshot() expõe usuários e sockets conectados para a API de diagnóstico
+
+Backend (PRESENCE_BACKEND):
+- memory (padrão): apenas o estado do processo
+- postgres: cada conexão também é gravada na tabela socket_presence com o
+  processo que a atende. is_online_anywhere() e count_online() consultam
+  todos os processos. Um heartbeat a cada PRESENCE_HEARTBEAT_SECONDS atualiza
+  last_seen_at das conexões do processo e remove as de processos que pararam
+  de responder (sem heartbeat há 3 intervalos)
+
+Exemplo de uso:
+    from app.services.presence_service import presence_registry
+
+    if presence_registry.is_online(user_id):
+        socketio.emit('new_notification', data, room=f'user_{user_id}')
+"""
+import logging
+import os
+import socket
+import threading
+import time
+
+from sqlalchemy import delete, func, select, update
+
+from config import app as app_config
+
+# Heartbeats perdidos até as conexões de um processo serem consideradas encerradas
+STALE_HEARTBEATS = 3
+
+
+class PresenceRegistry:
+    """Sockets conectados por usuário, com consulta opcional entre processos"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.process_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._lock = threading.Lock()
+        self._sockets = {}  # user_id -> set(sid)
+        self._users = {}  # sid -> user_id
+        self.running = False
+        self.counters = {
+            'connects': 0,
+            'disconnects': 0,
+            'peak_sockets': 0,
+            'store_errors': 0
+        }
+
+    @property
+    def table(self):
+        from app.models.socket_presence import SocketPresence
+        return SocketPresence.__table__
+
+    def connect(self, user_id, sid):
+        """
+        Registra um socket conectado do usuário
+
+        Args:
+            user_id: ID do usuário
+            sid: ID da conexão Socket.IO (request.sid)
+
+        Returns:
+            int: Quantidade de sockets do usuário neste processo
+        """
+        with self._lock:
+            sockets = self._sockets.setdefault(user_id, set())
+            sockets.add(sid)
+            self._users[sid] = user_id
+            self.counters['connects'] += 1
+            self.counters['peak_sockets'] = max(self.counters['peak_sockets'], len(self._users))
+            count = len(sockets)
+
+        if self.backend == 'postgres':
+            self._store_connect(user_id, sid)
+        return count
+
+    def disconnect(self, sid):
+        """
+        Remove um socket desconectado
+
+        Args:
+            sid: ID da conexão Socket.IO
+
+        Returns:
+            int: ID do usuário do socket, ou None se o socket não estava registrado
+        """
+        with self._lock:
+            user_id = self._users.pop(sid, None)
+            if user_id is None:
+                return None
+            sockets = self._sockets.get(user_id)
+            if sockets is not None:
+                sockets.discard(sid)
+                if not sockets:
+                    del self._sockets[user_id]
+            self.counters['disconnects'] += 1
+
+        if self.backend == 'postgres':
+            self._store_disconnect(sid)
+        return user_id
+
+    def is_online(self, user_id):
+        """Indica se o usuário tem algum socket conectado neste processo"""
+        return user_id in self._sockets
+
+    def socket_count(self, user_id):
+        """Quantidade de sockets do usuário neste processo"""
+        return len(self._sockets.get(user_id, ()))
+
+    def filter_online(self, user_ids):
+        """
+        Filtra os usuários com algum socket conectado neste processo
+
+        Args:
+            user_ids: IDs dos usuários
+
+        Returns:
+            list: IDs dos usuários online, na ordem recebida
+        """
+        return [user_id for user_id in user_ids if user_id in self._sockets]
+
+    def online_user_ids(self):
+        """IDs dos usuários conectados neste processo"""
+        with self._lock:
+            return list(self._sockets)
+
+    def is_online_anywhere(self, user_id):
+        """
+        Indica se o usuário tem algum socket conectado em qualquer processo
+
+        Com o backend memory equivale a is_online().
+        """
+        if self.is_online(user_id):
+            return True
+        if self.backend != 'postgres':
+            return False
+
+        from app.models.database import engine
+
+        with engine.connect() as conn:
+            return conn.execute(
+                select(self.table.c.sid).where(self.table.c.user_id == user_id).limit(1)
+            ).first() is not None
+
+    def count_online(self):
+        """
+        Usuários e sockets conectados em todos os processos
+
+        Returns:
+            dict: users, sockets e processes (com o backend memory, apenas este processo)
+        """
+        if self.backend != 'postgres':
+            with self._lock:
+                return {'users': len(self._sockets), 'sockets': len(self._users), 'processes': 1}
+
+        from app.models.database import engine
+
+        table = self.table
+        with engine.connect() as conn:
+            row = conn.execute(select(
+                func.count(func.distinct(table.c.user_id)),
+                func.count(),
+                func.count(func.distinct(table.c.process_id))
+            )).one()
+        return {'users': row[0], 'sockets': row[1], 'processes': row[2]}
+
+    def _store_connect(self, user_id, sid):
+        from sqlalchemy.dialects.postgresql import insert
+        from app.models.database import engine
+
+        table = self.table
+        statement = insert(table).values(user_id=user_id, sid=sid, process_id=self.process_id)
+        try:
+            with engine.begin() as conn:
+                conn.execute(statement.on_conflict_do_update(
+                    index_elements=[table.c.sid],
+                    set_={'user_id': user_id, 'process_id': self.process_id, 'last_seen_at': func.now()}
+                ))
+        except Exception as e:
+            self._count_error()
+            logging.error(f"Presença: erro ao registrar o socket {sid}: {e}")
+
+    def _store_disconnect(self, sid):
+        from app.models.database import engine
+
+        try:
+            with engine.begin() as conn:
+                conn.execute(delete(self.table).where(self.table.c.sid == sid))
+        except Exception as e:
+            self._count_error()
+            logging.error(f"Presença: erro ao remover o socket {sid}: {e}")
+
+    def _count_error(self):
+        with self._lock:
+            self.counters['store_errors'] += 1
+
+    def heartbeat(self):
+        """
+        Renova as conexões deste processo e remove as de processos inativos
+
+        Returns:
+            int: Conexões removidas de processos inativos
+        """
+        from app.models.database import engine
+
+        table = self.table
+        stale_seconds = app_config.PRESENCE_HEARTBEAT_SECONDS * STALE_HEARTBEATS
+        with engine.begin() as conn:
+            conn.execute(
+                update(table)
+                .where(table.c.process_id == self.process_id)
+                .values(last_seen_at=func.now())
+            )
+            return conn.execute(
+                delete(table)
+                .where(table.c.last_seen_at < func.now() - func.make_interval(0, 0, 0, 0, 0, 0, stale_seconds))
+            ).rowcount
+
+    def run_heartbeat(self):
+        """
+        Loop do heartbeat em background (iniciado com socketio.start_background_task)
+
+        Ao iniciar, remove as conexões que um processo anterior com o mesmo
+        identificador deixou na tabela.
+        """
+        from app.models.database import engine
+
+        self.running = True
+        try:
+            with engine.begin() as conn:
+                conn.execute(delete(self.table).where(self.table.c.process_id == self.process_id))
+        except Exception as e:
+            logging.error(f"Presença: erro ao limpar as conexões anteriores do processo: {e}")
+
+        while True:
+            time.sleep(app_config.PRESENCE_HEARTBEAT_SECONDS)
+            try:
+                removed = self.heartbeat()
+                if removed:
+                    logging.info(f"Presença: {removed} conexão(ões) de processos inativos removida(s)")
+            except Exception as e:
+                self._count_error()
+                logging.error(f"Presença: erro no heartbeat: {e}")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'process_id': self.process_id,
+                'heartbeat_running': self.running,
+                'users': len(self._sockets),
+                'sockets': len(self._users),
+                'max_sockets_per_user': max((len(sockets) for sockets in self._sockets.values()), default=0),
+                **self.counters
+            }
+
+
+def _create_registry():
+    backend = app_config.PRESENCE_BACKEND
+    if backend not in ('memory', 'postgres'):
+        logging.warning(f"Presença: PRESENCE_BACKEND '{backend}' desconhecido, usando 'memory'")
+        backend = 'memory'
+    return PresenceRegistry(backend)
+
+
+# Instância singleton do registro, com o backend configurado em PRESENCE_BACKEND
+presence_registry = _create_registry()
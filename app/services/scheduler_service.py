@@ -1,16 +1,17 @@
 # -*- coding: utf-8 -*-
 """
 Serviço de agendamento de tarefas automáticas
-Gerencia a sincronização automática do Movidesk
+Gerencia a sincronização automática do Movidesk e a manutenção das partições
+de notificações
 """
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
 import logging
-from app.models.database import SessionLocal
+from app.models.database import get_db, session_scope
 from app.models.parameter import Parameter
-from app.services.movidesk_service import MovideskService
+from app.services.movidesk_service import movidesk_service
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +43,16 @@ def init_scheduler(app):
     # Carregar e configurar horários de sincronização
     load_sync_schedules()
 
+    # Partições de notificações: diariamente e uma vez na inicialização
+    scheduler.add_job(
+        func=maintain_notification_partitions,
+        trigger=CronTrigger(hour=3, minute=15),
+        id='notification_partitions',
+        name='Partições de notificações (criação e retenção)',
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+
     # Nota: Os horários são recarregados automaticamente quando salvos via interface
     # Não é necessário verificar periodicamente
 
@@ -51,7 +62,7 @@ def init_scheduler(app):
 def load_sync_schedules():
     """Carrega os horários de sincronização do banco e configura jobs"""
     try:
-        db = SessionLocal()
+        db = get_db()
 
         # Buscar parâmetro com horários
         parameter = db.query(Parameter).filter_by(
@@ -60,12 +71,10 @@ def load_sync_schedules():
 
         if not parameter or not parameter.value:
             # Não logar quando não há configuração (evita poluição de logs)
-            db.close()
             return
 
         # Parse JSON com horários
         schedules = json.loads(parameter.value)
-        db.close()
 
         # Se for objeto, extrair valores; se for array, usar direto
         if isinstance(schedules, dict):
@@ -107,30 +116,20 @@ def load_sync_schedules():
 def sync_movidesk_tickets():
     """
     Executa a sincronização automática de tickets do Movidesk
-    Sincroniza os últimos 3 dias (dia atual + 2 dias anteriores)
+    Incremental: apenas os tickets alterados (lastUpdate) desde a última execução bem-sucedida
     """
     try:
         logger.info("[SCHEDULER] Iniciando sincronização automática do Movidesk...")
 
-        # Calcular datas (3 dias: hoje e mais 2 para trás)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=2)
-
-        # Formatar datas para API
-        start_date_str = start_date.strftime('%Y-%m-%d')
-        end_date_str = end_date.strftime('%Y-%m-%d')
-
-        logger.info(f"[SCHEDULER] Período: {start_date_str} até {end_date_str}")
-
-        # Executar sincronização
-        movidesk_service = MovideskService()
-        result = movidesk_service.sync_tickets(start_date_str, end_date_str)
+        # Executar sincronização (job roda fora de requisição: sessão própria da thread)
+        with session_scope():
+            result = movidesk_service.sync_tickets_incremental()
 
         if result['success']:
             logger.info(
                 f"[SCHEDULER] Sincronização concluída! "
                 f"Novos: {result['synced']}, Atualizados: {result['updated']}, "
-                f"Total: {result['total']}"
+                f"Total: {result['total']}, Marca d'água: {result['watermark']}"
             )
         else:
             logger.error(f"[SCHEDULER] Erro na sincronização: {result.get('error')}")
@@ -141,6 +140,26 @@ def sync_movidesk_tickets():
         traceback.print_exc()
 
 
+def maintain_notification_partitions():
+    """
+    Cria as partições futuras de notifications e remove/arquiva as antigas
+    (NOTIFICATION_RETENTION_MONTHS, NOTIFICATION_RETENTION_MODE)
+    """
+    try:
+        from app.services.notification_partition_service import notification_partition_service
+
+        with session_scope() as db:
+            result = notification_partition_service.maintain(db)
+
+        if result['created'] or result['removed']:
+            logger.info(
+                f"[SCHEDULER] Partições de notificações - criadas: {len(result['created'])}, "
+                f"removidas/arquivadas: {len(result['removed'])}"
+            )
+    except Exception as e:
+        logger.error(f"[SCHEDULER] Erro na manutenção das partições de notificações: {str(e)}")
+
+
 def shutdown_scheduler():
     """Desliga o scheduler gracefully"""
     global scheduler
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 import uuid
-from app.models.database import SessionLocal
+from app.models.database import get_db
 from app.models.user import User
+from app.services.permission_service import permission_service
 
 
 class UserService:
@@ -9,53 +10,44 @@ class UserService:
 
     def get_all_users(self):
         """Retorna todos os usuários"""
-        db = SessionLocal()
-        try:
-            users = db.query(User).order_by(User.name).all()
-            return [user.to_dict() for user in users]
-        finally:
-            db.close()
+        db = get_db()
+        users = db.query(User).order_by(User.name).all()
+        return [user.to_dict() for user in users]
 
     def get_user_by_id(self, user_id):
         """Busca um usuário pelo ID"""
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter_by(id=user_id).first()
-            if not user:
-                return None
-            return user.to_dict()
-        finally:
-            db.close()
+        db = get_db()
+        user = db.query(User).filter_by(id=user_id).first()
+        if not user:
+            return None
+        return user.to_dict()
 
     def get_user_with_groups(self, user_id):
         """Busca um usuário pelo ID com seus grupos"""
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter_by(id=user_id).first()
-            if not user:
-                return None
+        db = get_db()
+        user = db.query(User).filter_by(id=user_id).first()
+        if not user:
+            return None
 
-            # Buscar grupos do usuário
-            from app.models.user_group import user_groups as user_groups_table
-            from app.models.group import Group
+        # Buscar grupos do usuário
+        from app.models.user_group import user_groups as user_groups_table
+        from app.models.group import Group
 
-            user_groups = db.query(Group).join(
-                user_groups_table, user_groups_table.c.group_id == Group.id
-            ).filter(
-                user_groups_table.c.user_id == user.id
-            ).all()
+        user_groups = db.query(Group).join(
+            user_groups_table, user_groups_table.c.group_id == Group.id
+        ).filter(
+            user_groups_table.c.user_id == user.id
+        ).all()
 
-            # Converter para dict
-            user_data = user.to_dict()
-            user_data['groups'] = [group.to_dict() for group in user_groups]
+        # Converter para dict
+        user_data = user.to_dict()
+        user_data['groups'] = [group.to_dict() for group in user_groups]
 
-            return user_data
-        finally:
-            db.close()
+        return user_data
 
     def create_user(self, user_data):
         """Cria um novo usuário"""
-        db = SessionLocal()
+        db = get_db()
         try:
             # Gerar UUID para sincronização com auth-service
             sid_uuid = str(uuid.uuid4())
@@ -77,6 +69,7 @@ class UserService:
                 from app.models.group import Group
                 groups = db.query(Group).filter(Group.id.in_(group_ids)).all()
                 user.groups = groups
+                permission_service.bump_version(db)
 
             db.commit()
             db.refresh(user)
@@ -84,17 +77,17 @@ class UserService:
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     def update_user(self, user_id, user_data):
         """Atualiza um usuário"""
-        db = SessionLocal()
+        db = get_db()
         try:
             user = db.query(User).filter_by(id=user_id).first()
             if not user:
                 return None
 
+            was_active = user.active
+
             user.name = user_data.get('name', user.name)
             user.email = user_data.get('email', user.email)
             user.phone = user_data.get('phone', user.phone)
@@ -108,31 +101,32 @@ class UserService:
                 groups = db.query(Group).filter(Group.id.in_(group_ids)).all()
                 user.groups = groups
 
+            # Membros e status ativo alimentam o cache de permissões
+            if 'groups' in user_data or user.active != was_active:
+                permission_service.bump_version(db)
+
             db.commit()
             db.refresh(user)
             return user.to_dict()
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
     def delete_user(self, user_id):
         """Remove um usuário"""
-        db = SessionLocal()
+        db = get_db()
         try:
             user = db.query(User).filter_by(id=user_id).first()
             if not user:
                 return False
 
             db.delete(user)
+            permission_service.bump_version(db)
             db.commit()
             return True
         except Exception as e:
             db.rollback()
             raise e
-        finally:
-            db.close()
 
 
 # Instância singleton do serviço
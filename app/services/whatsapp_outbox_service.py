@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Serviço da Fila Persistente do WhatsApp
+
+As mensagens de WhatsApp são gravadas na tabela whatsapp_outbox na mesma
+transação que cria as notificações, e enviadas por um worker em background.
+Assim uma requisição nunca espera pela Evolution API e nenhuma mensagem se
+perde se o processo reiniciar ou a API estiver fora do ar.
+
+Ciclo de uma mensagem:
+- pending: aguardando envio (next_attempt_at indica quando pode ser enviada)
+- sending: reservada por um worker (SELECT ... FOR UPDATE SKIP LOCKED, então
+  vários processos podem rodar o worker sem enviar a mesma mensagem duas vezes)
+- sent: enviada com sucesso
+- dead: descartada após WHATSAPP_OUTBOX_MAX_ATTEMPTS tentativas
+
+Falhas voltam para pending com espera exponencial
+(WHATSAPP_OUTBOX_BACKOFF_SECONDS * 2^(tentativas - 1)). Mensagens que ficaram
+em sending porque o processo morreu durante o envio voltam para pending quando
+a reserva expira.
+
+Exemplo de uso:
+    from app.services.whatsapp_outbox_service import whatsapp_outbox_service
+
+    whatsapp_outbox_service.enqueue([('5569999999999', 'Mensagem')], db=db)
+    db.commit()
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert
+
+from config import app as app_config
+from app.models.database import session_scope
+from app.models.whatsapp_outbox import WhatsappOutbox, OutboxStatus
+
+# Tempo máximo que uma mensagem pode ficar reservada (sending) antes de voltar para a fila
+SENDING_LEASE_SECONDS = 120
+
+# Espera máxima entre duas tentativas
+MAX_BACKOFF_SECONDS = 3600
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def backoff_seconds(attempts):
+    """
+    Espera antes da próxima tentativa
+
+    Args:
+        attempts: Tentativas já realizadas (>= 1)
+
+    Returns:
+        float: Segundos até a próxima tentativa
+    """
+    delay = app_config.WHATSAPP_OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    return min(delay, MAX_BACKOFF_SECONDS)
+
+
+class WhatsappOutboxService:
+    """Enfileiramento e envio das mensagens da tabela whatsapp_outbox"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = False
+        self.counters = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'dead': 0,
+            'recovered': 0
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def enqueue(self, messages, db):
+        """
+        Grava mensagens na fila, na transação da sessão informada
+
+        Não faz commit: as mensagens só ficam visíveis para o worker quando a
+        transação de quem chamou for confirmada.
+
+        Args:
+            messages: Lista de tuplas (phone_number, message)
+            db: Sessão do banco
+
+        Returns:
+            int: Quantidade de mensagens enfileiradas
+        """
+        messages = [(phone, message) for phone, message in messages if phone and message]
+        if not messages:
+            return 0
+
+        db.execute(
+            insert(WhatsappOutbox.__table__).values([
+                {'phone': phone, 'message': message, 'status': OutboxStatus.PENDING}
+                for phone, message in messages
+            ])
+        )
+        self._count('enqueued', len(messages))
+        return len(messages)
+
+    def recover_stuck(self, db):
+        """
+        Devolve para a fila as mensagens cuja reserva expirou
+
+        Args:
+            db: Sessão do banco
+
+        Returns:
+            int: Quantidade de mensagens recuperadas
+        """
+        recovered = db.query(WhatsappOutbox)\
+            .filter(WhatsappOutbox.status == OutboxStatus.SENDING,
+                    WhatsappOutbox.next_attempt_at <= _now())\
+            .update({WhatsappOutbox.status: OutboxStatus.PENDING}, synchronize_session=False)
+        if recovered:
+            self._count('recovered', recovered)
+            logging.warning(f"WhatsApp: {recovered} mensagem(ns) presa(s) em envio devolvida(s) à fila")
+        return recovered
+
+    def claim_batch(self, db, limit):
+        """
+        Reserva as próximas mensagens prontas para envio
+
+        Usa FOR UPDATE SKIP LOCKED para que workers concorrentes não reservem
+        as mesmas linhas. A reserva conta como uma tentativa e expira em
+        SENDING_LEASE_SECONDS.
+
+        Args:
+            db: Sessão do banco (deve ser confirmada logo em seguida)
+            limit: Quantidade máxima de mensagens
+
+        Returns:
+            list: Tuplas (id, phone, message, attempts)
+        """
+        rows = db.query(WhatsappOutbox)\
+            .filter(WhatsappOutbox.status == OutboxStatus.PENDING,
+                    WhatsappOutbox.next_attempt_at <= _now())\
+            .order_by(WhatsappOutbox.next_attempt_at, WhatsappOutbox.id)\
+            .limit(limit)\
+            .with_for_update(skip_locked=True)\
+            .all()
+
+        lease_until = _now() + timedelta(seconds=SENDING_LEASE_SECONDS)
+        claimed = []
+        for row in rows:
+            row.status = OutboxStatus.SENDING
+            row.attempts += 1
+            row.next_attempt_at = lease_until
+            claimed.append((row.id, row.phone, row.message, row.attempts))
+        return claimed
+
+    def _record_results(self, db, results):
+        """Grava o resultado dos envios de um lote"""
+        now = _now()
+        max_attempts = app_config.WHATSAPP_OUTBOX_MAX_ATTEMPTS
+
+        for outbox_id, attempts, ok, error in results:
+            if ok:
+                values = {
+                    WhatsappOutbox.status: OutboxStatus.SENT,
+                    WhatsappOutbox.sent_at: now,
+                    WhatsappOutbox.last_error: None
+                }
+                self._count('sent')
+            elif attempts >= max_attempts:
+                values = {
+                    WhatsappOutbox.status: OutboxStatus.DEAD,
+                    WhatsappOutbox.last_error: error
+                }
+                self._count('dead')
+                logging.error(f"WhatsApp: mensagem {outbox_id} descartada após {attempts} tentativas: {error}")
+            else:
+                values = {
+                    WhatsappOutbox.status: OutboxStatus.PENDING,
+                    WhatsappOutbox.next_attempt_at: now + timedelta(seconds=backoff_seconds(attempts)),
+                    WhatsappOutbox.last_error: error
+                }
+                self._count('failed')
+
+            db.query(WhatsappOutbox)\
+                .filter(WhatsappOutbox.id == outbox_id)\
+                .update(values, synchronize_session=False)
+
+    def process_batch(self, pool=None):
+        """
+        Reserva, envia e registra o resultado de um lote de mensagens
+
+        Args:
+            pool: GreenPool usado para enviar as mensagens em paralelo
+
+        Returns:
+            int: Quantidade de mensagens processadas
+        """
+        from app.utils.whatsapp_helper import deliver_whatsapp_message
+
+        # Reserva em uma transação curta, para não segurar locks durante o envio
+        with session_scope() as db:
+            claimed = self.claim_batch(db, app_config.WHATSAPP_OUTBOX_BATCH_SIZE)
+
+        if not claimed:
+            return 0
+
+        def _deliver(item):
+            outbox_id, phone, message, attempts = item
+            ok, error = deliver_whatsapp_message(phone, message)
+            return outbox_id, attempts, ok, error
+
+        if pool is not None:
+            results = list(pool.imap(_deliver, claimed))
+        else:
+            results = [_deliver(item) for item in claimed]
+
+        with session_scope() as db:
+            self._record_results(db, results)
+
+        return len(claimed)
+
+    def run_worker(self):
+        """
+        Loop do worker em background (iniciado com socketio.start_background_task)
+
+        Processa lotes enquanto houver mensagens prontas e aguarda
+        WHATSAPP_OUTBOX_POLL_SECONDS quando a fila está vazia.
+        """
+        import eventlet
+        from eventlet.greenpool import GreenPool
+
+        pool = GreenPool(max(app_config.WHATSAPP_OUTBOX_CONCURRENCY, 1))
+        self.running = True
+        recovered_at = 0.0
+
+        while True:
+            try:
+                now = time.monotonic()
+                if now - recovered_at >= SENDING_LEASE_SECONDS:
+                    with session_scope() as db:
+                        self.recover_stuck(db)
+                    recovered_at = now
+
+                processed = self.process_batch(pool)
+                if processed >= app_config.WHATSAPP_OUTBOX_BATCH_SIZE:
+                    # Fila cheia: seguir para o próximo lote, cedendo a vez às outras greenlets
+                    eventlet.sleep(0)
+                    continue
+            except Exception as e:
+                logging.error(f"WhatsApp: erro no worker da fila: {e}")
+
+            eventlet.sleep(app_config.WHATSAPP_OUTBOX_POLL_SECONDS)
+
+    def get_stats(self, db):
+        """
+        Retorna os contadores do processo e a quantidade de mensagens por status
+
+        Args:
+            db: Sessão do banco
+
+        Returns:
+            dict: Estatísticas da fila
+        """
+        rows = db.query(WhatsappOutbox.status, func.count(WhatsappOutbox.id))\
+            .group_by(WhatsappOutbox.status)\
+            .all()
+        by_status = {status: 0 for status in OutboxStatus.ALL}
+        by_status.update({status: count for status, count in rows})
+
+        oldest_pending = db.query(func.min(WhatsappOutbox.created_at))\
+            .filter(WhatsappOutbox.status == OutboxStatus.PENDING)\
+            .scalar()
+
+        with self._lock:
+            counters = dict(self.counters)
+
+        return {
+            'worker_running': self.running,
+            'concurrency': app_config.WHATSAPP_OUTBOX_CONCURRENCY,
+            'batch_size': app_config.WHATSAPP_OUTBOX_BATCH_SIZE,
+            'max_attempts': app_config.WHATSAPP_OUTBOX_MAX_ATTEMPTS,
+            'by_status': by_status,
+            'oldest_pending': oldest_pending.isoformat() if oldest_pending else None,
+            'process': counters
+        }
+
+
+# Instância singleton do serviço
+whatsapp_outbox_service = WhatsappOutboxService()
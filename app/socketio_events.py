@@ -4,9 +4,9 @@ from flask import session, request
 
 from app.models.notification import Notification
 from app.models.database import get_db
-
-# Dicionário para mapear user_id -> socket_id
-user_sockets = {}
+from app.services.notification_counter_service import notification_counter_service
+from app.services.presence_service import presence_registry
+from app.utils.notification_pagination import clamp_limit, fetch_page, fetch_since
 
 
 def register_socketio_events(socketio):
@@ -17,8 +17,8 @@ def register_socketio_events(socketio):
         """Quando um cliente se conecta"""
         user_id = session.get('user_id')
         if user_id:
-            socket_id = request.sid
-            user_sockets[user_id] = socket_id
+            # Cada aba/dispositivo tem o seu socket; todos entram na room do usuário
+            presence_registry.connect(user_id, request.sid)
             join_room(f'user_{user_id}')
             emit('connected', {'message': 'Conectado ao servidor de notificações'})
         else:
@@ -27,37 +27,52 @@ def register_socketio_events(socketio):
     @socketio.on('disconnect')
     def handle_disconnect():
         """Quando um cliente se desconecta"""
-        user_id = session.get('user_id')
+        # O usuário continua online enquanto tiver outro socket aberto
+        user_id = presence_registry.disconnect(request.sid) or session.get('user_id')
         if user_id:
             leave_room(f'user_{user_id}')
-            if user_id in user_sockets:
-                del user_sockets[user_id]
 
     @socketio.on('request_notifications')
     def handle_request_notifications(data):
-        """Quando o cliente solicita notificações"""
+        """
+        Quando o cliente solicita notificações
+
+        Dados aceitos:
+            limit: Itens por página (padrão 10, máximo 50)
+            cursor: next_cursor da página anterior (responde com notifications_page)
+            since_id: Maior id já recebido; responde apenas com as novas (notifications_delta)
+        """
         user_id = session.get('user_id')
         if not user_id:
             emit('error', {'message': 'Não autenticado'})
             return
 
+        data = data or {}
         db = get_db()
         try:
-            # Buscar últimas notificações
-            limit = data.get('limit', 10)
-            notifications = db.query(Notification).filter_by(
-                user_id=user_id
-            ).order_by(Notification.created_at.desc()).limit(limit).all()
+            # Reconexão: apenas o que o cliente perdeu
+            since_id = data.get('since_id')
+            if since_id is not None:
+                notifications, truncated = fetch_since(db, user_id, int(since_id))
+                emit('notifications_delta', {
+                    'notifications': [n.to_dict() for n in notifications],
+                    'unread_count': notification_counter_service.get(user_id),
+                    'truncated': truncated
+                })
+                return
+
+            # Buscar últimas notificações (ou a página seguinte ao cursor)
+            cursor = data.get('cursor')
+            limit = clamp_limit(data.get('limit'), default=10)
+            notifications, next_cursor = fetch_page(db, user_id, limit, cursor)
 
             # Contar não lidas
-            unread_count = db.query(Notification).filter_by(
-                user_id=user_id,
-                is_read=False
-            ).count()
+            unread_count = notification_counter_service.get(user_id)
 
-            emit('notifications_update', {
+            emit('notifications_page' if cursor else 'notifications_update', {
                 'notifications': [n.to_dict() for n in notifications],
-                'unread_count': unread_count
+                'unread_count': unread_count,
+                'next_cursor': next_cursor
             })
         except Exception as e:
             emit('error', {'message': str(e)})
@@ -78,28 +93,30 @@ def register_socketio_events(socketio):
         db = get_db()
         try:
             from datetime import datetime
-            notification = db.query(Notification).filter_by(
+            # Marcar apenas se ainda não lida, para o contador não ser decrementado duas vezes
+            updated = db.query(Notification).filter_by(
                 id=notification_id,
-                user_id=user_id
-            ).first()
+                user_id=user_id,
+                is_read=False
+            ).update({
+                'is_read': True,
+                'read_at': datetime.now()
+            }, synchronize_session=False)
 
-            if notification:
-                notification.is_read = True
-                notification.read_at = datetime.now()
+            if updated:
+                notification_counter_service.decrement(db, user_id)
                 db.commit()
+            elif not db.query(Notification.id).filter_by(id=notification_id, user_id=user_id).first():
+                emit('error', {'message': 'Notificação não encontrada'})
+                return
 
-                # Contar não lidas restantes
-                unread_count = db.query(Notification).filter_by(
-                    user_id=user_id,
-                    is_read=False
-                ).count()
+            # Contar não lidas restantes
+            unread_count = notification_counter_service.get(user_id)
 
-                emit('notification_marked_read', {
-                    'notification_id': notification_id,
-                    'unread_count': unread_count
-                })
-            else:
-                emit('error', {'message': 'Notificação não encontrada'})
+            emit('notification_marked_read', {
+                'notification_id': notification_id,
+                'unread_count': unread_count
+            })
         except Exception as e:
             db.rollback()
             emit('error', {'message': str(e)})
@@ -109,14 +126,19 @@ def send_notification_to_user(socketio, user_id, notification):
     """
     Função auxiliar para enviar notificação em tempo real para um usuário específico
     Pode ser chamada de qualquer lugar do código
+
+    Returns:
+        bool: True se o usuário tinha algum socket conectado neste processo
     """
+    if not presence_registry.is_online(user_id):
+        return False
     try:
-        if user_id in user_sockets:
-            socketio.emit(
-                'new_notification',
-                notification.to_dict(),
-                room=f'user_{user_id}',
-                namespace='/'
-            )
+        socketio.emit(
+            'new_notification',
+            notification.to_dict(),
+            room=f'user_{user_id}',
+            namespace='/'
+        )
+        return True
     except Exception:
-        pass
+        return False
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Monitoramento do pool de conexões do banco de dados
+
+O pool padrão do SQLAlchemy não expõe quanto tempo cada greenlet esperou
+por uma conexão livre. Este módulo fornece um QueuePool instrumentado que
+mede a espera de cada checkout, conta os timeouts e mantém um histograma
+consultável pelo endpoint administrativo.
+
+Também oferece o modo de diagnóstico de sessões (DB_SESSION_DEBUG), que
+reporta sessões deixadas abertas ao final da requisição e conexões retidas
+por mais tempo que DB_CONNECTION_HOLD_WARN_MS.
+
+Uso:
+    from app.utils.database_monitor import get_pool_status
+
+    status = get_pool_status(engine)
+"""
+import logging
+import threading
+import time
+import weakref
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+# Limites superiores (em ms) dos buckets do histograma de espera
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolStats:
+    """Acumula estatísticas de espera por conexões do pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zera todos os contadores"""
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_wait(self, wait_seconds):
+        """Registra um checkout bem-sucedido e o tempo de espera"""
+        wait_ms = wait_seconds * 1000
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.buckets[self._bucket_index(wait_ms)] += 1
+
+    def record_timeout(self, wait_seconds):
+        """Registra um checkout que estourou o DB_POOL_TIMEOUT"""
+        wait_ms = wait_seconds * 1000
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def snapshot(self):
+        """Retorna uma cópia das estatísticas acumuladas"""
+        with self._lock:
+            histogram = []
+            for index, count in enumerate(self.buckets):
+                label = f'<= {WAIT_BUCKETS_MS[index]}ms' if index < len(WAIT_BUCKETS_MS) else f'> {WAIT_BUCKETS_MS[-1]}ms'
+                histogram.append({'bucket': label, 'count': count})
+
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 3),
+                'wait_histogram': histogram
+            }
+
+    @staticmethod
+    def _bucket_index(wait_ms):
+        for index, limit in enumerate(WAIT_BUCKETS_MS):
+            if wait_ms <= limit:
+                return index
+        return len(WAIT_BUCKETS_MS)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool que mede o tempo de espera de cada checkout
+
+    Cada pool (primário e réplica) tem as suas próprias estatísticas em
+    `stats`, para que os números de um não apareçam no status do outro.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout(time.perf_counter() - start)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+
+def get_pool_status(engine):
+    """
+    Retorna o estado atual do pool da engine junto com as estatísticas acumuladas
+
+    Args:
+        engine: Engine do SQLAlchemy
+
+    Returns:
+        dict: Configuração, ocupação atual e estatísticas de espera do pool
+    """
+    pool = engine.pool
+    status = {
+        'pool_class': type(pool).__name__,
+        'size': pool.size() if hasattr(pool, 'size') else None,
+        'max_overflow': getattr(pool, '_max_overflow', None),
+        'timeout': pool.timeout() if hasattr(pool, 'timeout') else None,
+        'recycle': pool._recycle,
+        'pre_ping': pool._pre_ping,
+        'checked_out': pool.checkedout() if hasattr(pool, 'checkedout') else None,
+        'checked_in': pool.checkedin() if hasattr(pool, 'checkedin') else None,
+        # overflow() é negativo enquanto o pool não atingiu pool_size
+        'overflow': max(pool.overflow(), 0) if hasattr(pool, 'overflow') else None
+    }
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
+
+
+class SessionStats:
+    """Acumula ocorrências detectadas pelo diagnóstico de sessões"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.leaked_sessions = 0
+        self.long_held_connections = 0
+        self.max_hold_ms = 0.0
+        self.recent = []
+
+    def record(self, kind, origin, held_ms=None):
+        """Registra uma ocorrência (sessão aberta ou conexão retida)"""
+        with self._lock:
+            if kind == 'leaked_session':
+                self.leaked_sessions += 1
+            else:
+                self.long_held_connections += 1
+                self.max_hold_ms = max(self.max_hold_ms, held_ms or 0.0)
+
+            self.recent.append({
+                'kind': kind,
+                'origin': origin,
+                'held_ms': round(held_ms, 3) if held_ms is not None else None,
+                'at': time.strftime('%Y-%m-%d %H:%M:%S')
+            })
+            # Manter apenas as ocorrências mais recentes
+            del self.recent[:-50]
+
+    def snapshot(self):
+        """Retorna uma cópia das ocorrências acumuladas"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'leaked_sessions': self.leaked_sessions,
+                'long_held_connections': self.long_held_connections,
+                'max_hold_ms': round(self.max_hold_ms, 3),
+                'recent': list(self.recent)
+            }
+
+
+# Instância global do diagnóstico de sessões
+session_stats = SessionStats()
+
+
+def _current_origin():
+    """Identifica quem está usando a conexão (endpoint da requisição ou thread)"""
+    from flask import has_request_context, request
+
+    if has_request_context():
+        return request.endpoint or request.path
+    return f'thread:{threading.current_thread().name}'
+
+
+def register_session_monitor(engines, session_factory, hold_warn_ms):
+    """
+    Ativa o diagnóstico de sessões e conexões
+
+    Args:
+        engines: Engines do SQLAlchemy cujas conexões serão monitoradas
+        session_factory: sessionmaker cujas sessões serão rastreadas por requisição
+        hold_warn_ms: Tempo (ms) a partir do qual uma conexão retida é reportada
+    """
+    session_stats.enabled = True
+
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checkout_at'] = time.perf_counter()
+        connection_record.info['checkout_origin'] = _current_origin()
+
+    def _on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop('checkout_at', None)
+        origin = connection_record.info.pop('checkout_origin', None)
+        if started is None:
+            return
+
+        held_ms = (time.perf_counter() - started) * 1000
+        if held_ms > hold_warn_ms:
+            session_stats.record('long_held_connection', origin, held_ms)
+            logging.warning(f"Banco de dados: conexão retida por {held_ms:.0f}ms ({origin})")
+
+    for engine in engines:
+        event.listen(engine, 'checkout', _on_checkout)
+        event.listen(engine, 'checkin', _on_checkin)
+
+    @event.listens_for(session_factory, 'after_begin')
+    def _on_session_begin(session, transaction, connection):
+        from flask import g, has_app_context
+
+        if has_app_context():
+            if '_db_sessions' not in g:
+                g._db_sessions = weakref.WeakSet()
+                # No teardown o contexto da requisição já foi removido
+                g._db_sessions_origin = _current_origin()
+            g._db_sessions.add(session)
+
+
+def report_leaked_sessions():
+    """
+    Reporta sessões da requisição atual que ainda estão com transação aberta
+
+    Deve ser chamada no teardown, depois que a sessão da requisição foi removida.
+    """
+    from flask import g, has_app_context
+
+    if not session_stats.enabled or not has_app_context():
+        return
+
+    origin = g.pop('_db_sessions_origin', None) or _current_origin()
+    for session in list(g.pop('_db_sessions', [])):
+        if session.in_transaction():
+            session_stats.record('leaked_session', origin)
+            logging.warning(f"Banco de dados: sessão deixada aberta ao final de {origin}")
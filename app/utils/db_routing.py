@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Roteamento de leituras para a réplica do banco de dados
+
+Controllers que apenas leem dados podem ser marcados com @read_only para que
+as consultas da requisição sejam enviadas à réplica (DB_REPLICA_*). Sem
+réplica configurada o decorator não tem efeito.
+
+Para garantir que o usuário veja as próprias escritas, toda requisição de
+escrita (POST, PUT, PATCH, DELETE) fixa as leituras daquele usuário no
+primário por DB_REPLICA_PIN_SECONDS.
+
+Uso:
+    from app.utils.db_routing import read_only
+
+    @read_only
+    def tickets_view(client_id):
+        ...
+"""
+import time
+from functools import wraps
+
+from flask import request, session
+
+from config import database as db_config
+
+# Chave da sessão Flask com o instante até o qual as leituras ficam no primário
+PIN_SESSION_KEY = '_db_primary_until'
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def is_pinned_to_primary():
+    """Indica se o usuário fez uma escrita recente e deve ler do primário"""
+    return session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+def read_only(f):
+    """
+    Decorator que envia as consultas da requisição para a réplica de leitura
+
+    Deve ser o decorator mais externo, para que a verificação de permissões
+    também use a réplica.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        from app.models.database import db_session, replica_engine
+
+        if replica_engine is not None and not is_pinned_to_primary():
+            db_session().info['read_only'] = True
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def pin_after_write(response):
+    """after_request: fixa as leituras do usuário no primário após uma escrita"""
+    if request.method in WRITE_METHODS and response.status_code < 400 and 'user_id' in session:
+        session[PIN_SESSION_KEY] = time.time() + db_config.DB_REPLICA_PIN_SECONDS
+    return response
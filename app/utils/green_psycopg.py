@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Modo cooperativo (green) do driver psycopg2
+
+O psycopg2 é uma extensão em C: o eventlet.monkey_patch() não alcança o
+socket usado por ele, então cada query bloqueia o hub inteiro (requisições
+concorrentes e pings do Socket.IO incluídos). Registrando um wait callback
+no estilo do psycogreen, o driver passa a devolver o controle ao hub do
+eventlet enquanto aguarda o servidor.
+
+Uso:
+    from app.utils.green_psycopg import configure_green_mode
+
+    configure_green_mode(socketio.async_mode)
+"""
+import logging
+
+import psycopg2
+from psycopg2 import extensions
+
+from config import database as db_config
+
+
+def eventlet_wait_callback(conn, timeout=-1):
+    """Aguarda o socket do psycopg2 cedendo a vez para outros greenlets"""
+    from eventlet.hubs import trampoline
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise psycopg2.OperationalError(f"Resultado inesperado do poll: {state}")
+
+
+def enable_green_psycopg():
+    """Ativa o wait callback cooperativo para as próximas conexões"""
+    extensions.set_wait_callback(eventlet_wait_callback)
+
+
+def disable_green_psycopg():
+    """Volta o psycopg2 para o modo bloqueante padrão"""
+    extensions.set_wait_callback(None)
+
+
+def is_green_psycopg_enabled():
+    """Indica se o wait callback cooperativo está ativo"""
+    return extensions.get_wait_callback() is eventlet_wait_callback
+
+
+def configure_green_mode(async_mode):
+    """
+    Aplica o DB_GREEN_MODE configurado
+
+    Com 'auto' (padrão) o modo cooperativo é ativado quando o Socket.IO roda
+    com async_mode='eventlet'. 'on' força a ativação e 'off' desativa.
+
+    Args:
+        async_mode: Modo assíncrono do servidor (ex: socketio.async_mode)
+
+    Returns:
+        bool: True se o modo cooperativo ficou ativo
+    """
+    mode = db_config.DB_GREEN_MODE
+
+    if mode == 'on' or (mode == 'auto' and async_mode == 'eventlet'):
+        enable_green_psycopg()
+        logging.info("Banco de dados: driver psycopg2 em modo cooperativo (eventlet)")
+        return True
+
+    disable_green_psycopg()
+    return False
@@ -3,7 +3,7 @@
 Helper para enviar notificações em tempo real
 
 Uso:
-    from app.utils.notification_helper import send_notification
+    from app.utils.notification_helper import send_notification, send_notifications_bulk
 
     send_notification(
         user_id=1,
@@ -13,80 +13,166 @@ Uso:
         action_url="/admin/travels/123",
         action_text="Ver Viagem"
     )
+
+    # Vários destinatários com um único INSERT
+    send_notifications_bulk(
+        user_ids=[1, 2, 3],
+        title="Nova Solicitação de Viagem",
+        message="Uma nova viagem aguarda aprovação",
+        notification_type=NotificationType.TRAVEL
+    )
 """
-import logging
+from sqlalchemy import insert
 
 from app.models.notification import Notification, NotificationType
 from app.models.database import get_db
+from app.services.notification_counter_service import notification_counter_service
+from app.services.notification_coalescer import notification_coalescer
 
 
-def send_notification(user_id, title, message, notification_type=NotificationType.INFO,
-                     action_url=None, action_text=None):
+def _enqueue_whatsapp(db, user_ids, title, message):
+    """Grava na fila do WhatsApp uma mensagem para cada usuário com telefone"""
+    from app.models.user import User
+    from app.services.whatsapp_outbox_service import whatsapp_outbox_service
+    from app.utils.whatsapp_helper import format_phone_number
+
+    whatsapp_message = f"*{title}*\n\n{message}"
+    phones = db.query(User.phone).filter(User.id.in_(user_ids), User.phone.isnot(None)).all()
+
+    messages = []
+    for (phone,) in phones:
+        phone = format_phone_number(phone)
+        if phone:
+            messages.append((phone, whatsapp_message))
+
+    whatsapp_outbox_service.enqueue(messages, db)
+
+
+def send_notifications_bulk(user_ids, title, message, notification_type=NotificationType.INFO,
+                            action_url=None, action_text=None, coalesce=True):
     """
-    Cria e envia uma notificação em tempo real para um usuário
+    Cria e envia a mesma notificação para vários usuários
+
+    As notificações são gravadas com um único INSERT ... RETURNING e enfileiradas
+    de uma só vez para o Socket.IO. As mensagens de WhatsApp são gravadas na
+    fila persistente (whatsapp_outbox) na mesma transação e enviadas pelo
+    worker em background, sem bloquear a requisição.
+
+    Em rajadas, usuários que receberam uma notificação do mesmo tipo há menos
+    de NOTIFICATION_COALESCE_SECONDS têm esta retida e recebem um único resumo
+    ao fim da janela (ver notification_coalescer).
 
     Args:
-        user_id: ID do usuário que receberá a notificação
+        user_ids: IDs dos usuários que receberão a notificação
         title: Título da notificação
         message: Mensagem da notificação
         notification_type: Tipo da notificação (NotificationType)
         action_url: URL para ação (opcional)
         action_text: Texto do botão de ação (opcional)
+        coalesce: Permitir reter a notificação para o resumo da rajada
 
     Returns:
-        Notification: Objeto da notificação criada
+        list: Notificações criadas agora (no formato de Notification.to_dict())
     """
+    user_ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+    if coalesce:
+        user_ids = notification_coalescer.admit(
+            user_ids, notification_type, title, message,
+            action_url=action_url, action_text=action_text
+        )
+    if not user_ids:
+        return []
+
     db = get_db()
 
     try:
-        # Criar notificação no banco
-        notification = Notification(
-            user_id=user_id,
-            title=title,
-            message=message,
-            type=notification_type,
-            action_url=action_url,
-            action_text=action_text,
-            is_read=False
-        )
+        # Criar todas as notificações no banco com um único INSERT
+        rows = db.execute(
+            insert(Notification.__table__)
+            .values([
+                {
+                    'user_id': user_id,
+                    'title': title,
+                    'message': message,
+                    'type': notification_type,
+                    'action_url': action_url,
+                    'action_text': action_text,
+                    'is_read': False
+                }
+                for user_id in user_ids
+            ])
+            .returning(
+                Notification.__table__.c.id,
+                Notification.__table__.c.user_id,
+                Notification.__table__.c.created_at,
+                Notification.__table__.c.updated_at
+            )
+        ).all()
+
+        # Atualizar o contador de não lidas e enfileirar as mensagens de WhatsApp na mesma transação
+        notification_counter_service.increment(db, user_ids)
+        _enqueue_whatsapp(db, user_ids, title, message)
 
-        db.add(notification)
         db.commit()
-        db.refresh(notification)
-
-        # Enviar notificação em tempo real via Socket.IO
-        # A notificação é adicionada a uma fila thread-safe que é processada
-        # por um worker eventlet em background, garantindo entrega em tempo real
-        try:
-            from app.services.notification_queue_service import add_notification
-            notification_data = notification.to_dict()
-            add_notification(notification_data)
-        except Exception:
-            # Falha silenciosa - notificação já está salva no banco
-            pass
-
-        # Enviar notificação via WhatsApp se o usuário tiver telefone
-        try:
-            from app.models.user import User
-            from app.utils.whatsapp_helper import send_whatsapp_message, format_phone_number
-
-            user = db.query(User).filter_by(id=user_id).first()
-
-            if user and user.phone:
-                phone = format_phone_number(user.phone)
-                if phone:
-                    whatsapp_message = f"*{title}*\n\n{message}"
-                    send_whatsapp_message(phone, whatsapp_message)
-        except Exception as e:
-            # Falha silenciosa - notificação já está no banco e via Socket.IO
-            logging.error("Erro ao enviar notificação WhatsApp")
-
-        return notification
-
     except Exception as e:
         db.rollback()
         raise e
 
+    notifications = [
+        {
+            'id': row.id,
+            'user_id': row.user_id,
+            'title': title,
+            'message': message,
+            'type': notification_type.value if notification_type else None,
+            'action_url': action_url,
+            'action_text': action_text,
+            'is_read': False,
+            'read_at': None,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'updated_at': row.updated_at.isoformat() if row.updated_at else None
+        }
+        for row in rows
+    ]
+
+    # Enviar notificações em tempo real via Socket.IO
+    # As notificações são adicionadas a uma fila thread-safe que é processada
+    # por um worker eventlet em background, garantindo entrega em tempo real
+    try:
+        from app.services.notification_queue_service import add_notifications
+        add_notifications(notifications)
+    except Exception:
+        # Falha silenciosa - notificações já estão salvas no banco
+        pass
+
+    return notifications
+
+
+def send_notification(user_id, title, message, notification_type=NotificationType.INFO,
+                     action_url=None, action_text=None):
+    """
+    Cria e envia uma notificação em tempo real para um usuário
+
+    Args:
+        user_id: ID do usuário que receberá a notificação
+        title: Título da notificação
+        message: Mensagem da notificação
+        notification_type: Tipo da notificação (NotificationType)
+        action_url: URL para ação (opcional)
+        action_text: Texto do botão de ação (opcional)
+
+    Returns:
+        dict: Notificação criada (no formato de Notification.to_dict()) ou None
+              (retida para o resumo da rajada)
+    """
+    notifications = send_notifications_bulk(
+        [user_id], title, message,
+        notification_type=notification_type,
+        action_url=action_url,
+        action_text=action_text
+    )
+    return notifications[0] if notifications else None
+
 
 def notify_travel_approved(user_id, travel_id, destination):
     """Notifica usuário sobre viagem aprovada"""
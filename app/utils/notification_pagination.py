@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Paginação por cursor (keyset) das notificações do usuário
+
+As notificações são listadas da mais nova para a mais antiga por
+(created_at, id). Em vez de OFFSET, cada página devolve um cursor opaco com o
+(created_at, id) do último item; a página seguinte busca apenas o que vem
+depois dele, usando o índice (user_id, created_at DESC, id DESC). O custo de
+qualquer página é o mesmo da primeira.
+
+Para clientes que reconectam, fetch_since() devolve só as notificações com id
+maior que o último recebido (modo delta), em vez de recarregar a lista toda.
+
+Uso:
+    from app.utils.notification_pagination import fetch_page, fetch_since
+
+    notifications, next_cursor = fetch_page(db, user_id, limit=20, cursor=request.args.get('cursor'))
+"""
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from app.models.notification import Notification
+
+# Itens por página quando o cliente não informa o limite, e o máximo aceito
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+# Máximo de notificações devolvidas no modo delta; acima disso o cliente recarrega a lista
+MAX_DELTA_SIZE = 100
+
+
+def clamp_limit(limit, default=DEFAULT_PAGE_SIZE):
+    """Limita o tamanho da página informado pelo cliente a 1..MAX_PAGE_SIZE"""
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(notification):
+    """
+    Gera o cursor opaco que aponta para depois da notificação informada
+
+    Args:
+        notification: Notification (última da página)
+
+    Returns:
+        str: Cursor em base64 url-safe
+    """
+    raw = f'{notification.created_at.isoformat()}|{notification.id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Lê um cursor gerado por encode_cursor
+
+    Args:
+        cursor: Cursor recebido do cliente
+
+    Returns:
+        tuple: (created_at, id)
+
+    Raises:
+        ValueError: Cursor inválido
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, notification_id = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except Exception:
+        raise ValueError('Cursor inválido')
+
+
+def fetch_page(db, user_id, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    Busca uma página de notificações do usuário, da mais nova para a mais antiga
+
+    Args:
+        db: Sessão do banco
+        user_id: ID do usuário
+        limit: Itens por página (limitado a MAX_PAGE_SIZE)
+        cursor: Cursor da página anterior (None para a primeira página)
+
+    Returns:
+        tuple: (lista de Notification, cursor da próxima página ou None)
+
+    Raises:
+        ValueError: Cursor inválido
+    """
+    limit = clamp_limit(limit)
+
+    query = db.query(Notification).filter(Notification.user_id == user_id)
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Notification.created_at < created_at,
+            and_(Notification.created_at == created_at, Notification.id < notification_id)
+        ))
+
+    # Um item a mais indica se existe próxima página
+    notifications = query.order_by(Notification.created_at.desc(), Notification.id.desc())\
+        .limit(limit + 1)\
+        .all()
+
+    next_cursor = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        next_cursor = encode_cursor(notifications[-1])
+    return notifications, next_cursor
+
+
+def fetch_since(db, user_id, since_id):
+    """
+    Busca as notificações criadas depois da notificação `since_id` (modo delta)
+
+    Args:
+        db: Sessão do banco
+        user_id: ID do usuário
+        since_id: Maior id que o cliente já recebeu
+
+    Returns:
+        tuple: (lista de Notification da mais nova para a mais antiga,
+                True se havia mais que MAX_DELTA_SIZE e o cliente deve recarregar)
+    """
+    notifications = db.query(Notification)\
+        .filter(Notification.user_id == user_id, Notification.id > since_id)\
+        .order_by(Notification.id.desc())\
+        .limit(MAX_DELTA_SIZE + 1)\
+        .all()
+
+    truncated = len(notifications) > MAX_DELTA_SIZE
+    return notifications[:MAX_DELTA_SIZE], truncated
@@ -5,29 +5,48 @@ Funções auxiliares e decorators para verificação de permissões
 """
 
 from functools import wraps
-from flask import session, redirect, url_for, flash, abort
-from app.models.database import SessionLocal
+from flask import session, redirect, url_for, flash, abort, g
+from app.models.database import get_db
 from app.models.user import User
+from app.services.permission_service import permission_service, NO_PERMISSIONS
 
 
 def get_current_user():
     """
-    Retorna o usuário atual da sessão com seus grupos e permissões carregados
+    Retorna o usuário atual da sessão
+
+    O usuário é carregado uma única vez por requisição e memorizado em flask.g.
     """
-    if 'user_id' not in session:
+    user_id = session.get('user_id')
+    if user_id is None:
         return None
 
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.id == session['user_id']).first()
-        if user:
-            # Forçar o carregamento dos relacionamentos antes de fechar a sessão
-            _ = user.groups  # Carrega os grupos
-            for group in user.groups:
-                _ = group.permissions_rel  # Carrega as permissões de cada grupo
-        return user
-    finally:
-        db.close()
+    cached = g.get('_current_user')
+    if cached is None or cached[0] != user_id:
+        db = get_db()
+        cached = g._current_user = (user_id, db.query(User).filter(User.id == user_id).first())
+    return cached[1]
+
+
+def get_current_user_permissions():
+    """
+    Retorna as permissões efetivas do usuário atual
+
+    As permissões vêm do cache entre requisições do permission_service
+    (invalidado pela versão global de permissões) e são memorizadas em
+    flask.g até o fim da requisição.
+
+    Returns:
+        PermissionMask: Máscara de bits das permissões (suporta `in` com slugs)
+    """
+    user_id = session.get('user_id')
+    if user_id is None:
+        return NO_PERMISSIONS
+
+    cached = g.get('_current_user_permissions')
+    if cached is None or cached[0] != user_id:
+        cached = g._current_user_permissions = (user_id, permission_service.get_user_permissions(user_id))
+    return cached[1]
 
 
 def user_has_permission(permission_slug):
@@ -40,11 +59,7 @@ def user_has_permission(permission_slug):
     Returns:
         bool: True se o usuário possui a permissão, False caso contrário
     """
-    user = get_current_user()
-    if not user:
-        return False
-
-    return user.has_permission(permission_slug)
+    return permission_slug in get_current_user_permissions()
 
 
 def user_has_any_permission(permission_slugs):
@@ -57,11 +72,7 @@ def user_has_any_permission(permission_slugs):
     Returns:
         bool: True se o usuário possui pelo menos uma permissão, False caso contrário
     """
-    user = get_current_user()
-    if not user:
-        return False
-
-    return user.has_any_permission(permission_slugs)
+    return get_current_user_permissions().has_any(permission_slugs)
 
 
 def user_has_all_permissions(permission_slugs):
@@ -74,11 +85,7 @@ def user_has_all_permissions(permission_slugs):
     Returns:
         bool: True se o usuário possui todas as permissões, False caso contrário
     """
-    user = get_current_user()
-    if not user:
-        return False
-
-    return user.has_all_permissions(permission_slugs)
+    return get_current_user_permissions().has_all(permission_slugs)
 
 
 def permission_required(permission_slug, redirect_to='admin.dashboard'):
@@ -192,18 +199,13 @@ def inject_user_permissions():
         # Buscar contagem de notificações não lidas
         unread_count = 0
         try:
-            from app.models.database import get_db
-            from app.models.notification import Notification
-            db = get_db()
-            unread_count = db.query(Notification).filter_by(
-                user_id=user.id,
-                is_read=False
-            ).count()
+            from app.services.notification_counter_service import notification_counter_service
+            unread_count = notification_counter_service.get(user.id)
         except:
             pass  # Se falhar, continua sem o contador
 
         return {
-            'user_permissions': user.get_all_permissions(),
+            'user_permissions': get_current_user_permissions(),
             'current_user': user,
             'unread_notifications_count': unread_count
         }
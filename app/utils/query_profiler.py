@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Profiler de consultas SQL por requisição
+
+Conta os statements executados, o tempo total gasto no banco e os formatos de
+consulta repetidos em cada requisição HTTP e em cada evento Socket.IO. Quando
+o mesmo formato se repete mais vezes que DB_N_PLUS_ONE_THRESHOLD (ex.: um
+lazy load dentro de um loop de to_dict()), o padrão é registrado no log com o
+nome do endpoint.
+
+Os totais são agregados por endpoint em memória e exibidos na página
+administrativa de diagnóstico.
+
+Uso:
+    from app.utils.query_profiler import endpoint_query_stats
+
+    piores = endpoint_query_stats.top(sort_by='queries', limit=20)
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import event
+
+# Placeholders dos drivers (%(nome)s do psycopg2, ? do sqlite) e literais numéricos
+_PLACEHOLDER_RE = re.compile(r'%\(\w+\)s|\?|\b\d+\b')
+# Listas de placeholders do IN expandido: (?, ?, ?) -> (?)
+_PLACEHOLDER_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Tamanho máximo do formato guardado em log e na página de diagnóstico
+MAX_SHAPE_LENGTH = 300
+
+
+def normalize_statement(statement):
+    """
+    Reduz um statement ao seu formato, ignorando valores e tamanho de listas IN
+
+    Args:
+        statement: SQL enviado ao driver
+
+    Returns:
+        str: Formato normalizado do statement
+    """
+    shape = _WHITESPACE_RE.sub(' ', statement).strip()
+    shape = _PLACEHOLDER_RE.sub('?', shape)
+    return _PLACEHOLDER_LIST_RE.sub('(?)', shape)
+
+
+class RequestQueryStats:
+    """Consultas executadas durante uma única requisição ou evento"""
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.shapes[normalize_statement(statement)] += 1
+
+    def repeated_shapes(self, threshold):
+        """Formatos executados pelo menos `threshold` vezes, do mais repetido ao menos"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+class EndpointQueryStats:
+    """Agrega as estatísticas de consultas por endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.threshold = 0
+        self.reset()
+
+    def reset(self):
+        """Zera os agregados"""
+        with self._lock:
+            self.endpoints = {}
+
+    def record(self, request_stats, elapsed_ms, repeated):
+        """Incorpora as estatísticas de uma requisição finalizada"""
+        with self._lock:
+            item = self.endpoints.get(request_stats.origin)
+            if item is None:
+                item = {
+                    'endpoint': request_stats.origin,
+                    'requests': 0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'db_ms': 0.0,
+                    'max_db_ms': 0.0,
+                    'elapsed_ms': 0.0,
+                    'n_plus_one': 0,
+                    'last_offender': None
+                }
+                self.endpoints[request_stats.origin] = item
+
+            item['requests'] += 1
+            item['queries'] += request_stats.count
+            item['max_queries'] = max(item['max_queries'], request_stats.count)
+            item['db_ms'] += request_stats.total_ms
+            item['max_db_ms'] = max(item['max_db_ms'], request_stats.total_ms)
+            item['elapsed_ms'] += elapsed_ms
+
+            if repeated:
+                shape, count = repeated[0]
+                item['n_plus_one'] += 1
+                item['last_offender'] = {'shape': shape[:MAX_SHAPE_LENGTH], 'count': count}
+
+    def top(self, sort_by='queries', limit=50):
+        """
+        Retorna os endpoints com mais consultas ou mais tempo de banco
+
+        Args:
+            sort_by: 'queries' (média de consultas por requisição) ou 'db_time' (tempo médio de banco)
+            limit: Quantidade máxima de endpoints
+
+        Returns:
+            list: Endpoints ordenados do pior para o melhor
+        """
+        with self._lock:
+            rows = []
+            for item in self.endpoints.values():
+                requests = item['requests']
+                rows.append({
+                    'endpoint': item['endpoint'],
+                    'requests': requests,
+                    'avg_queries': round(item['queries'] / requests, 1),
+                    'max_queries': item['max_queries'],
+                    'avg_db_ms': round(item['db_ms'] / requests, 3),
+                    'max_db_ms': round(item['max_db_ms'], 3),
+                    'avg_elapsed_ms': round(item['elapsed_ms'] / requests, 3),
+                    'db_share': round(item['db_ms'] / item['elapsed_ms'] * 100, 1) if item['elapsed_ms'] else 0.0,
+                    'n_plus_one': item['n_plus_one'],
+                    'last_offender': item['last_offender']
+                })
+
+        key = 'avg_db_ms' if sort_by == 'db_time' else 'avg_queries'
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:limit]
+
+
+# Instância global dos agregados por endpoint
+endpoint_query_stats = EndpointQueryStats()
+
+
+def current_origin():
+    """Nome do endpoint HTTP ou do evento Socket.IO em execução"""
+    from flask import has_request_context, request
+
+    if not has_request_context():
+        return f'thread:{threading.current_thread().name}'
+
+    # O Flask-SocketIO preenche request.event durante os handlers de eventos
+    socket_event = getattr(request, 'event', None)
+    if socket_event:
+        return f"socketio:{socket_event.get('message')}"
+    return request.endpoint or request.path
+
+
+def _request_stats(create=True):
+    """Estatísticas da requisição atual (armazenadas em g)"""
+    from flask import g, has_app_context
+
+    if not has_app_context():
+        return None
+
+    stats = g.get('_query_stats')
+    if stats is None and create:
+        stats = g._query_stats = RequestQueryStats(current_origin())
+    return stats
+
+
+def register_query_profiler(engine, threshold):
+    """
+    Ativa o profiler de consultas na engine
+
+    Args:
+        engine: Engine do SQLAlchemy
+        threshold: Quantidade de repetições de um mesmo formato que caracteriza N+1
+    """
+    endpoint_query_stats.enabled = True
+    endpoint_query_stats.threshold = threshold
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Guardado no contexto de execução: statements que falham não deixam resíduo
+        context._profiler_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_profiler_started', None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        stats = _request_stats()
+        if stats is not None:
+            stats.record(statement, elapsed_ms)
+
+
+def start_request_profile():
+    """Inicia a contagem no começo da requisição HTTP (para medir a duração total)"""
+    if endpoint_query_stats.enabled:
+        _request_stats()
+
+
+def finish_request_profile():
+    """
+    Finaliza a contagem da requisição atual, reporta N+1 e agrega por endpoint
+
+    Deve ser chamada no teardown. Eventos Socket.IO começam a contar no
+    primeiro statement, pois não passam pelo before_request.
+    """
+    from flask import g
+
+    stats = _request_stats(create=False)
+    if stats is None:
+        return
+    g.pop('_query_stats', None)
+
+    elapsed_ms = (time.perf_counter() - stats.started) * 1000
+    repeated = stats.repeated_shapes(endpoint_query_stats.threshold)
+    for shape, count in repeated:
+        logging.warning(
+            f"Banco de dados: possível N+1 em {stats.origin} - "
+            f"{count}x {shape[:MAX_SHAPE_LENGTH]}"
+        )
+
+    endpoint_query_stats.record(stats, elapsed_ms, repeated)
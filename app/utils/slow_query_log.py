@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Registro de consultas lentas
+
+Toda consulta que ultrapassa DB_SLOW_QUERY_MS é guardada com o SQL, os
+parâmetros (com os valores ocultados), o endpoint de origem, a duração e o
+plano de execução. As ocorrências ficam em um buffer circular em memória,
+exibido na página de diagnóstico, e em logs/slow_queries.log (uma linha JSON
+por consulta).
+
+O plano é obtido com EXPLAIN (ou EXPLAIN ANALYZE, conforme DB_SLOW_QUERY_EXPLAIN)
+apenas para SELECTs no PostgreSQL, dentro de um SAVEPOINT para que uma falha
+não aborte a transação da requisição. Cada formato de consulta é explicado no
+máximo uma vez a cada EXPLAIN_INTERVAL_SECONDS.
+
+Uso:
+    from app.utils.slow_query_log import slow_query_log
+
+    recentes = slow_query_log.recent(limit=20)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+
+from config.logger import LOGS_DIR
+from app.utils.query_profiler import current_origin, normalize_statement
+
+# Intervalo mínimo entre dois EXPLAIN do mesmo formato de consulta
+EXPLAIN_INTERVAL_SECONDS = 300
+
+# Modos de captura do plano
+EXPLAIN_MODES = ('off', 'plan', 'analyze')
+
+logger = logging.getLogger('app.slow_queries')
+
+
+def redact_parameters(parameters):
+    """
+    Substitui os valores dos parâmetros pelo tipo (e tamanho, para textos)
+
+    Args:
+        parameters: dict, lista ou tupla de parâmetros enviados ao driver
+
+    Returns:
+        Mesma estrutura com os valores ocultados
+    """
+    def redact(value):
+        if value is None:
+            return None
+        if isinstance(value, (str, bytes)):
+            return f'<{type(value).__name__}:{len(value)}>'
+        return f'<{type(value).__name__}>'
+
+    if isinstance(parameters, dict):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_parameters(item) if isinstance(item, (dict, list, tuple)) else redact(item) for item in parameters]
+    return redact(parameters)
+
+
+class SlowQueryLog:
+    """Buffer circular das consultas lentas mais recentes"""
+
+    def __init__(self, size=100):
+        self._lock = threading.Lock()
+        self._explained = {}
+        self.enabled = False
+        self.threshold_ms = 0.0
+        self.explain_mode = 'off'
+        self.total = 0
+        self.entries = deque(maxlen=size)
+
+    def configure(self, threshold_ms, explain_mode, size):
+        self.enabled = True
+        self.threshold_ms = threshold_ms
+        self.explain_mode = explain_mode if explain_mode in EXPLAIN_MODES else 'plan'
+        with self._lock:
+            self.entries = deque(self.entries, maxlen=size)
+
+    def reset(self):
+        """Limpa as ocorrências registradas"""
+        with self._lock:
+            self.total = 0
+            self.entries.clear()
+            self._explained.clear()
+
+    def should_explain(self, shape):
+        """Indica se o formato ainda não foi explicado dentro do intervalo"""
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained.get(shape)
+            if last is not None and now - last < EXPLAIN_INTERVAL_SECONDS:
+                return False
+            self._explained[shape] = now
+            return True
+
+    def record(self, entry):
+        with self._lock:
+            self.total += 1
+            self.entries.append(entry)
+
+    def recent(self, limit=50):
+        """Retorna as consultas lentas mais recentes, da mais nova para a mais antiga"""
+        with self._lock:
+            return list(reversed(self.entries))[:limit]
+
+    def snapshot(self, limit=50):
+        return {
+            'enabled': self.enabled,
+            'threshold_ms': self.threshold_ms,
+            'explain_mode': self.explain_mode,
+            'total': self.total,
+            'recent': self.recent(limit)
+        }
+
+
+# Instância global do registro de consultas lentas
+slow_query_log = SlowQueryLog()
+
+
+def _is_select(statement, analyze=False):
+    """
+    Indica se a consulta pode passar por EXPLAIN
+
+    Com ANALYZE a consulta é executada de novo, então apenas SELECT simples:
+    um WITH pode conter DELETE/UPDATE/INSERT (ex.: WITH moved AS (DELETE ...)).
+    """
+    head = statement.lstrip().split(None, 1)
+    allowed = ('SELECT',) if analyze else ('SELECT', 'WITH')
+    return bool(head) and head[0].upper() in allowed
+
+
+def _explain(cursor, statement, parameters, analyze):
+    """
+    Executa EXPLAIN no mesmo cursor/transação da consulta original
+
+    Usa o cursor DBAPI diretamente (não dispara os eventos da engine) e isola
+    a execução em um SAVEPOINT. Com ANALYZE a consulta é executada de novo, e
+    o SAVEPOINT é sempre desfeito: efeitos colaterais da segunda execução
+    (ex.: SELECT pg_notify(...), que publicaria a notificação duas vezes) são
+    descartados.
+    """
+    connection = cursor.connection
+    explain_cursor = connection.cursor()
+    prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+    try:
+        explain_cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            plan = '\n'.join(row[0] for row in explain_cursor.fetchall())
+            if analyze:
+                explain_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            else:
+                explain_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+            return plan
+        except Exception as e:
+            explain_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            return f'EXPLAIN falhou: {e}'
+    except Exception as e:
+        return f'EXPLAIN indisponível: {e}'
+    finally:
+        explain_cursor.close()
+
+
+def _configure_file_logger():
+    """Direciona o logger de consultas lentas para logs/slow_queries.log"""
+    if logger.handlers:
+        return
+
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    handler = logging.FileHandler(os.path.join(LOGS_DIR, 'slow_queries.log'))
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s', '%Y-%m-%d %H:%M:%S'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    # Não replicar as consultas no app.log
+    logger.propagate = False
+
+
+def register_slow_query_log(engine, threshold_ms, explain_mode='plan', size=100):
+    """
+    Ativa o registro de consultas lentas na engine
+
+    Args:
+        engine: Engine do SQLAlchemy
+        threshold_ms: Duração (ms) a partir da qual a consulta é registrada
+        explain_mode: 'off', 'plan' (EXPLAIN) ou 'analyze' (EXPLAIN ANALYZE, reexecuta a consulta)
+        size: Quantidade de ocorrências mantidas em memória
+    """
+    slow_query_log.configure(threshold_ms, explain_mode, size)
+    _configure_file_logger()
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_slow_query_started', None)
+        if started is None:
+            return
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms < slow_query_log.threshold_ms:
+            return
+
+        plan = None
+        if (slow_query_log.explain_mode != 'off' and not executemany
+                and conn.dialect.name == 'postgresql'
+                and _is_select(statement, analyze=slow_query_log.explain_mode == 'analyze')
+                and slow_query_log.should_explain(normalize_statement(statement))):
+            plan = _explain(cursor, statement, parameters, slow_query_log.explain_mode == 'analyze')
+
+        entry = {
+            'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'endpoint': current_origin(),
+            'duration_ms': round(duration_ms, 3),
+            'statement': statement,
+            'parameters': redact_parameters(parameters),
+            'plan': plan
+        }
+        slow_query_log.record(entry)
+        logger.info(json.dumps(entry, ensure_ascii=False, default=str))
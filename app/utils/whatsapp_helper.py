@@ -1,59 +1,114 @@
 # -*- coding: utf-8 -*-
 import logging
+import threading
+import time
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+from typing import Optional, Tuple
 from config import app as app_config
 
-def send_whatsapp_message(phone_number: str, message: str, instance_name: Optional[str] = None) -> bool:
+# Sessão HTTP compartilhada (keep-alive): os envios reaproveitam as conexões
+_http_session = None
+_http_session_lock = threading.Lock()
+
+# Nome da instância resolvida e instante (monotonic) em que expira
+_instance_cache = {'name': None, 'expires_at': 0.0}
+_instance_lock = threading.Lock()
+
+
+def _get_http_session() -> requests.Session:
+    """Sessão HTTP com pool de conexões dimensionado para o worker da fila"""
+    global _http_session
+
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                pool_size = max(app_config.WHATSAPP_OUTBOX_CONCURRENCY, 10)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _http_session = session
+    return _http_session
+
+
+def invalidate_instance_cache():
+    """Descarta o nome da instância em cache, forçando nova busca no próximo envio"""
+    with _instance_lock:
+        _instance_cache['name'] = None
+        _instance_cache['expires_at'] = 0.0
+
+
+def _fetch_instance_name() -> Tuple[Optional[str], Optional[str]]:
+    """Busca a primeira instância disponível na Evolution API"""
+    response = _get_http_session().get(
+        f'{app_config.EVOLUTION_API_URL}/instance/fetchInstances',
+        headers={'apikey': app_config.EVOLUTION_API_KEY},
+        timeout=5
+    )
+
+    if response.status_code != 200:
+        return None, f"Erro ao buscar instâncias: {response.status_code}"
+
+    instances = response.json()
+    if not instances:
+        return None, "Nenhuma instância disponível"
+
+    # Pegar primeira instância disponível
+    first_instance = instances[0] if isinstance(instances, list) else list(instances.values())[0]
+    # Tentar múltiplos campos possíveis para o nome da instância
+    instance_name = (first_instance.get('name') or
+                   first_instance.get('instanceName') or
+                   first_instance.get('instance', {}).get('instanceName') or
+                   first_instance.get('instance', {}).get('name'))
+
+    if not instance_name:
+        return None, "Nome da instância não encontrado"
+    return instance_name, None
+
+
+def _resolve_instance_name() -> Tuple[Optional[str], Optional[str], bool]:
     """
-    Envia mensagem via WhatsApp usando Evolution API
+    Nome da instância, do cache enquanto válido (EVOLUTION_INSTANCE_CACHE_TTL)
+
+    Returns:
+        tuple: (nome, erro, veio_do_cache)
+    """
+    now = time.monotonic()
+    with _instance_lock:
+        if _instance_cache['name'] and now < _instance_cache['expires_at']:
+            return _instance_cache['name'], None, True
+
+    instance_name, error = _fetch_instance_name()
+    if instance_name:
+        with _instance_lock:
+            _instance_cache['name'] = instance_name
+            _instance_cache['expires_at'] = now + app_config.EVOLUTION_INSTANCE_CACHE_TTL
+    return instance_name, error, False
+
+
+def _is_instance_missing(response) -> bool:
+    """Indica se a Evolution API recusou o envio porque a instância não existe"""
+    if response.status_code == 404:
+        return True
+    if response.status_code != 400:
+        return False
+    body = response.text.lower()
+    return 'instance' in body and ('not found' in body or 'does not exist' in body)
 
-    Args:
-        phone_number: Número de telefone no formato internacional (ex: 5569999999999)
-        message: Texto da mensagem a ser enviada
-        instance_name: Nome da instância (se None, pega a primeira disponível)
+
+def _post_message(instance_name: str, phone_number: str, message: str) -> Tuple[bool, Optional[str], bool]:
+    """
+    Envia o texto para a instância informada
 
     Returns:
-        bool: True se enviado com sucesso, False caso contrário
+        tuple: (enviado, erro, instância_inexistente)
     """
     try:
-        api_url = app_config.EVOLUTION_API_URL
-        api_key = app_config.EVOLUTION_API_KEY
-
-        # Se não foi especificada instância, busca a primeira disponível
-        if not instance_name:
-            response = requests.get(
-                f'{api_url}/instance/fetchInstances',
-                headers={'apikey': api_key},
-                timeout=5
-            )
-
-            if response.status_code == 200:
-                instances = response.json()
-                if not instances:
-                    logging.warning("WhatsApp: Nenhuma instância disponível")
-                    return False
-
-                # Pegar primeira instância disponível
-                first_instance = instances[0] if isinstance(instances, list) else list(instances.values())[0]
-                # Tentar múltiplos campos possíveis para o nome da instância
-                instance_name = (first_instance.get('name') or
-                               first_instance.get('instanceName') or
-                               first_instance.get('instance', {}).get('instanceName') or
-                               first_instance.get('instance', {}).get('name'))
-
-                if not instance_name:
-                    logging.warning("WhatsApp: Nome da instância não encontrado")
-                    return False
-            else:
-                logging.error(f"WhatsApp: Erro ao buscar instâncias: {response.status_code}")
-                return False
-
-        # Enviar mensagem
-        response = requests.post(
-            f'{api_url}/message/sendText/{instance_name}',
+        response = _get_http_session().post(
+            f'{app_config.EVOLUTION_API_URL}/message/sendText/{instance_name}',
             headers={
-                'apikey': api_key,
+                'apikey': app_config.EVOLUTION_API_KEY,
                 'Content-Type': 'application/json'
             },
             json={
@@ -62,16 +117,78 @@ def send_whatsapp_message(phone_number: str, message: str, instance_name: Option
             },
             timeout=10
         )
+    except requests.RequestException as e:
+        return False, f"{type(e).__name__}: {e}", False
+
+    if response.status_code in [200, 201]:
+        return True, None, False
+    return False, f"Erro ao enviar mensagem: {response.status_code}", _is_instance_missing(response)
 
-        if response.status_code in [200, 201]:
-            return True
-        else:
-            logging.error(f"WhatsApp: Erro ao enviar mensagem: {response.status_code}")
-            return False
+
+def deliver_whatsapp_message(phone_number: str, message: str, instance_name: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    """
+    Envia mensagem via WhatsApp usando Evolution API, informando o motivo da falha
+
+    Usado pelo worker da fila persistente (whatsapp_outbox_service), que guarda
+    o erro para decidir sobre novas tentativas. O nome da instância fica em
+    cache; se a API responder que a instância em cache não existe (404), ela
+    é buscada de novo e o envio é repetido uma vez. Nas demais falhas
+    (timeout, 5xx) a mensagem pode já ter sido entregue: o erro é devolvido
+    sem reenvio e a fila decide sobre a nova tentativa.
+
+    Args:
+        phone_number: Número de telefone no formato internacional (ex: 5569999999999)
+        message: Texto da mensagem a ser enviada
+        instance_name: Nome da instância (se None, usa a primeira disponível)
+
+    Returns:
+        tuple: (True, None) se enviado com sucesso, (False, erro) caso contrário
+    """
+    try:
+        if instance_name:
+            return _post_message(instance_name, phone_number, message)[:2]
+
+        instance_name, error, cached = _resolve_instance_name()
+        if not instance_name:
+            return False, error
+
+        ok, error, instance_missing = _post_message(instance_name, phone_number, message)
+        if ok or not instance_missing:
+            return ok, error
+
+        # A instância foi recriada ou renomeada: buscar de novo
+        invalidate_instance_cache()
+        if not cached:
+            return False, error
+
+        instance_name, resolve_error, _ = _resolve_instance_name()
+        if not instance_name:
+            return False, resolve_error
+        return _post_message(instance_name, phone_number, message)[:2]
 
     except Exception as e:
-        logging.error(f"WhatsApp: Erro ao enviar mensagem")
-        return False
+        return False, f"{type(e).__name__}: {e}"
+
+
+def send_whatsapp_message(phone_number: str, message: str, instance_name: Optional[str] = None) -> bool:
+    """
+    Envia mensagem via WhatsApp usando Evolution API
+
+    Envio síncrono; notificações devem usar a fila persistente
+    (whatsapp_outbox_service.enqueue), que tenta novamente em caso de falha.
+
+    Args:
+        phone_number: Número de telefone no formato internacional (ex: 5569999999999)
+        message: Texto da mensagem a ser enviada
+        instance_name: Nome da instância (se None, pega a primeira disponível)
+
+    Returns:
+        bool: True se enviado com sucesso, False caso contrário
+    """
+    ok, error = deliver_whatsapp_message(phone_number, message, instance_name)
+    if not ok:
+        logging.error(f"WhatsApp: {error}")
+    return ok
 
 
 def format_phone_number(phone: str) -> Optional[str]:
@@ -6,6 +6,64 @@ import os
 SECRET_KEY = os.getenv('SECRET_KEY', 'sua-chave-secreta-aqui-mude-em-producao')
 DEBUG = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
 
+# Intervalo (segundos) entre verificações da versão do cache de permissões
+PERMISSION_CACHE_TTL = float(os.getenv('PERMISSION_CACHE_TTL', '5'))
+
+# Tempo (segundos) que o contador de notificações não lidas fica em cache no processo
+NOTIFICATION_UNREAD_CACHE_TTL = float(os.getenv('NOTIFICATION_UNREAD_CACHE_TTL', '30'))
+
+# Janela (segundos) de agrupamento de notificações do mesmo tipo para o mesmo usuário (0 desativa)
+NOTIFICATION_COALESCE_SECONDS = float(os.getenv('NOTIFICATION_COALESCE_SECONDS', '30'))
+
 # Evolution API (WhatsApp)
 EVOLUTION_API_URL = os.getenv('EVOLUTION_API_URL', 'http://localhost:8080')
 EVOLUTION_API_KEY = os.getenv('EVOLUTION_API_KEY', 'change-me-to-secure-key')
+# Tempo (s) que o nome da instância resolvida fica em cache
+EVOLUTION_INSTANCE_CACHE_TTL = float(os.getenv('EVOLUTION_INSTANCE_CACHE_TTL', '300'))
+
+# Fila persistente do WhatsApp (worker em background)
+WHATSAPP_OUTBOX_CONCURRENCY = int(os.getenv('WHATSAPP_OUTBOX_CONCURRENCY', '4'))
+WHATSAPP_OUTBOX_BATCH_SIZE = int(os.getenv('WHATSAPP_OUTBOX_BATCH_SIZE', '20'))
+WHATSAPP_OUTBOX_MAX_ATTEMPTS = int(os.getenv('WHATSAPP_OUTBOX_MAX_ATTEMPTS', '6'))
+WHATSAPP_OUTBOX_BACKOFF_SECONDS = float(os.getenv('WHATSAPP_OUTBOX_BACKOFF_SECONDS', '30'))
+WHATSAPP_OUTBOX_POLL_SECONDS = float(os.getenv('WHATSAPP_OUTBOX_POLL_SECONDS', '2'))
+
+# Transporte das notificações em tempo real: 'memory' (um processo) ou 'postgres' (LISTEN/NOTIFY entre processos)
+NOTIFICATION_TRANSPORT = os.getenv('NOTIFICATION_TRANSPORT', 'memory').lower()
+NOTIFICATION_CHANNEL = os.getenv('NOTIFICATION_CHANNEL', 'app_notifications')
+
+# Registro de presença Socket.IO: 'memory' (por processo) ou 'postgres' (consulta entre processos)
+PRESENCE_BACKEND = os.getenv('PRESENCE_BACKEND', 'memory').lower()
+PRESENCE_HEARTBEAT_SECONDS = float(os.getenv('PRESENCE_HEARTBEAT_SECONDS', '30'))
+
+# Partições mensais de notificações: meses mantidos (0 desativa a retenção), 'drop' ou 'archive'
+# (desanexa e renomeia para notifications_archive_*) e partições criadas à frente
+NOTIFICATION_RETENTION_MONTHS = int(os.getenv('NOTIFICATION_RETENTION_MONTHS', '12'))
+NOTIFICATION_RETENTION_MODE = os.getenv('NOTIFICATION_RETENTION_MODE', 'drop').lower()
+NOTIFICATION_PARTITIONS_AHEAD = int(os.getenv('NOTIFICATION_PARTITIONS_AHEAD', '3'))
+
+# Sincronização incremental de tickets do Movidesk (por lastUpdate): dias buscados na primeira
+# execução, sem marca d'água, e sobreposição (s) com a execução anterior para tolerar atrasos
+MOVIDESK_INCREMENTAL_BOOTSTRAP_DAYS = int(os.getenv('MOVIDESK_INCREMENTAL_BOOTSTRAP_DAYS', '3'))
+MOVIDESK_SYNC_OVERLAP_SECONDS = int(os.getenv('MOVIDESK_SYNC_OVERLAP_SECONDS', '300'))
+
+# Busca paginada de tickets do Movidesk: tickets por página ($top), páginas baixadas à frente
+# enquanto as anteriores são gravadas, timeout (s) por página e novas tentativas em falhas temporárias
+MOVIDESK_PAGE_SIZE = int(os.getenv('MOVIDESK_PAGE_SIZE', '500'))
+MOVIDESK_PREFETCH_PAGES = int(os.getenv('MOVIDESK_PREFETCH_PAGES', '2'))
+MOVIDESK_REQUEST_TIMEOUT = float(os.getenv('MOVIDESK_REQUEST_TIMEOUT', '60'))
+MOVIDESK_MAX_RETRIES = int(os.getenv('MOVIDESK_MAX_RETRIES', '3'))
+
+# Tickets gravados por comando INSERT ... ON CONFLICT (e por commit) na sincronização do Movidesk
+MOVIDESK_SYNC_BATCH_SIZE = int(os.getenv('MOVIDESK_SYNC_BATCH_SIZE', '500'))
+
+# Fração mínima das organizações ativas que a API precisa retornar para a sincronização desativar
+# as ausentes (protege contra respostas incompletas)
+MOVIDESK_DEACTIVATION_MIN_RATIO = float(os.getenv('MOVIDESK_DEACTIVATION_MIN_RATIO', '0.5'))
+
+# Limite de requisições por minuto à API do Movidesk, compartilhado por todas as buscas do processo (0 desativa)
+MOVIDESK_RATE_LIMIT_PER_MINUTE = int(os.getenv('MOVIDESK_RATE_LIMIT_PER_MINUTE', '10'))
+
+# Backfill de tickets (--movidesk-backfill): dias por janela e janelas buscadas em paralelo
+MOVIDESK_BACKFILL_WINDOW_DAYS = int(os.getenv('MOVIDESK_BACKFILL_WINDOW_DAYS', '5'))
+MOVIDESK_BACKFILL_CONCURRENCY = int(os.getenv('MOVIDESK_BACKFILL_CONCURRENCY', '4'))
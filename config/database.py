@@ -0,0 +1,35 @@
+# config/database.py
+
+import os
+
+# Pool de conexões do SQLAlchemy
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+# Driver cooperativo com o eventlet: 'auto' (ativa com async_mode='eventlet'), 'on' ou 'off'
+DB_GREEN_MODE = os.getenv('DB_GREEN_MODE', 'auto').lower()
+
+# Diagnóstico de sessões: reporta sessões deixadas abertas e conexões retidas por muito tempo
+DB_SESSION_DEBUG = os.getenv('DB_SESSION_DEBUG', 'false').lower() == 'true'
+DB_CONNECTION_HOLD_WARN_MS = float(os.getenv('DB_CONNECTION_HOLD_WARN_MS', '5000'))
+
+# Profiler de consultas por requisição: contagem, tempo de banco e detecção de N+1
+DB_QUERY_PROFILER = os.getenv('DB_QUERY_PROFILER', 'true').lower() == 'true'
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv('DB_N_PLUS_ONE_THRESHOLD', '10'))
+
+# Registro de consultas lentas (0 desativa); plano capturado com 'off', 'plan' (EXPLAIN) ou 'analyze'
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '500'))
+DB_SLOW_QUERY_EXPLAIN = os.getenv('DB_SLOW_QUERY_EXPLAIN', 'plan').lower()
+DB_SLOW_QUERY_BUFFER = int(os.getenv('DB_SLOW_QUERY_BUFFER', '100'))
+
+# Réplica de leitura (desativada quando DB_REPLICA_HOST está vazio); demais valores herdam do primário
+DB_REPLICA_HOST = os.getenv('DB_REPLICA_HOST', '')
+DB_REPLICA_PORT = os.getenv('DB_REPLICA_PORT', os.getenv('DB_PORT', '5432'))
+DB_REPLICA_USER = os.getenv('DB_REPLICA_USER', os.getenv('DB_USER', 'postgres'))
+DB_REPLICA_PASSWORD = os.getenv('DB_REPLICA_PASSWORD', os.getenv('DB_PASSWORD', 'postgres'))
+DB_REPLICA_NAME = os.getenv('DB_REPLICA_NAME', os.getenv('DB_NAME', 'app_financeiro'))
+# Segundos em que as leituras do usuário ficam no primário após uma escrita (read-your-writes)
+DB_REPLICA_PIN_SECONDS = float(os.getenv('DB_REPLICA_PIN_SECONDS', '10'))
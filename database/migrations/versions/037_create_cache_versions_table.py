@@ -0,0 +1,31 @@
+"""table cache_versions"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '037'
+down_revision: Union[str, None] = '036'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Cria a tabela cache_versions (versões usadas para invalidar caches em memória entre processos)"""
+    op.create_table(
+        'cache_versions',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default='1', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+    # Versão inicial do cache de permissões
+    op.execute("INSERT INTO cache_versions (name, version) VALUES ('permissions', 1)")
+
+
+def downgrade() -> None:
+    """Remove a tabela cache_versions"""
+    op.drop_table('cache_versions')
@@ -0,0 +1,39 @@
+"""table whatsapp_outbox"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '038'
+down_revision: Union[str, None] = '037'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Cria a tabela whatsapp_outbox (fila persistente de mensagens do WhatsApp)"""
+    op.create_table(
+        'whatsapp_outbox',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('phone', sa.String(length=20), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Índice usado pelo worker para buscar as próximas mensagens a enviar
+    op.create_index('ix_whatsapp_outbox_status_next_attempt', 'whatsapp_outbox', ['status', 'next_attempt_at'])
+
+
+def downgrade() -> None:
+    """Remove a tabela whatsapp_outbox"""
+    op.drop_index('ix_whatsapp_outbox_status_next_attempt', table_name='whatsapp_outbox')
+    op.drop_table('whatsapp_outbox')
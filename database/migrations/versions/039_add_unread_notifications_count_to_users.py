@@ -0,0 +1,34 @@
+"""add unread_notifications_count to users"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '039'
+down_revision: Union[str, None] = '038'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Adiciona o contador desnormalizado de notificações não lidas e preenche com os valores atuais"""
+    op.add_column('users', sa.Column('unread_notifications_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute("""
+        UPDATE users
+        SET unread_notifications_count = counts.total
+        FROM (
+            SELECT user_id, COUNT(*) AS total
+            FROM notifications
+            WHERE is_read = false
+            GROUP BY user_id
+        ) AS counts
+        WHERE users.id = counts.user_id
+    """)
+
+
+def downgrade() -> None:
+    """Remove o contador de notificações não lidas"""
+    op.drop_column('users', 'unread_notifications_count')
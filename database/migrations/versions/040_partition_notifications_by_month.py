@@ -0,0 +1,129 @@
+"""partition notifications by month"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '040'
+down_revision: Union[str, None] = '039'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partições criadas à frente do mês atual (as seguintes ficam a cargo do scheduler)
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """
+    Converte notifications em tabela particionada por mês (created_at)
+
+    A tabela atual é renomeada, a nova é criada com partições mensais desde a
+    notificação mais antiga até MONTHS_AHEAD meses à frente (mais a partição
+    default) e os dados são copiados. A sequence dos ids é reaproveitada.
+    """
+    conn = op.get_bind()
+
+    conn.execute(sa.text("ALTER TABLE notifications RENAME TO notifications_legacy"))
+    conn.execute(sa.text("ALTER TABLE notifications_legacy RENAME CONSTRAINT fk_notifications_user TO fk_notifications_legacy_user"))
+    conn.execute(sa.text("ALTER INDEX notifications_pkey RENAME TO notifications_legacy_pkey"))
+    conn.execute(sa.text("DROP INDEX IF EXISTS idx_notifications_user_id"))
+    conn.execute(sa.text("DROP INDEX IF EXISTS idx_notifications_is_read"))
+    conn.execute(sa.text("DROP INDEX IF EXISTS idx_notifications_created_at"))
+
+    # A chave de partição precisa fazer parte da chave primária
+    conn.execute(sa.text("""
+        CREATE TABLE notifications (
+            id INTEGER NOT NULL DEFAULT nextval('notifications_id_seq'),
+            user_id INTEGER NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            message TEXT NOT NULL,
+            type notificationtype NOT NULL DEFAULT 'INFO',
+            action_url VARCHAR(500),
+            action_text VARCHAR(100),
+            is_read BOOLEAN NOT NULL DEFAULT false,
+            read_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT notifications_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT fk_notifications_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        ) PARTITION BY RANGE (created_at)
+    """))
+    conn.execute(sa.text("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id"))
+
+    # Índice das listagens: notificações do usuário (lidas/não lidas) da mais nova para a mais antiga
+    conn.execute(sa.text(
+        "CREATE INDEX idx_notifications_user_read_created ON notifications (user_id, is_read, created_at DESC)"
+    ))
+
+    oldest = conn.execute(sa.text("SELECT MIN(created_at) FROM notifications_legacy")).scalar()
+    today = date.today()
+    month = date(oldest.year, oldest.month, 1) if oldest else date(today.year, today.month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+
+    while month <= last:
+        next_month = _add_months(month, 1)
+        conn.execute(sa.text(
+            f"CREATE TABLE notifications_y{month.year:04d}m{month.month:02d} PARTITION OF notifications "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{next_month.isoformat()} 00:00:00+00')"
+        ))
+        month = next_month
+
+    # Recebe o que cair fora das partições mensais (ex.: scheduler parado por meses)
+    conn.execute(sa.text("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT"))
+
+    conn.execute(sa.text("""
+        INSERT INTO notifications (id, user_id, title, message, type, action_url, action_text,
+                                   is_read, read_at, created_at, updated_at)
+        SELECT id, user_id, title, message, type, action_url, action_text,
+               is_read, read_at, created_at, updated_at
+        FROM notifications_legacy
+    """))
+    conn.execute(sa.text("DROP TABLE notifications_legacy"))
+
+
+def downgrade() -> None:
+    """Volta notifications para uma tabela simples (partições arquivadas não são restauradas)"""
+    conn = op.get_bind()
+
+    conn.execute(sa.text("ALTER TABLE notifications RENAME TO notifications_partitioned"))
+    conn.execute(sa.text("ALTER TABLE notifications_partitioned RENAME CONSTRAINT notifications_pkey TO notifications_partitioned_pkey"))
+    conn.execute(sa.text("ALTER TABLE notifications_partitioned RENAME CONSTRAINT fk_notifications_user TO fk_notifications_partitioned_user"))
+
+    conn.execute(sa.text("""
+        CREATE TABLE notifications (
+            id INTEGER NOT NULL DEFAULT nextval('notifications_id_seq') PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            message TEXT NOT NULL,
+            type notificationtype NOT NULL DEFAULT 'INFO',
+            action_url VARCHAR(500),
+            action_text VARCHAR(100),
+            is_read BOOLEAN NOT NULL DEFAULT false,
+            read_at TIMESTAMP WITH TIME ZONE,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT fk_notifications_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    """))
+    conn.execute(sa.text("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id"))
+
+    conn.execute(sa.text("""
+        INSERT INTO notifications (id, user_id, title, message, type, action_url, action_text,
+                                   is_read, read_at, created_at, updated_at)
+        SELECT id, user_id, title, message, type, action_url, action_text,
+               is_read, read_at, created_at, updated_at
+        FROM notifications_partitioned
+    """))
+    conn.execute(sa.text("DROP TABLE notifications_partitioned"))
+
+    conn.execute(sa.text("CREATE INDEX idx_notifications_user_id ON notifications(user_id)"))
+    conn.execute(sa.text("CREATE INDEX idx_notifications_is_read ON notifications(is_read)"))
+    conn.execute(sa.text("CREATE INDEX idx_notifications_created_at ON notifications(created_at)"))
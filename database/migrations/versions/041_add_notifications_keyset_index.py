@@ -0,0 +1,26 @@
+"""index notifications (user_id, created_at, id) for keyset pagination"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '041'
+down_revision: Union[str, None] = '040'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Índice da listagem paginada por cursor: notificações do usuário por (created_at, id) decrescente"""
+    conn = op.get_bind()
+    conn.execute(sa.text(
+        "CREATE INDEX IF NOT EXISTS idx_notifications_user_created_id "
+        "ON notifications (user_id, created_at DESC, id DESC)"
+    ))
+
+
+def downgrade() -> None:
+    """Remove o índice da paginação por cursor"""
+    op.drop_index('idx_notifications_user_created_id', table_name='notifications')
@@ -0,0 +1,36 @@
+"""table socket_presence"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '042'
+down_revision: Union[str, None] = '041'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Cria a tabela socket_presence (conexões Socket.IO abertas em todos os processos)"""
+    op.create_table(
+        'socket_presence',
+        sa.Column('sid', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('process_id', sa.String(length=100), nullable=False),
+        sa.Column('connected_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('last_seen_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('sid')
+    )
+
+    op.create_index('ix_socket_presence_user_id', 'socket_presence', ['user_id'])
+    op.create_index('ix_socket_presence_process_id', 'socket_presence', ['process_id'])
+
+
+def downgrade() -> None:
+    """Remove a tabela socket_presence"""
+    op.drop_index('ix_socket_presence_process_id', table_name='socket_presence')
+    op.drop_index('ix_socket_presence_user_id', table_name='socket_presence')
+    op.drop_table('socket_presence')
@@ -0,0 +1,22 @@
+"""add last_update to tickets"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '044'
+down_revision: Union[str, None] = '043'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Adiciona a data da última alteração do ticket no Movidesk"""
+    op.add_column('tickets', sa.Column('last_update', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Remove a data da última alteração do ticket"""
+    op.drop_column('tickets', 'last_update')
@@ -0,0 +1,38 @@
+"""table sync_backfill_windows"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '045'
+down_revision: Union[str, None] = '044'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Cria a tabela sync_backfill_windows (janelas concluídas de cada backfill, para retomada)"""
+    op.create_table(
+        'sync_backfill_windows',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('backfill', sa.String(length=100), nullable=False),
+        sa.Column('window_start', sa.Date(), nullable=False),
+        sa.Column('window_end', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+        sa.Column('total', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('synced', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('errors', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('backfill', 'window_start', name='uq_sync_backfill_windows_backfill_start')
+    )
+
+
+def downgrade() -> None:
+    """Remove a tabela sync_backfill_windows"""
+    op.drop_table('sync_backfill_windows')
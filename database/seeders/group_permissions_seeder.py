@@ -11,6 +11,7 @@ sys.path.insert(0, ROOT_DIR)
 from app.models.database import SessionLocal
 from app.models.group import Group
 from app.models.permission import Permission
+from app.services.permission_service import permission_service
 
 
 def seed_group_permissions():
@@ -161,6 +162,8 @@ def seed_group_permissions():
             ).all()
             visitor_group.permissions_rel = visitor_permissions
 
+        # Invalidar o cache de permissões dos processos em execução
+        permission_service.bump_version(db)
         db.commit()
 
         print("[SUCCESS] Seeder de permissões de grupos executado com sucesso")
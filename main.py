@@ -34,6 +34,10 @@ socketio = SocketIO(
     engineio_logger=False
 )
 
+# Driver do banco cooperativo com o hub do eventlet (DB_GREEN_MODE)
+from app.utils.green_psycopg import configure_green_mode
+configure_green_mode(socketio.async_mode)
+
 # Adicionar filtros Jinja customizados
 @app.template_filter('from_json')
 def from_json_filter(value):
@@ -64,20 +68,8 @@ from app.socketio_events import register_socketio_events
 register_socketio_events(socketio)
 
 # Fechar sessões do banco automaticamente após cada requisição
-from app.models.database import db_session
-
-@app.teardown_appcontext
-def shutdown_session(exception=None):
-    """Remove a sessão do banco de dados ao final de cada requisição"""
-    try:
-        if exception:
-            db_session.rollback()
-        else:
-            db_session.commit()
-    except:
-        db_session.rollback()
-    finally:
-        db_session.remove()
+from app.models.database import init_app as init_database
+init_database(app)
 
 def run_migrations():
     """Executa as migrations pendentes"""
@@ -110,6 +102,55 @@ def migrate_fresh():
         print(f"\nErro ao recriar banco de dados: {str(e)}\n")
         return False
 
+def movidesk_resync(since):
+    """Reinicia a sincronização incremental de tickets do Movidesk a partir de uma data"""
+    from datetime import datetime
+    from app.models.database import session_scope
+    from app.services.movidesk_service import movidesk_service
+
+    try:
+        since_date = datetime.strptime(since, '%Y-%m-%d') if since else None
+    except ValueError:
+        print(f"\n[ERRO] Data inválida: {since} (use AAAA-MM-DD)\n")
+        return False
+
+    with session_scope():
+        result = movidesk_service.full_resync_tickets(since_date)
+
+    if not result['success']:
+        print(f"\n[ERRO] Erro na sincronização: {result.get('error')}\n")
+        return False
+
+    print(
+        f"\n[OK] Tickets sincronizados: {result['total']} "
+        f"(novos: {result['synced']}, atualizados: {result['updated']}, erros: {result['errors']})"
+    )
+    print(f"  Marca d'água: {result['watermark']}\n")
+    return result['errors'] == 0
+
+def movidesk_backfill(start_date, end_date):
+    """Sincroniza os tickets do Movidesk criados em um período longo, retomando as janelas pendentes"""
+    from app.services.movidesk_service import movidesk_service
+
+    result = movidesk_service.backfill_tickets(start_date, end_date)
+    if 'windows' not in result:
+        print(f"\n[ERRO] {result.get('error')}\n")
+        return False
+
+    print(
+        f"\n[{'OK' if result['success'] else 'ERRO'}] Backfill {result['backfill']}: "
+        f"{result['completed']} janela(s) concluída(s), {result['skipped']} já concluída(s) antes, "
+        f"{result['failed']} com falha"
+    )
+    print(
+        f"  Tickets: {result['total']} (novos: {result['synced']}, atualizados: {result['updated']}, "
+        f"erros: {result['errors']})"
+    )
+    if result['failed']:
+        print("  Execute o mesmo comando novamente para repetir apenas as janelas com falha.")
+    print()
+    return result['success']
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Servidor Flask do App Financeiro')
 
@@ -117,6 +158,18 @@ if __name__ == '__main__':
     parser.add_argument('--migrate', action='store_true', help='Executa as migrations pendentes')
     parser.add_argument('--migrate-fresh', action='store_true', help='Recria o banco de dados do zero')
 
+    # Movidesk
+    parser.add_argument(
+        '--movidesk-resync', nargs='?', const='', metavar='AAAA-MM-DD',
+        help='Sincroniza todos os tickets do Movidesk alterados desde a data '
+             '(padrão: MOVIDESK_INCREMENTAL_BOOTSTRAP_DAYS dias) e reinicia a marca d\'água'
+    )
+    parser.add_argument(
+        '--movidesk-backfill', nargs=2, metavar=('INICIO', 'FIM'),
+        help='Sincroniza os tickets do Movidesk criados entre INICIO e FIM (AAAA-MM-DD) em janelas paralelas; '
+             'repetir o comando retoma as janelas pendentes'
+    )
+
     # Opções do servidor
     parser.add_argument('--host', default='0.0.0.0')
     parser.add_argument('--port', type=int, default=int(os.getenv('APP_PORT', 5000)))
@@ -133,6 +186,14 @@ if __name__ == '__main__':
         success = migrate_fresh()
         sys.exit(0 if success else 1)
 
+    if args.movidesk_resync is not None:
+        success = movidesk_resync(args.movidesk_resync)
+        sys.exit(0 if success else 1)
+
+    if args.movidesk_backfill:
+        success = movidesk_backfill(*args.movidesk_backfill)
+        sys.exit(0 if success else 1)
+
     # Iniciar o servidor
     try:
         logger.info("Iniciando aplicação...")
@@ -146,37 +207,22 @@ if __name__ == '__main__':
             logger.info("Scheduler de tarefas inicializado")
 
         # Worker que processa fila de notificações em tempo real
-        # Utiliza eventlet para não bloquear o servidor
-        def notification_worker():
-            import eventlet
-            from app.services.notification_queue_service import get_queue
-
-            notification_queue = get_queue()
-
-            while True:
-                try:
-                    # Verificar fila a cada 100ms
-                    eventlet.sleep(0.1)
-
-                    # Processar todas as notificações pendentes
-                    while not notification_queue.empty():
-                        notif_data = notification_queue.get_nowait()
-                        user_id = notif_data.get('user_id')
-
-                        if user_id:
-                            # Emitir notificação para a room específica do usuário
-                            # Rooms são gerenciadas automaticamente pelo Flask-SocketIO
-                            socketio.emit(
-                                'new_notification',
-                                notif_data,
-                                room=f'user_{user_id}',
-                                namespace='/'
-                            )
-                except:
-                    continue
-
-        # Iniciar worker em background
-        socketio.start_background_task(notification_worker)
+        # Fica bloqueado na fila (eventlet) e acorda a cada nova notificação
+        from app.services.notification_queue_service import run_worker as notification_worker
+        socketio.start_background_task(notification_worker, socketio)
+
+        # Worker que envia os resumos das rajadas de notificações
+        from app.services.notification_coalescer import notification_coalescer
+        socketio.start_background_task(notification_coalescer.run_worker)
+
+        # Heartbeat do registro de presença compartilhado entre processos
+        from app.services.presence_service import presence_registry
+        if presence_registry.backend == 'postgres':
+            socketio.start_background_task(presence_registry.run_heartbeat)
+
+        # Worker que envia as mensagens da fila persistente do WhatsApp
+        from app.services.whatsapp_outbox_service import whatsapp_outbox_service
+        socketio.start_background_task(whatsapp_outbox_service.run_worker)
 
         # Mostrar mensagem apenas no processo principal (evitar duplicação no reloader)
         if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
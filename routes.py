@@ -19,6 +19,7 @@ from app.controllers.permissions import permissions_controller
 from app.controllers.groups import groups_controller
 from app.controllers.vehicles import vehicles_controller
 from app.controllers import storage_controller
+from app.controllers.system import system_controller
 from app.utils.permissions_helper import inject_user_permissions
 
 
@@ -224,6 +225,16 @@ def register_routes(app: Flask):
     admin_bp.add_url_rule('/api/storage/<string:file_uuid>/delete', view_func=storage_controller.delete_file, methods=['DELETE'])
     admin_bp.add_url_rule('/api/storage/<string:file_uuid>', view_func=storage_controller.download_file, methods=['GET'])
 
+    # Diagnóstico do Sistema
+    admin_bp.add_url_rule('/api/system/database/pool', view_func=system_controller.database_pool_api, methods=['GET'])
+    admin_bp.add_url_rule('/system/database/queries', view_func=system_controller.database_queries, methods=['GET'])
+    admin_bp.add_url_rule('/api/system/database/queries', view_func=system_controller.database_queries_api, methods=['GET'])
+    admin_bp.add_url_rule('/api/system/database/slow-queries', view_func=system_controller.database_slow_queries_api, methods=['GET'])
+    admin_bp.add_url_rule('/api/system/database/queries/reset', view_func=system_controller.database_queries_reset_api, methods=['POST'])
+    admin_bp.add_url_rule('/api/system/whatsapp/outbox', view_func=system_controller.whatsapp_outbox_api, methods=['GET'])
+    admin_bp.add_url_rule('/api/system/notifications/queue', view_func=system_controller.notification_queue_api, methods=['GET'])
+    admin_bp.add_url_rule('/api/system/socketio/presence', view_func=system_controller.socketio_presence_api, methods=['GET'])
+
     # Registrar Blueprints
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark do driver psycopg2 cooperativo (DB_GREEN_MODE)
+
+Simula N requisições concorrentes, cada uma executando uma query lenta
+(pg_sleep), enquanto um greenlet "heartbeat" mede o atraso do hub do
+eventlet (o mesmo atraso que os pings do Socket.IO sofrem). A rodada é
+executada com o driver bloqueante e depois com o modo cooperativo.
+
+Uso:
+  python scripts/benchmark_green_db.py
+  python scripts/benchmark_green_db.py --requests 50 --query-seconds 0.2
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(current_dir)
+sys.path.insert(0, ROOT_DIR)
+
+from sqlalchemy import create_engine, text
+from app.models.database import DATABASE_URL
+from app.utils.green_psycopg import enable_green_psycopg, disable_green_psycopg
+
+
+def percentile(values, pct):
+    """Percentil simples (nearest-rank) de uma lista de valores"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_round(green, total_requests, query_seconds, pool_size):
+    """Executa uma rodada do benchmark e retorna as métricas coletadas"""
+    if green:
+        enable_green_psycopg()
+    else:
+        disable_green_psycopg()
+
+    # Engine nova por rodada: o modo do driver é fixado na criação da conexão
+    engine = create_engine(DATABASE_URL, pool_size=pool_size, max_overflow=0, pool_timeout=120)
+
+    latencies = []
+    hub_lags = []
+    running = {'value': True}
+
+    def heartbeat():
+        interval = 0.01
+        while running['value']:
+            expected = time.perf_counter() + interval
+            eventlet.sleep(interval)
+            hub_lags.append(max(0.0, time.perf_counter() - expected))
+
+    def fake_request():
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_sleep(:seconds)"), {'seconds': query_seconds})
+        latencies.append(time.perf_counter() - start)
+
+    # Aquecer o pool fora da medição
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    beat = eventlet.spawn(heartbeat)
+    pool = eventlet.GreenPool(total_requests)
+
+    started = time.perf_counter()
+    for _ in range(total_requests):
+        pool.spawn(fake_request)
+    pool.waitall()
+    wall_time = time.perf_counter() - started
+
+    running['value'] = False
+    beat.wait()
+    engine.dispose()
+
+    return {
+        'wall_time': wall_time,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'max': max(latencies) if latencies else 0.0,
+        'hub_lag_max': max(hub_lags) if hub_lags else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do driver psycopg2 cooperativo')
+    parser.add_argument('--requests', type=int, default=20, help='Requisições concorrentes')
+    parser.add_argument('--query-seconds', type=float, default=0.1, help='Duração de cada query (pg_sleep)')
+    parser.add_argument('--pool-size', type=int, default=10, help='Tamanho do pool de conexões')
+    args = parser.parse_args()
+
+    print(f"\nBenchmark: {args.requests} requisições concorrentes, "
+          f"query de {args.query_seconds}s, pool de {args.pool_size} conexões\n")
+    print(f"{'Modo':<14}{'Total (s)':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'max (ms)':>10}{'Lag hub (ms)':>14}")
+
+    for label, green in (('bloqueante', False), ('cooperativo', True)):
+        result = run_round(green, args.requests, args.query_seconds, args.pool_size)
+        print(
+            f"{label:<14}"
+            f"{result['wall_time']:>10.2f}"
+            f"{result['p50'] * 1000:>10.0f}"
+            f"{result['p95'] * 1000:>10.0f}"
+            f"{result['max'] * 1000:>10.0f}"
+            f"{result['hub_lag_max'] * 1000:>14.0f}"
+        )
+
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Evolution API falsa para testar a fila do WhatsApp
+
+Responde aos dois endpoints usados pelo whatsapp_helper, com latência e taxa
+de falhas configuráveis, e mostra quantas mensagens recebeu. Útil para medir
+a vazão do worker (WHATSAPP_OUTBOX_CONCURRENCY) e verificar as novas
+tentativas sem enviar mensagens reais.
+
+Uso:
+  python scripts/fake_evolution_api.py
+  python scripts/fake_evolution_api.py --port 8081 --latency 0.5 --failure-rate 0.2
+
+  # No .env da aplicação
+  EVOLUTION_API_URL=http://localhost:8081
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import random
+import threading
+
+from flask import Flask, jsonify, request
+
+app = Flask(__name__)
+
+settings = {'latency': 0.0, 'failure_rate': 0.0}
+counters = {'instances': 0, 'received': 0, 'failed': 0}
+counters_lock = threading.Lock()
+
+
+@app.route('/instance/fetchInstances', methods=['GET'])
+def fetch_instances():
+    with counters_lock:
+        counters['instances'] += 1
+    return jsonify([{'name': 'fake-instance'}])
+
+
+@app.route('/message/sendText/<instance_name>', methods=['POST'])
+def send_text(instance_name):
+    eventlet.sleep(settings['latency'])
+
+    failed = random.random() < settings['failure_rate']
+    with counters_lock:
+        counters['received'] += 1
+        if failed:
+            counters['failed'] += 1
+        received, total_failed = counters['received'], counters['failed']
+
+    payload = request.get_json(silent=True) or {}
+    print(f"[{received}] {payload.get('number')} {'FALHA' if failed else 'ok'} (falhas: {total_failed})")
+
+    if failed:
+        return jsonify({'error': 'falha simulada'}), 500
+    return jsonify({'key': {'id': f'fake-{received}'}, 'status': 'PENDING'}), 201
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    with counters_lock:
+        return jsonify(dict(counters))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evolution API falsa para testes da fila do WhatsApp')
+    parser.add_argument('--host', default='127.0.0.1', help='Host (padrão: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8081, help='Porta (padrão: 8081)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latência de cada envio em segundos')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fração dos envios que falham (0 a 1)')
+    args = parser.parse_args()
+
+    settings['latency'] = args.latency
+    settings['failure_rate'] = args.failure_rate
+
+    print(f"\nEvolution API falsa em http://{args.host}:{args.port} "
+          f"(latência {args.latency}s, falhas {args.failure_rate:.0%})\n")
+
+    from eventlet import wsgi
+    wsgi.server(eventlet.listen((args.host, args.port)), app, log_output=False)
+
+
+if __name__ == '__main__':
+    main()